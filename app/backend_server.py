@@ -1,37 +1,408 @@
-from flask import Flask, jsonify, render_template, send_from_directory
+from flask import Flask, Response, g, jsonify, render_template, request, send_from_directory
 from flask_cors import CORS
-import pandas as pd
+import csv
+import functools
+import gzip
+import hashlib
+import io
 import os
 import json
-from datetime import datetime
+import queue
+import sys
+import threading
+import time
+import argparse
+import bisect
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the project root to Python path so app.src modules resolve when run from app/
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from app.src.archive import ParquetArchive
+from app.src.extmetrics import EXTENDED_COLUMNS
+from app.src.proctree import build_tree
+from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)  # Enable CORS for all domains
 
+logger = TaskMonitorLogger.get_logger('backend_server')
+REQUEST_SECONDS = REGISTRY.histogram(
+    'taskmonitor_http_request_seconds', 'Dashboard API latency until the response is returned', ['endpoint']
+)
+CSV_PARSE_SECONDS = REGISTRY.histogram(
+    'taskmonitor_csv_parse_seconds', 'Time spent parsing CSV data into DataFrames', ['file']
+)
+CSV_PARSED_BYTES = REGISTRY.counter(
+    'taskmonitor_csv_parsed_bytes_total', 'Bytes of CSV data parsed', ['file']
+)
+RESPONSE_CACHE_LOOKUPS = REGISTRY.counter(
+    'taskmonitor_response_cache_lookups_total', 'API payload cache lookups per data version', ['result']
+)
+METRICS_SUMMARY_INTERVAL = 60  # seconds
+CHART_TITLES = {
+    'memory-monitoring': 'Memory Usage (Performance Monitoring)',
+    'memory-snapshot': 'Memory Usage (Performance Snapshot)',
+    'cpu-usage': 'CPU Usage (Performance Monitoring)'
+}
+
+class IncrementalCSVAggregator:
+    """Running per-name aggregates over an append-only monitoring CSV.
+
+    Only the bytes appended since the previous refresh are parsed. The file is
+    re-read from the start when it is truncated or replaced (new inode, smaller
+    size, or a different first line), e.g. when monitoring is restarted.
+
+    While reading, a sparse index from timestamp to byte offset is kept (one
+    entry per INDEX_STRIDE bytes), so time-range queries only read the part of
+    the file that covers the range.
+
+    The few rows appended per collector cycle are folded with the csv module;
+    pandas is only imported for large catch-up reads and range queries.
+    """
+
+    READ_BLOCK_SIZE = 64 * 1024 * 1024  # Bound memory use when catching up
+    PANDAS_MIN_BYTES = 1024 * 1024  # Smaller blocks are cheaper to fold row by row
+    SIGNATURE_SIZE = 256
+    INDEX_STRIDE = 1024 * 1024
+    TIMESTAMP_LENGTH = len('YYYY-MM-DD HH:MM:SS')
+
+    def __init__(self, file_path, track_totals=True):
+        """
+        Args:
+            file_path: CSV file to follow
+            track_totals: Keep per-name totals (monitoring CSV); rollup tiers only need the index
+        """
+        self.file_path = file_path
+        self.file_label = os.path.basename(file_path)
+        self.track_totals = track_totals
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self, inode=None):
+        """Forget everything read so far"""
+        self.inode = inode
+        self.offset = 0
+        self.mtime_ns = None
+        self.signature = b''
+        self.columns = None
+        self.data_start = 0  # Offset of the first row after the header
+        self.index_timestamps = []
+        self.index_offsets = []
+        self.totals = {}  # name -> [memory_sum, cpu_sum, cpu_count, row_count]
+
+    def _read_signature(self, file):
+        file.seek(0)
+        return file.read(self.SIGNATURE_SIZE)
+
+    def refresh(self):
+        """Fold newly appended rows into the aggregates, rebuilding if the file changed"""
+        with self.lock:
+            try:
+                stat = os.stat(self.file_path)
+            except FileNotFoundError:
+                self._reset()
+                return
+
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self._reset(stat.st_ino)
+            elif stat.st_size == self.offset and stat.st_mtime_ns == self.mtime_ns:
+                return  # Nothing new since the last refresh
+
+            with open(self.file_path, 'rb') as file:
+                if self.offset:
+                    signature = self._read_signature(file)
+                    if signature[:len(self.signature)] != self.signature:
+                        self._reset(stat.st_ino)
+
+                while self.offset < stat.st_size:
+                    file.seek(self.offset)
+                    data = file.read(min(self.READ_BLOCK_SIZE, stat.st_size - self.offset))
+                    end = data.rfind(b'\n') + 1
+                    if end == 0:
+                        break  # Only a partially written line is left
+                    self._fold(data[:end], self.offset)
+                    self.offset += end
+
+                if len(self.signature) < self.SIGNATURE_SIZE:
+                    self.signature = self._read_signature(file)[:self.offset]
+
+            self.mtime_ns = stat.st_mtime_ns
+
+    def _fold(self, data, base_offset):
+        """Parse a block of complete CSV lines and add it to the running totals"""
+        if self.columns is None:
+            header_end = data.find(b'\n') + 1
+            self.columns = next(csv.reader([data[:header_end].decode('utf-8')]))
+            self.data_start = base_offset + header_end
+            data = data[header_end:]
+            base_offset += header_end
+            if not data:
+                return
+
+        self._index_block(data, base_offset)
+        if not self.track_totals:
+            return
+        if len(data) < self.PANDAS_MIN_BYTES:
+            self._fold_rows(data)
+            return
+
+        df = self._parse(data, self.columns)
+        if 'CPU (%)' not in df.columns:
+            df['CPU (%)'] = float('nan')
+
+        grouped = df.groupby('Name').agg(
+            memory_sum=('Memory (MB)', 'sum'),
+            cpu_sum=('CPU (%)', 'sum'),
+            cpu_count=('CPU (%)', 'count'),
+            count=('PID', 'size')
+        )
+        for name, memory_sum, cpu_sum, cpu_count, count in grouped.itertuples():
+            totals = self.totals.setdefault(name, [0.0, 0.0, 0, 0])
+            totals[0] += float(memory_sum)
+            totals[1] += float(cpu_sum)
+            totals[2] += int(cpu_count)
+            totals[3] += int(count)
+
+    def _fold_rows(self, data):
+        """Add a small block of rows to the running totals without pandas"""
+        started = time.perf_counter()
+        name_index = self.columns.index('Name')
+        memory_index = self.columns.index('Memory (MB)')
+        cpu_index = self.columns.index('CPU (%)') if 'CPU (%)' in self.columns else None
+        for row in csv.reader(io.StringIO(data.decode('utf-8'))):
+            if not row:
+                continue
+            totals = self.totals.setdefault(row[name_index], [0.0, 0.0, 0, 0])
+            totals[0] += float(row[memory_index])
+            if cpu_index is not None and row[cpu_index] != '':  # Empty CPU: not measured yet
+                totals[1] += float(row[cpu_index])
+                totals[2] += 1
+            totals[3] += 1
+        CSV_PARSE_SECONDS.labels(self.file_label).observe(time.perf_counter() - started)
+        CSV_PARSED_BYTES.labels(self.file_label).inc(len(data))
+
+    def _parse(self, data, columns):
+        """Parse complete CSV rows without a header, recording parse time"""
+        import pandas as pd
+
+        started = time.perf_counter()
+        # Names stay strings even if they look numeric or like 'NA'; only empty fields are missing
+        df = pd.read_csv(io.BytesIO(data), header=None, names=columns,
+                         dtype={'Name': str}, keep_default_na=False, na_values=[''])
+        CSV_PARSE_SECONDS.labels(self.file_label).observe(time.perf_counter() - started)
+        CSV_PARSED_BYTES.labels(self.file_label).inc(len(data))
+        return df
+
+    def _index_block(self, data, base_offset):
+        """Record (timestamp, offset) of the first row starting in each new INDEX_STRIDE window"""
+        if self.index_offsets:
+            next_mark = self.index_offsets[-1] + self.INDEX_STRIDE
+        else:
+            next_mark = base_offset
+        while next_mark < base_offset + len(data):
+            start = next_mark - base_offset
+            if start > 0:
+                # Rows start right after a newline; the block itself starts on a row
+                start = data.find(b'\n', start - 1) + 1
+                if start == 0 or start >= len(data):
+                    break
+            timestamp = data[start:start + self.TIMESTAMP_LENGTH].decode('utf-8')
+            self.index_timestamps.append(timestamp)
+            self.index_offsets.append(base_offset + start)
+            next_mark = base_offset + start + self.INDEX_STRIDE
+
+    def read_range(self, start=None, end=None):
+        """Return rows with start <= Timestamp <= end as a DataFrame (None before the header exists)
+
+        Timestamps use the file's '%Y-%m-%d %H:%M:%S' format, which sorts
+        lexicographically. The index bounds the bytes that have to be parsed.
+        """
+        self.refresh()
+        with self.lock:
+            if self.columns is None:
+                return None
+            columns = self.columns
+            low, high = self.data_start, self.offset
+            if start is not None:
+                # The last indexed row before `start` is a safe lower bound
+                position = bisect.bisect_left(self.index_timestamps, start)
+                if position > 0:
+                    low = self.index_offsets[position - 1]
+            if end is not None:
+                position = bisect.bisect_right(self.index_timestamps, end)
+                if position < len(self.index_offsets):
+                    high = self.index_offsets[position]
+
+        with open(self.file_path, 'rb') as file:
+            file.seek(low)
+            data = file.read(high - low)
+
+        df = self._parse(data, columns)
+        if start is not None:
+            df = df[df['Timestamp'] >= start]
+        if end is not None:
+            df = df[df['Timestamp'] <= end]
+        return df
+
+    def records(self):
+        """Return per-name averages as a list of dicts"""
+        with self.lock:
+            return [
+                {
+                    'name': name,
+                    'avg_memory': memory_sum / count,
+                    'avg_cpu': cpu_sum / cpu_count if cpu_count else 0.0,
+                    'count': count
+                }
+                for name, (memory_sum, cpu_sum, cpu_count, count) in self.totals.items()
+            ]
+
+
 class DataProcessor:
-    def __init__(self):
-        self.databag_path = os.path.join(os.path.dirname(__file__), '..', 'databag')
-        
+    ROLLUP_TIERS = (('1h', 3600), ('1m', 60))  # Coarsest first
+    
+    def __init__(self, store='auto', databag_path=None, buffer=None, system_buffer=None):
+        """
+        Args:
+            store: Monitoring store to read: 'csv', 'ring' or 'auto' (most recently written)
+            databag_path: Directory holding the collector's files
+            buffer: CycleBuffer filled by an embedded collector, read instead of the monitoring files
+            system_buffer: SystemBuffer filled by an embedded collector, read instead of databag/system.ring
+        """
+        self.databag_path = databag_path or os.path.join(os.path.dirname(__file__), '..', 'databag')
+        self.store = store  # 'csv', 'ring' or 'auto' (most recently written)
+        self.buffer = buffer
+        self.archive = ParquetArchive(os.path.join(self.databag_path, 'archive'))
+        self.monitoring_aggregator = IncrementalCSVAggregator(
+            os.path.join(self.databag_path, 'performance-monitoring.csv')
+        )
+        self.tier_aggregators = {
+            tier: IncrementalCSVAggregator(os.path.join(self.databag_path, f'rollup-{tier}.csv'), track_totals=False)
+            for tier, _ in self.ROLLUP_TIERS
+        }
+        self.ring_store_path = os.path.join(self.databag_path, 'performance-monitoring.ring')
+        self.ring_store = None
+        self.system_buffer = system_buffer
+        self.system_ring_path = os.path.join(self.databag_path, 'system.ring')
+        self.system_ring = None
+        self._snapshot_cache = (None, [])
+        self._tree_cache = (None, None)
+        self._alerts_cache = (None, [])
+        self._latest_cycle_cache = (None, (None, []))
+
+    def _use_ring_store(self):
+        """Decide which monitoring store to read from"""
+        if self.store != 'auto':
+            return self.store == 'ring'
+        try:
+            ring_mtime = os.stat(self.ring_store_path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        try:
+            return ring_mtime >= os.stat(self.monitoring_aggregator.file_path).st_mtime_ns
+        except FileNotFoundError:
+            return True
+
+    def _get_ring_store(self):
+        """Map the ring store read-only, remapping if the collector recreated it"""
+        if self.ring_store is None or self.ring_store.is_replaced():
+            from app.src.ringstore import RingStore
+            self.ring_store = RingStore(self.ring_store_path)
+        return self.ring_store
+
+    def _get_system_ring(self):
+        """Map the system sample ring read-only, remapping if the collector recreated it"""
+        if self.system_ring is None or self.system_ring.is_replaced():
+            from app.src.sysmetrics import open_system_ring
+            self.system_ring = open_system_ring(self.system_ring_path)
+        return self.system_ring
+
+    def system_version(self):
+        if self.system_buffer is not None:
+            return ('memory', self.system_buffer.written)
+        try:
+            system_ring = self._get_system_ring()
+            return ('ring', *system_ring.generation, system_ring.written)
+        except (OSError, ValueError):
+            return None
+
+    def monitoring_version(self):
+        """Cheap token that changes whenever new monitoring data is written"""
+        if self.buffer is not None:
+            return ('memory', self.buffer.version)
+        try:
+            if self._use_ring_store():
+                ring_store = self._get_ring_store()
+                return ('ring', *ring_store.ring.generation, ring_store.ring.written)
+            stat = os.stat(self.monitoring_aggregator.file_path)
+            return ('csv', stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except (OSError, ValueError):
+            return None
+
+    def _file_version(self, file_name):
+        """(inode, size, mtime) of a databag file, None while it doesn't exist"""
+        try:
+            stat = os.stat(os.path.join(self.databag_path, file_name))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def snapshot_version(self):
+        if self.buffer is not None and self.buffer.snapshot is not None:
+            return ('memory', self.buffer.snapshot_version)
+        return self._file_version('performance-snapshot.csv')
+
+    def tree_version(self):
+        if self.buffer is not None:
+            return ('memory', self.buffer.tree_version)
+        return self._file_version('process-tree.json')
+
+    def alerts_version(self):
+        return (self._file_version('alerts.jsonl'), self._file_version('alerts-active.json'))
+
+    def history_version(self):
+        """Token covering every store get_history can read"""
+        archive = self.archive.bounds()
+        return (
+            self.monitoring_version(),
+            tuple(self._file_version(f'rollup-{tier}.csv') for tier, _ in self.ROLLUP_TIERS),
+            archive[1] if archive else None
+        )
+
+    def wait_for_update(self, version, timeout):
+        """Block until monitoring_version() differs from version, for at most timeout seconds
+
+        An embedded collector wakes waiters as soon as a cycle is buffered;
+        files written by a separate collector can only be polled.
+        """
+        if self.buffer is not None:
+            self.buffer.wait_for(lambda: self.monitoring_version() != version, timeout)
+        else:
+            time.sleep(timeout)
+
     def load_performance_monitoring_data(self):
         """Load and process performance monitoring data"""
         try:
-            file_path = os.path.join(self.databag_path, 'performance-monitoring.csv')
-            df = pd.read_csv(file_path)
-            
-            # Group by process name and calculate averages
-            process_data = df.groupby('Name').agg({
-                'Memory (MB)': 'mean',
-                'CPU (%)': 'mean',
-                'PID': 'count'  # Count of occurrences
-            }).reset_index()
-            
-            # Rename columns for clarity
-            process_data.columns = ['name', 'avg_memory', 'avg_cpu', 'count']
-            
+            if self.buffer is not None:
+                process_data = self.buffer.records()
+            elif self._use_ring_store():
+                process_data = self._get_ring_store().aggregate_by_name()
+            else:
+                if not os.path.exists(self.monitoring_aggregator.file_path):
+                    raise FileNotFoundError(self.monitoring_aggregator.file_path)
+
+                self.monitoring_aggregator.refresh()
+                process_data = self.monitoring_aggregator.records()
+
             # Sort by memory usage and take top 15 for better visualization
-            process_data = process_data.sort_values('avg_memory', ascending=False).head(15)
-            
-            return process_data.to_dict('records')
+            process_data.sort(key=lambda item: item['avg_memory'], reverse=True)
+            return process_data[:15]
         except Exception as e:
             print(f"Error loading performance monitoring data: {e}")
             return []
@@ -39,32 +410,423 @@ class DataProcessor:
     def load_performance_snapshot_data(self):
         """Load and process performance snapshot data"""
         try:
-            file_path = os.path.join(self.databag_path, 'performance-snapshot.csv')
-            df = pd.read_csv(file_path)
+            if self.buffer is not None and self.buffer.snapshot is not None:
+                version = ('memory', self.buffer.snapshot_version)
+                if self._snapshot_cache[0] == version:
+                    return self._snapshot_cache[1]
+                totals = {}  # name -> [memory_sum, count]
+                for proc in self.buffer.snapshot:
+                    entry = totals.setdefault(proc['name'], [0.0, 0])
+                    entry[0] += proc['memory_mb']
+                    entry[1] += 1
+            else:
+                version, totals = self._read_snapshot_file()
+                if totals is None:
+                    return self._snapshot_cache[1]
             
             # Group by process name and calculate averages
-            process_data = df.groupby('Name').agg({
-                'Memory (MB)': 'mean',
-                'PID': 'count'
-            }).reset_index()
-            
-            # Rename columns for clarity
-            process_data.columns = ['name', 'avg_memory', 'count']
+            records = [
+                {'name': name, 'avg_memory': memory_sum / count, 'count': count}
+                for name, (memory_sum, count) in totals.items()
+            ]
             
             # Sort by memory usage and take top 15
-            process_data = process_data.sort_values('avg_memory', ascending=False).head(15)
-            
-            return process_data.to_dict('records')
+            records.sort(key=lambda item: item['avg_memory'], reverse=True)
+            records = records[:15]
+            self._snapshot_cache = (version, records)
+            return records
         except Exception as e:
             print(f"Error loading performance snapshot data: {e}")
             return []
     
-    def get_memory_usage_chart_data(self, data_type='monitoring'):
-        """Prepare data for nightingale chart showing memory usage"""
-        if data_type == 'monitoring':
-            data = self.load_performance_monitoring_data()
+    def _read_snapshot_file(self):
+        """Per-name [memory_sum, count] totals of performance-snapshot.csv
+
+        Returns (version, totals); totals is None while the file is unchanged
+        since the cached result.
+        """
+        file_path = os.path.join(self.databag_path, 'performance-snapshot.csv')
+
+        # The snapshot is rewritten as a whole, so cache on its identity
+        stat = os.stat(file_path)
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if self._snapshot_cache[0] == version:
+            return version, None
+
+        totals = {}  # name -> [memory_sum, count]
+        with CSV_PARSE_SECONDS.labels('performance-snapshot.csv').time():
+            if stat.st_size < IncrementalCSVAggregator.PANDAS_MIN_BYTES:
+                # A snapshot is normally a few dozen rows, where the csv module beats pandas
+                with open(file_path, newline='', encoding='utf-8') as file:
+                    for row in csv.DictReader(file):
+                        entry = totals.setdefault(row['Name'], [0.0, 0])
+                        entry[0] += float(row['Memory (MB)'])
+                        entry[1] += 1
+            else:
+                import pandas as pd
+                
+                df = pd.read_csv(file_path, dtype={'Name': str}, keep_default_na=False, na_values=[''])
+                grouped = df.groupby('Name')['Memory (MB)'].agg(['sum', 'count'])
+                for name, memory_sum, count in grouped.itertuples():
+                    totals[name] = [float(memory_sum), int(count)]
+        CSV_PARSED_BYTES.labels('performance-snapshot.csv').inc(stat.st_size)
+        return version, totals
+    
+    # Monitoring CSV column -> process dict key
+    PROCESS_COLUMNS = {
+        'PID': 'pid', 'Name': 'name', 'Memory (MB)': 'memory_mb', 'CPU (%)': 'cpu_percent', 'PPID': 'ppid',
+        'Create Time': 'create_time', **{column: key for key, column in EXTENDED_COLUMNS}
+    }
+    
+    def load_latest_cycle(self):
+        """(timestamp, process dicts) of the newest monitoring cycle, with every recorded metric"""
+        if self.buffer is not None:
+            with self.buffer.condition:
+                if not self.buffer.cycles:
+                    return None, []
+                _, timestamp, processes = self.buffer.cycles[-1]
+            return timestamp, [dict(proc) for proc in processes]
+        if self._use_ring_store():
+            ring_store = self._get_ring_store()
+            records = ring_store.view()
+            if len(records) == 0:
+                return None, []
+            latest = records['timestamp'].max()
+            return datetime.fromtimestamp(latest).strftime('%Y-%m-%d %H:%M:%S'), [
+                {
+                    'pid': int(record['pid']),
+                    'name': ring_store.names.get_name(int(record['name_id'])),
+                    'memory_mb': float(record['rss']) / (1024 * 1024),
+                    'cpu_percent': None if record['cpu'] != record['cpu'] else float(record['cpu'])
+                }
+                for record in records[records['timestamp'] == latest]
+            ]
+        
+        file_path = self.monitoring_aggregator.file_path
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None, []
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if self._latest_cycle_cache[0] != version:
+            self._latest_cycle_cache = (version, self._read_last_cycle(file_path, stat.st_size))
+        timestamp, processes = self._latest_cycle_cache[1]
+        return timestamp, [dict(proc) for proc in processes]
+    
+    def _read_last_cycle(self, file_path, size):
+        """Rows of the newest timestamp in a monitoring CSV, reading backwards in blocks"""
+        block_size = 64 * 1024
+        with open(file_path, 'rb') as file:
+            header_line = file.readline()
+            data = b''
+            position = size
+            while position > len(header_line):
+                step = min(block_size, position - len(header_line))
+                position -= step
+                file.seek(position)
+                data = file.read(step) + data
+                # Done once the block reaches back past the first row of the newest cycle
+                if len({line[:19] for line in data.splitlines()[1:]}) > 1:
+                    break
+        
+        header = next(csv.reader([header_line.decode('utf-8')]), [])
+        lines = data.splitlines()
+        if position > len(header_line):
+            lines = lines[1:]  # First line may be cut
+        if not data.endswith(b'\n'):
+            lines = lines[:-1]  # The collector may be writing the last line
+        
+        rows = [row for row in csv.reader(line.decode('utf-8') for line in lines) if row]
+        if not rows:
+            return None, []
+        timestamp = rows[-1][0]
+        processes = []
+        for row in rows:
+            if row[0] != timestamp:
+                continue
+            proc = {}
+            for column, value in zip(header[1:], row[1:]):
+                key = self.PROCESS_COLUMNS.get(column)
+                if key is None:
+                    continue
+                if key == 'name':
+                    proc[key] = value
+                elif value == '':
+                    proc[key] = None  # Unknown
+                else:
+                    number = float(value)
+                    proc[key] = int(number) if key in ('pid', 'ppid', 'threads', 'fds') else number
+            processes.append(proc)
+        return timestamp, processes
+    
+    def load_process_tree(self):
+        """Latest process tree export (ProcessTree.to_dict plus timestamp), None if the collector has none"""
+        if self.buffer is not None:
+            return self.buffer.tree
+        file_path = os.path.join(self.databag_path, 'process-tree.json')
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if self._tree_cache[0] != version:
+            with open(file_path, encoding='utf-8') as file:
+                self._tree_cache = (version, json.load(file))
+        return self._tree_cache[1]
+    
+    def load_alerts(self, limit=100):
+        """Active alerts and the latest `limit` alert events, newest first"""
+        active = []
+        try:
+            with open(os.path.join(self.databag_path, 'alerts-active.json'), encoding='utf-8') as file:
+                active = json.load(file)
+        except FileNotFoundError:
+            pass
+        
+        file_path = os.path.join(self.databag_path, 'alerts.jsonl')
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return active, []
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns, limit)
+        if self._alerts_cache[0] != version:
+            self._alerts_cache = (version, self._read_last_lines(file_path, stat.st_size, limit))
+        return active, self._alerts_cache[1]
+    
+    @staticmethod
+    def _read_last_lines(file_path, size, count):
+        """Parse the last `count` JSON lines of a file, newest first, reading backwards in blocks"""
+        block_size = 64 * 1024
+        data = b''
+        position = size
+        with open(file_path, 'rb') as file:
+            while position > 0 and data.count(b'\n') <= count:
+                step = min(block_size, position)
+                position -= step
+                file.seek(position)
+                data = file.read(step) + data
+        lines = data.splitlines()
+        if position > 0:
+            lines = lines[1:]  # First line may be cut
+        return [json.loads(line) for line in reversed(lines[-count:]) if line.strip()]
+    
+    def get_history(self, name=None, pid=None, start=None, end=None, points=500, metric='memory'):
+        """Time series of one process (by name and/or PID), downsampled with LTTB
+        
+        Samples of all matching PIDs are summed per timestamp. The coarsest
+        tier (1h, 1m rollups or raw samples) that reaches back to `start` and
+        still fills the point budget is used. Archived raw samples are read
+        from Parquet, where only the row groups in the range are decoded.
+        
+        Args:
+            name: Process name to select
+            pid: PID to select
+            start, end: datetime bounds (inclusive), None for open-ended
+            points: Maximum number of points to return
+            metric: 'memory' (MB) or 'cpu' (%)
+        
+        Returns:
+            (points, source) where source is 'memory', 'raw', 'archive', '1m' or '1h'
+        """
+        source = self._select_tier(start, end, points)
+        if source == 'memory':
+            times, values, labels = self.buffer.series(name, pid, start, end, metric)
+        elif source == 'raw':
+            times, values, labels = self._raw_history(name, pid, start, end, metric)
+        elif source == 'archive':
+            times, values, labels = self._archive_history(name, pid, start, end, metric)
         else:
-            data = self.load_performance_snapshot_data()
+            column = 'Memory Mean (MB)' if metric == 'memory' else 'CPU Mean (%)'
+            times, values, labels = self._csv_history(
+                self.tier_aggregators[source], column, name, pid, start, end
+            )
+        
+        from app.src.downsample import lttb_indices
+        
+        keep = lttb_indices(times, values, points)
+        return [{'timestamp': labels[i], 'value': round(float(values[i]), 2)} for i in keep], source
+    
+    def _raw_history(self, name, pid, start, end, metric):
+        if self._use_ring_store():
+            times, values = self._ring_history(name, pid, start, end, metric)
+            labels = [datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S') for t in times]
+            return times, values, labels
+        column = 'Memory (MB)' if metric == 'memory' else 'CPU (%)'
+        return self._csv_history(self.monitoring_aggregator, column, name, pid, start, end)
+    
+    def _archive_history(self, name, pid, start, end, metric):
+        """Series from the Parquet archive, continued from the raw store past the archive's end"""
+        import numpy as np
+        
+        column = 'Memory (MB)' if metric == 'memory' else 'CPU (%)'
+        table = self.archive.query(start, end, name=name, pid=pid, columns=['Timestamp', column])
+        times, values, labels = np.array([]), np.array([]), []
+        if table is not None and table.num_rows:
+            series = table.group_by('Timestamp').aggregate([(column, 'sum')]).drop_null().sort_by('Timestamp')
+            # Wall-clock seconds are only used for spacing points, so naive UTC is fine here
+            times = series['Timestamp'].cast('int64').to_numpy().astype(np.float64)
+            values = series[f'{column}_sum'].to_numpy()
+            labels = [moment.strftime('%Y-%m-%d %H:%M:%S') for moment in series['Timestamp'].to_pylist()]
+        
+        archived_until = self.archive.bounds()[1]
+        if end is None or end > archived_until:
+            after_archive = archived_until + timedelta(seconds=1)
+            tail_times, tail_values, tail_labels = self._raw_history(
+                name, pid, max(start, after_archive) if start else after_archive, end, metric
+            )
+            times = np.concatenate([times, np.asarray(tail_times, dtype=np.float64)])
+            values = np.concatenate([values, np.asarray(tail_values, dtype=np.float64)])
+            labels = labels + list(tail_labels)
+        return times, values, labels
+    
+    def _first_timestamp(self, source):
+        """Oldest sample time of a tier ('memory', 'raw', 'archive', '1m' or '1h'), None when it has no data"""
+        if source == 'memory':
+            return self.buffer.first_time() if self.buffer is not None else None
+        if source == 'archive':
+            bounds = self.archive.bounds()
+            return bounds[0] if bounds else None
+        if source == 'raw' and self._use_ring_store():
+            try:
+                timestamps = self._get_ring_store().view()['timestamp']
+            except (OSError, ValueError):
+                return None
+            return datetime.fromtimestamp(timestamps.min()) if len(timestamps) else None
+        
+        aggregator = self.monitoring_aggregator if source == 'raw' else self.tier_aggregators[source]
+        aggregator.refresh()
+        if not aggregator.index_timestamps:
+            return None
+        return datetime.strptime(aggregator.index_timestamps[0], '%Y-%m-%d %H:%M:%S')
+    
+    def _select_tier(self, start, end, points):
+        """Pick the coarsest tier that covers the range and still fills `points`
+
+        At equal resolution the embedded buffer is preferred, then the
+        Parquet archive (continued from the raw store past its end), then
+        the raw store alone, whichever first reaches back to the start of
+        the range. Rollup rows are stamped with the start of their bucket
+        and the first bucket may be partial, so a rollup tier only counts
+        as reaching back to the end of its first bucket.
+        """
+        firsts = {source: self._first_timestamp(source) for source in ('memory', 'raw', 'archive', '1m', '1h')}
+        sources = [source for source, _ in self.ROLLUP_TIERS] + ['memory', 'archive', 'raw']  # Coarsest first
+        sources = [source for source in sources if firsts[source] is not None]
+        if not sources:
+            return 'raw'
+        
+        resolutions = dict(self.ROLLUP_TIERS, memory=0, raw=0, archive=0)
+        reaches = {source: firsts[source] + timedelta(seconds=resolutions[source]) for source in sources}
+        range_start = start or min(reaches.values())
+        span = ((end or datetime.now()) - range_start).total_seconds()
+        
+        covering = [source for source in sources if reaches[source] <= range_start]
+        for source in covering:
+            if span / points >= resolutions[source]:
+                return source
+        if covering:
+            # Too coarse for the point budget, but the finest tier that has the data
+            return min(covering, key=lambda source: resolutions[source])
+        return min(sources, key=lambda source: (reaches[source], resolutions[source]))
+    
+    def _csv_history(self, aggregator, column, name, pid, start, end):
+        df = aggregator.read_range(
+            start.strftime('%Y-%m-%d %H:%M:%S') if start else None,
+            end.strftime('%Y-%m-%d %H:%M:%S') if end else None
+        )
+        import numpy as np
+        import pandas as pd
+        
+        if df is None or df.empty or column not in df.columns:
+            return np.array([]), np.array([]), []
+        if name is not None:
+            df = df[df['Name'] == name]
+        if pid is not None:
+            df = df[df['PID'] == pid]
+        
+        series = df.groupby('Timestamp')[column].sum(min_count=1).dropna()
+        # Wall-clock seconds are only used for spacing points, so naive UTC is fine here
+        times = pd.to_datetime(series.index).to_numpy(dtype='datetime64[s]').astype(np.float64)
+        return times, series.to_numpy(dtype=np.float64), series.index.to_list()
+    
+    def _ring_history(self, name, pid, start, end, metric):
+        import numpy as np
+        
+        ring_store = self._get_ring_store()
+        records = ring_store.ring.ordered()
+        mask = np.ones(len(records), dtype=bool)
+        if name is not None:
+            # Names are registered before their records, so this covers every id in the snapshot
+            ring_store.names.refresh()
+            mask &= records['name_id'] == ring_store.names.ids.get(name, -1)
+        if pid is not None:
+            mask &= records['pid'] == pid
+        if start is not None:
+            mask &= records['timestamp'] >= start.timestamp()
+        if end is not None:
+            mask &= records['timestamp'] <= end.timestamp()
+        records = records[mask]
+        
+        if metric == 'memory':
+            values = records['rss'] / (1024 * 1024)
+        else:
+            values = records['cpu'].astype(np.float64)
+            known = ~np.isnan(values)
+            records, values = records[known], values[known]
+        times, inverse = np.unique(records['timestamp'], return_inverse=True)
+        return times, np.bincount(inverse, weights=values, minlength=len(times))
+    
+    def get_system_data(self, start=None, end=None, points=300, include_cores=False):
+        """Host-wide samples in a time range, bucketed down to at most `points` points
+        
+        Args:
+            start, end: datetime bounds (inclusive), None for open-ended
+            points: Maximum number of points per series
+            include_cores: Also return one CPU series per logical CPU
+        
+        Returns:
+            downsample_system series plus 'samples' (raw samples in the range), 'cores' count
+            and 'resolution' (average seconds per point); None when no system samples exist
+        """
+        import numpy as np
+        from app.src.sysmetrics import downsample_system
+        
+        if self.system_buffer is not None:
+            records = self.system_buffer.ordered()
+        else:
+            try:
+                records = self._get_system_ring().ordered()
+            except (OSError, ValueError):
+                return None
+        cores = records.dtype['cores'].shape[0]
+        
+        # Samples are appended in time order, so the range is two binary searches
+        timestamps = records['timestamp']
+        first = np.searchsorted(timestamps, start.timestamp(), 'left') if start else 0
+        last = np.searchsorted(timestamps, end.timestamp(), 'right') if end else len(records)
+        records = records[first:last]
+        
+        series = downsample_system(records, points, include_cores)
+        span = float(timestamps[last - 1] - timestamps[first]) if last - first > 1 else 0.0
+        series.update({
+            'samples': len(records),
+            'cores_count': cores,
+            'resolution': round(span / max(min(points, len(records)) - 1, 1), 2)
+        })
+        return series
+    
+    def get_memory_usage_chart_data(self, data_type='monitoring', data=None):
+        """Prepare data for nightingale chart showing memory usage
+
+        Args:
+            data_type: 'monitoring' or 'snapshot'
+            data: Already loaded records of that type, loaded here when None
+        """
+        if data is None:
+            if data_type == 'monitoring':
+                data = self.load_performance_monitoring_data()
+            else:
+                data = self.load_performance_snapshot_data()
         
         chart_data = []
         for item in data:
@@ -75,9 +837,10 @@ class DataProcessor:
         
         return chart_data
     
-    def get_cpu_usage_chart_data(self):
+    def get_cpu_usage_chart_data(self, data=None):
         """Prepare data for nightingale chart showing CPU usage (monitoring data only)"""
-        data = self.load_performance_monitoring_data()
+        if data is None:
+            data = self.load_performance_monitoring_data()
         
         chart_data = []
         for item in data:
@@ -91,8 +854,296 @@ class DataProcessor:
         chart_data = sorted(chart_data, key=lambda x: x['value'], reverse=True)
         
         return chart_data
+    
+    def get_process_summary(self, monitoring_data=None, snapshot_data=None):
+        """Totals and top memory process of the monitoring and snapshot data"""
+        if monitoring_data is None:
+            monitoring_data = self.load_performance_monitoring_data()
+        if snapshot_data is None:
+            snapshot_data = self.load_performance_snapshot_data()
+        
+        return {
+            'monitoring': {
+                'total_processes': len(monitoring_data),
+                'total_memory': sum(item['avg_memory'] for item in monitoring_data),
+                'total_cpu': sum(item['avg_cpu'] for item in monitoring_data),
+                'top_memory_process': max(monitoring_data, key=lambda x: x['avg_memory']) if monitoring_data else None
+            },
+            'snapshot': {
+                'total_processes': len(snapshot_data),
+                'total_memory': sum(item['avg_memory'] for item in snapshot_data),
+                'top_memory_process': max(snapshot_data, key=lambda x: x['avg_memory']) if snapshot_data else None
+            }
+        }
+    
+    def get_leak_suspects(self, **options):
+        """Processes whose RSS grows steadily over the monitoring history, fastest first
+
+        Every (PID, create time) series is fitted at once by app.src.leaks.
+        The ring store has no create time, so its series are told apart by
+        PID and name instead.
+
+        Args:
+            **options: Thresholds for app.src.leaks.rank_leak_suspects
+        """
+        import numpy as np
+        from app.src import leaks
+        
+        if self.buffer is not None:
+            with self.buffer.condition:
+                cycles = list(self.buffer.cycles)
+            rows = [(moment, proc) for moment, _, processes in cycles for proc in processes]
+            create_times = np.array([proc.get('create_time') or 0.0 for _, proc in rows], dtype=np.float64)
+            return leaks.find_leak_suspects(
+                np.array([moment for moment, _ in rows], dtype=np.float64),
+                np.array([proc['pid'] for _, proc in rows], dtype=np.int64),
+                create_times,
+                np.array([proc['memory_mb'] for _, proc in rows], dtype=np.float64),
+                names=lambda indices: [rows[i][1]['name'] for i in indices],
+                create_times=create_times, **options
+            )
+        if self._use_ring_store():
+            return leaks.analyze_ring_store(self._get_ring_store(), **options)
+        if not os.path.exists(self.monitoring_aggregator.file_path):
+            return []
+        return leaks.analyze_csv(self.monitoring_aggregator.file_path, **options)
+    
+    def get_dashboard_data(self):
+        """Every chart and summary payload of the dashboard, loading each data source once"""
+        monitoring_data = self.load_performance_monitoring_data()
+        snapshot_data = self.load_performance_snapshot_data()
+        
+        return {
+            'memory-monitoring': {
+                'data': self.get_memory_usage_chart_data('monitoring', monitoring_data),
+                'title': CHART_TITLES['memory-monitoring']
+            },
+            'memory-snapshot': {
+                'data': self.get_memory_usage_chart_data('snapshot', snapshot_data),
+                'title': CHART_TITLES['memory-snapshot']
+            },
+            'cpu-usage': {
+                'data': self.get_cpu_usage_chart_data(monitoring_data),
+                'title': CHART_TITLES['cpu-usage']
+            },
+            'summary': self.get_process_summary(monitoring_data, snapshot_data)
+        }
+
+class ChartStream:
+    """Fans out monitoring chart updates to Server-Sent Events subscribers.
+
+    A single background thread watches the monitoring data version and
+    recomputes the chart payloads once per new collector cycle, however many
+    dashboards are connected. Subscribers receive only the names whose values
+    changed, plus names that dropped out of a chart.
+    """
+
+    POLL_INTERVAL = 1.0  # seconds
+    QUEUE_SIZE = 32
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.state = None
+        self.version = None
+        self.thread = None
+
+    def compute_state(self):
+        """Build the full chart state for the current monitoring data"""
+        monitoring_data = self.processor.load_performance_monitoring_data()
+        return {
+            'memory': {item['name']: round(item['avg_memory'], 2) for item in monitoring_data},
+            'cpu': {
+                item['name']: round(item['avg_cpu'], 2)
+                for item in monitoring_data if item['avg_cpu'] > 0
+            },
+            'summary': {
+                'total_processes': len(monitoring_data),
+                'total_memory': sum(item['avg_memory'] for item in monitoring_data),
+                'total_cpu': sum(item['avg_cpu'] for item in monitoring_data)
+            },
+            'timestamp': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def diff_state(old, new):
+        """Return only what changed between two chart states"""
+        update = {'timestamp': new['timestamp']}
+        for chart in ('memory', 'cpu'):
+            changed = {name: value for name, value in new[chart].items() if old[chart].get(name) != value}
+            removed = [name for name in old[chart] if name not in new[chart]]
+            if changed or removed:
+                update[chart] = {'changed': changed, 'removed': removed}
+        summary = {key: value for key, value in new['summary'].items() if old['summary'].get(key) != value}
+        if summary:
+            update['summary'] = summary
+        return update
+
+    def subscribe(self):
+        """Register a subscriber; returns its event queue and the current full state"""
+        with self.lock:
+            if self.state is None:
+                self.version = self.processor.monitoring_version()
+                self.state = self.compute_state()
+            subscriber = queue.Queue(self.QUEUE_SIZE)
+            self.subscribers.add(subscriber)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='chart-stream', daemon=True)
+                self.thread.start()
+            return subscriber, self.state
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event, payload):
+        """Queue an event for every subscriber, resyncing any that fell behind"""
+        with self.lock:
+            for subscriber in self.subscribers:
+                try:
+                    subscriber.put_nowait((event, payload))
+                except queue.Full:
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(('snapshot', self.state))
+
+    def _run(self):
+        while True:
+            if not self.subscribers:
+                time.sleep(self.POLL_INTERVAL)
+                continue
+            try:
+                # Returns as soon as an embedded collector buffers a cycle
+                self.processor.wait_for_update(self.version, self.POLL_INTERVAL)
+                version = self.processor.monitoring_version()
+                if version == self.version:
+                    continue
+                new_state = self.compute_state()
+                with self.lock:
+                    old_state, self.state, self.version = self.state, new_state, version
+                update = self.diff_state(old_state, new_state)
+                if len(update) > 1:
+                    self.publish('update', update)
+            except Exception as e:
+                print(f"Error computing stream update: {e}")
+
+
+class ResponseCache:
+    """JSON payloads of API endpoints, cached per data version.
+
+    Each cached payload carries a weak ETag derived from the endpoint, its
+    query string and the version token of the data it was computed from,
+    plus the time that version was first served as its Last-Modified.
+    Requests whose If-None-Match or If-Modified-Since still match get an
+    empty 304; everybody else shares one computed payload, gzip-compressed
+    once for clients that accept it.
+    """
+
+    MAX_ENTRIES = 256
+    GZIP_MIN_BYTES = 1024
+
+    def __init__(self):
+        self.entries = OrderedDict()  # (endpoint, query string) -> CachedPayload
+        self.lock = threading.Lock()
+
+    def get(self, key, etag):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.etag != etag:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            previous = self.entries.get(key)
+            if previous is not None and entry.last_modified <= previous.last_modified:
+                # Last-Modified has whole seconds; a newer version must still compare as newer
+                entry.last_modified = previous.last_modified + timedelta(seconds=1)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.MAX_ENTRIES:
+                self.entries.popitem(last=False)
+
+
+class CachedPayload:
+    def __init__(self, etag, body, mimetype):
+        self.etag = etag
+        self.body = body
+        self.mimetype = mimetype
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self._gzip_body = None
+
+    def gzip_body(self):
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6)
+        return self._gzip_body
+
+
+def versioned(version):
+    """Serve a JSON endpoint with conditional GET, a per-version payload cache and gzip
+
+    Args:
+        version: Callable returning a cheap token that changes whenever the endpoint's data does
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, request.query_string)
+            token = repr((key, version())).encode('utf-8')
+            etag = hashlib.blake2b(token, digest_size=12).hexdigest()
+            
+            entry = response_cache.get(key, etag)
+            if entry is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response  # Errors are recomputed every time
+                entry = CachedPayload(etag, response.get_data(), response.mimetype)
+                response_cache.put(key, entry)
+                RESPONSE_CACHE_LOOKUPS.labels('miss').inc()
+            else:
+                RESPONSE_CACHE_LOOKUPS.labels('hit').inc()
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = since is not None and since >= entry.last_modified
+            if not_modified:
+                response = Response(status=304)
+            elif len(entry.body) >= ResponseCache.GZIP_MIN_BYTES and 'gzip' in request.accept_encodings:
+                response = Response(entry.gzip_body(), mimetype=entry.mimetype)
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = Response(entry.body, mimetype=entry.mimetype)
+            
+            response.set_etag(etag, weak=True)
+            response.last_modified = entry.last_modified
+            # Browsers may keep the payload but must revalidate it on every poll
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+        return wrapper
+    return decorator
+
 
 data_processor = DataProcessor()
+chart_stream = ChartStream(data_processor)
+response_cache = ResponseCache()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Record per-endpoint latency and periodically log a metrics summary"""
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.labels(request.endpoint or 'unmatched').observe(time.perf_counter() - started)
+    REGISTRY.log_summary_if_due(logger, METRICS_SUMMARY_INTERVAL)
+    return response
 
 @app.route('/')
 def index():
@@ -105,6 +1156,7 @@ def test_charts():
     return render_template('test-charts.html')
 
 @app.route('/api/memory-monitoring')
+@versioned(lambda: data_processor.monitoring_version())
 def get_memory_monitoring():
     """API endpoint for memory usage from monitoring data"""
     try:
@@ -112,7 +1164,7 @@ def get_memory_monitoring():
         return jsonify({
             'success': True,
             'data': data,
-            'title': 'Memory Usage (Performance Monitoring)',
+            'title': CHART_TITLES['memory-monitoring'],
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -122,6 +1174,7 @@ def get_memory_monitoring():
         }), 500
 
 @app.route('/api/memory-snapshot')
+@versioned(lambda: data_processor.snapshot_version())
 def get_memory_snapshot():
     """API endpoint for memory usage from snapshot data"""
     try:
@@ -129,7 +1182,7 @@ def get_memory_snapshot():
         return jsonify({
             'success': True,
             'data': data,
-            'title': 'Memory Usage (Performance Snapshot)',
+            'title': CHART_TITLES['memory-snapshot'],
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -139,6 +1192,7 @@ def get_memory_snapshot():
         }), 500
 
 @app.route('/api/cpu-usage')
+@versioned(lambda: data_processor.monitoring_version())
 def get_cpu_usage():
     """API endpoint for CPU usage data"""
     try:
@@ -146,7 +1200,7 @@ def get_cpu_usage():
         return jsonify({
             'success': True,
             'data': data,
-            'title': 'CPU Usage (Performance Monitoring)',
+            'title': CHART_TITLES['cpu-usage'],
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -156,25 +1210,11 @@ def get_cpu_usage():
         }), 500
 
 @app.route('/api/process-summary')
+@versioned(lambda: (data_processor.monitoring_version(), data_processor.snapshot_version()))
 def get_process_summary():
     """API endpoint for process summary statistics"""
     try:
-        monitoring_data = data_processor.load_performance_monitoring_data()
-        snapshot_data = data_processor.load_performance_snapshot_data()
-        
-        summary = {
-            'monitoring': {
-                'total_processes': len(monitoring_data),
-                'total_memory': sum(item['avg_memory'] for item in monitoring_data),
-                'total_cpu': sum(item['avg_cpu'] for item in monitoring_data),
-                'top_memory_process': max(monitoring_data, key=lambda x: x['avg_memory']) if monitoring_data else None
-            },
-            'snapshot': {
-                'total_processes': len(snapshot_data),
-                'total_memory': sum(item['avg_memory'] for item in snapshot_data),
-                'top_memory_process': max(snapshot_data, key=lambda x: x['avg_memory']) if snapshot_data else None
-            }
-        }
+        summary = data_processor.get_process_summary()
         
         return jsonify({
             'success': True,
@@ -187,5 +1227,338 @@ def get_process_summary():
             'error': str(e)
         }), 500
 
+@app.route('/api/dashboard')
+@versioned(lambda: (data_processor.monitoring_version(), data_processor.snapshot_version()))
+def get_dashboard():
+    """API endpoint for every dashboard chart and the summary in one response"""
+    try:
+        data = data_processor.get_dashboard_data()
+        return jsonify({
+            'success': True,
+            'data': data,
+            'title': 'Task Monitor Dashboard',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/process-tree')
+@versioned(lambda: data_processor.tree_version())
+def get_process_tree():
+    """API endpoint for per-PID memory and CPU rolled up over process subtrees"""
+    try:
+        tree = data_processor.load_process_tree()
+        if tree is None:
+            return jsonify({
+                'success': False,
+                'error': 'No process tree yet; start the collector with --process-tree'
+            }), 404
+        
+        root = request.args.get('root', type=int)
+        depth = min(max(request.args.get('depth', 3, type=int), 0), 20)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 200)
+        return jsonify({
+            'success': True,
+            'data': build_tree(tree, root=root, depth=depth, limit=limit),
+            'process_count': tree['process_count'],
+            'title': 'Process Tree (Subtree Memory and CPU)',
+            'timestamp': tree['timestamp']
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/alerts')
+@versioned(lambda: data_processor.alerts_version())
+def get_alerts():
+    """API endpoint for active alerts and recent alert events"""
+    try:
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        active, events = data_processor.load_alerts(limit)
+        return jsonify({
+            'success': True,
+            'data': {'active': active, 'events': events},
+            'title': 'Alerts',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/process-metrics')
+@versioned(lambda: data_processor.monitoring_version())
+def get_process_metrics():
+    """API endpoint for every recorded metric of the processes in the newest monitoring cycle"""
+    try:
+        timestamp, processes = data_processor.load_latest_cycle()
+        processes.sort(key=lambda proc: proc['memory_mb'], reverse=True)
+        return jsonify({
+            'success': True,
+            'data': {'cycle': timestamp, 'processes': processes},
+            'title': 'Process Metrics',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/leak-suspects')
+@versioned(lambda: data_processor.monitoring_version())
+def get_leak_suspects():
+    """API endpoint for processes ranked by steady RSS growth over the monitoring history"""
+    try:
+        suspects = data_processor.get_leak_suspects(
+            limit=min(max(request.args.get('limit', 20, type=int), 1), 500),
+            min_slope=request.args.get('min_slope', 1.0, type=float),
+            min_r_squared=request.args.get('min_r2', 0.8, type=float),
+            min_span=request.args.get('min_minutes', 10, type=float) * 60,
+            min_samples=max(request.args.get('min_samples', 30, type=int), 3)
+        )
+        return jsonify({
+            'success': True,
+            'data': suspects,
+            'title': 'Memory Leak Suspects',
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/history')
+@versioned(lambda: data_processor.history_version())
+def get_history():
+    """API endpoint for a downsampled time series of one process"""
+    try:
+        name = request.args.get('name')
+        pid = request.args.get('pid', type=int)
+        if name is None and pid is None:
+            return jsonify({
+                'success': False,
+                'error': 'Either name or pid is required'
+            }), 400
+        
+        metric = request.args.get('metric', 'memory')
+        if metric not in ('memory', 'cpu'):
+            return jsonify({
+                'success': False,
+                'error': "metric must be 'memory' or 'cpu'"
+            }), 400
+        
+        points = min(max(request.args.get('points', 500, type=int), 3), 5000)
+        start = parse_time_arg(request.args.get('from'))
+        end = parse_time_arg(request.args.get('to'))
+        
+        data, source = data_processor.get_history(name, pid, start, end, points, metric)
+        return jsonify({
+            'success': True,
+            'data': data,
+            'source': source,
+            'title': f"{'Memory (MB)' if metric == 'memory' else 'CPU (%)'} History: {name or pid}",
+            'timestamp': datetime.now().isoformat()
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/system')
+@versioned(lambda: data_processor.system_version())
+def get_system():
+    """API endpoint for host-wide CPU, memory, swap, load and disk/network throughput over a time range"""
+    try:
+        data = data_processor.get_system_data(
+            start=parse_time_arg(request.args.get('from')),
+            end=parse_time_arg(request.args.get('to')),
+            points=min(max(request.args.get('points', 300, type=int), 1), 5000),
+            include_cores=request.args.get('cores', '0') in ('1', 'true')
+        )
+        if data is None:
+            return jsonify({
+                'success': False,
+                'error': 'No system samples yet; start the collector with --system-interval above 0'
+            }), 404
+        return jsonify({
+            'success': True,
+            'data': data,
+            'title': 'System Utilization',
+            'timestamp': datetime.now().isoformat()
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def parse_time_arg(value):
+    """Parse an ISO 8601 datetime or epoch seconds query argument"""
+    if not value:
+        return None
+    try:
+        return datetime.fromtimestamp(float(value))
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+@app.route('/api/stream')
+def get_stream():
+    """Server-Sent Events stream of incremental chart updates"""
+    def generate():
+        subscriber, state = chart_stream.subscribe()
+        try:
+            yield format_sse('snapshot', state)
+            while True:
+                try:
+                    event, payload = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'  # Lets the server notice closed connections
+                    continue
+                yield format_sse(event, payload)
+        finally:
+            chart_stream.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def format_sse(event, payload):
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text exposition of dashboard and collector self-instrumentation"""
+    body = REGISTRY.render()
+    if data_processor.buffer is not None:
+        # The embedded collector records into this process's registry
+        return Response(body, mimetype='text/plain; version=0.0.4')
+    # The collector runs in its own process and publishes its metrics to a file
+    collector_file = os.path.join(data_processor.databag_path, 'collector-metrics.prom')
+    try:
+        with open(collector_file, encoding='utf-8') as file:
+            body += file.read()
+        age = time.time() - os.stat(collector_file).st_mtime
+        body += (
+            "# HELP taskmonitor_collector_metrics_age_seconds Age of the collector's published metrics\n"
+            "# TYPE taskmonitor_collector_metrics_age_seconds gauge\n"
+            f"taskmonitor_collector_metrics_age_seconds {age:.3f}\n"
+        )
+    except FileNotFoundError:
+        pass
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Task Monitor - Dashboard Server")
+    parser.add_argument('--store', choices=['auto', 'csv', 'ring'], default='auto',
+                        help='Monitoring store to read (default: auto, the most recently written)')
+    parser.add_argument('--embedded', action='store_true',
+                        help='Sample processes inside the server and serve them from memory')
+    parser.add_argument('--limit', type=int, default=20,
+                        help='Embedded mode: number of top processes per cycle (default: 20)')
+    parser.add_argument('--interval', type=float, default=2,
+                        help='Embedded mode: seconds between cycles (default: 2)')
+    parser.add_argument('--snapshot-interval', type=float, default=300,
+                        help='Embedded mode: seconds between snapshots, 0 to disable (default: 300)')
+    parser.add_argument('--buffer-size', type=int, default=1800,
+                        help='Embedded mode: cycles kept in memory for history (default: 1800)')
+    parser.add_argument('--collector', choices=['psutil', 'procfs', 'cgroup'], default='psutil',
+                        help='Embedded mode: process table reader, or cgroup for per-cgroup totals (default: psutil)')
+    parser.add_argument('--cgroup-depth', type=int,
+                        help='Embedded mode: cgroup levels to aggregate at with --collector cgroup (default: leaves)')
+    parser.add_argument('--include', metavar='REGEX', help='Embedded mode: only collect processes matching REGEX')
+    parser.add_argument('--exclude', metavar='REGEX', help='Embedded mode: skip processes matching REGEX')
+    parser.add_argument('--user', action='append', dest='users', metavar='NAME',
+                        help='Embedded mode: only collect processes owned by NAME (repeatable)')
+    parser.add_argument('--cgroup', metavar='REGEX',
+                        help='Embedded mode: only collect processes whose cgroup path matches REGEX')
+    parser.add_argument('--persist', action='store_true',
+                        help='Embedded mode: also write the monitoring CSV and rollup tiers')
+    parser.add_argument('--process-tree', action='store_true',
+                        help='Embedded mode: track the parent of every process for /api/process-tree')
+    parser.add_argument('--tree-interval', type=float, default=10,
+                        help='Embedded mode: seconds between process tree refreshes (default: 10)')
+    parser.add_argument('--alerts', action='store_true',
+                        help='Embedded mode: evaluate alert rules every cycle')
+    parser.add_argument('--alert-rules', help='Embedded mode: JSON file of alert rules (default: built-in rules)')
+    parser.add_argument('--alert-webhook', help='Embedded mode: URL that alert events are POSTed to as JSON')
+    parser.add_argument('--extended-metrics', action='store_true',
+                        help='Embedded mode: also collect threads, context switches, I/O, FDs and USS/PSS')
+    parser.add_argument('--expensive-every', type=int, default=10,
+                        help='Embedded mode: cycles between FD and USS/PSS reads per process (default: 10)')
+    parser.add_argument('--extended-budget', type=float, default=50,
+                        help='Embedded mode: milliseconds per cycle extended metrics may take (default: 50)')
+    parser.add_argument('--system-interval', type=float, default=1,
+                        help='Embedded mode: seconds between host-wide samples for /api/system, 0 to disable (default: 1)')
+    parser.add_argument('--system-capacity', type=int, default=3600,
+                        help='Embedded mode: system samples kept in memory (default: 3600)')
+    parser.add_argument('--flush-every', type=int, default=10,
+                        help='Embedded mode: cycles batched per CSV write with --persist (default: 10)')
+    args = parser.parse_args()
+    
+    data_processor.store = args.store
+    if args.embedded:
+        import atexit
+        from app.src.csvconverter import CSVConverter
+        from app.src.embedded import BatchedCSVSink, CycleBuffer, EmbeddedCollector
+        from app.src.rollup import RollupWriter
+        
+        converter = CSVConverter(collector=args.collector, process_tree=args.process_tree,
+                                 extended_metrics=args.extended_metrics, expensive_every=args.expensive_every,
+                                 extended_budget=args.extended_budget / 1000, include=args.include,
+                                 exclude=args.exclude, users=args.users, cgroup=args.cgroup,
+                                 cgroup_depth=args.cgroup_depth)
+        sink = None
+        if args.persist:
+            databag = Path(data_processor.databag_path).resolve()
+            converter.output_file = str(databag / 'performance-monitoring.csv')
+            converter.snapshot_file = str(databag / 'performance-snapshot.csv')
+            # Start a fresh monitoring file, as the standalone collector does
+            Path(converter.output_file).unlink(missing_ok=True)
+            rollup = RollupWriter(databag, raw_file=converter.output_file, raw_lock=converter.append_lock)
+            sink = BatchedCSVSink(converter, flush_every=args.flush_every, rollup=rollup)
+        
+        alerts = None
+        if args.alerts or args.alert_rules or args.alert_webhook:
+            from app.src.alerts import build_alert_engine
+            
+            alerts = build_alert_engine(args.alert_rules, args.alert_webhook, data_processor.databag_path)
+        
+        data_processor.buffer = CycleBuffer(args.buffer_size)
+        system_sampler = None
+        if args.system_interval:
+            from app.src.sysmetrics import SystemBuffer, SystemSampler
+            
+            system_sampler = SystemSampler()
+            data_processor.system_buffer = SystemBuffer(system_sampler.dtype, args.system_capacity)
+        collector = EmbeddedCollector(
+            converter.get_processes, data_processor.buffer, limit=args.limit,
+            refresh_interval=args.interval, snapshot_interval=args.snapshot_interval, sink=sink,
+            tree_interval=args.tree_interval, alerts=alerts, system_sampler=system_sampler,
+            system_buffer=data_processor.system_buffer, system_interval=args.system_interval
+        )
+        collector.start()
+        atexit.register(collector.stop)
+    
+    # The reloader would start a second server process, and with it a second collector
+    app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=not args.embedded)
\ No newline at end of file
@@ -0,0 +1,312 @@
+import json
+import math
+import os
+import queue
+import re
+import threading
+import urllib.request
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from app.src.rollup import TIMESTAMP_FORMAT
+from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
+
+ALERT_EVENTS = REGISTRY.counter(
+    'taskmonitor_alert_events_total', 'Alerts fired and resolved', ['rule', 'state']
+)
+WEBHOOK_ERRORS = REGISTRY.counter(
+    'taskmonitor_alert_webhook_errors_total', 'Alert webhook deliveries that failed or were dropped'
+)
+
+METRIC_KEYS = {'memory': 'memory_mb', 'cpu': 'cpu_percent'}
+
+DEFAULT_RULES = [
+    {'name': 'high-memory', 'type': 'threshold', 'metric': 'memory', 'above': 2048, 'for_cycles': 3},
+    {'name': 'high-cpu', 'type': 'threshold', 'metric': 'cpu', 'above': 90, 'for_cycles': 5},
+    {'name': 'memory-spike', 'type': 'zscore', 'metric': 'memory', 'z': 4, 'alpha': 0.1, 'min_std': 5},
+    {'name': 'cpu-spike', 'type': 'zscore', 'metric': 'cpu', 'z': 4, 'alpha': 0.1, 'min_std': 5},
+    {'name': 'memory-growth', 'type': 'growth', 'rate_mb_per_min': 50, 'alpha': 0.3, 'for_cycles': 10},
+]
+
+
+class AlertRule(ABC):
+    """One alert rule; subclasses keep O(1) state per process and implement check()"""
+
+    def __init__(self, name, metric='memory', for_cycles=1, process=None):
+        """
+        Args:
+            name: Rule name shown in alerts
+            metric: 'memory' (MB) or 'cpu' (%)
+            for_cycles: Consecutive cycles the condition must hold before the alert fires
+            process: Optional regular expression the process name must fully match
+        """
+        if metric not in METRIC_KEYS:
+            raise ValueError(f"Rule {name}: metric must be 'memory' or 'cpu'")
+        self.name = name
+        self.metric = metric
+        self.key = METRIC_KEYS[metric]
+        self.for_cycles = max(1, int(for_cycles))
+        self.process = re.compile(process) if process else None
+
+    def applies_to(self, name):
+        return self.process is None or self.process.fullmatch(name) is not None
+
+    def new_state(self):
+        return {}
+
+    @abstractmethod
+    def check(self, state, value, moment):
+        """Update state with this cycle's value; returns (condition holds, detail message)"""
+
+
+class ThresholdRule(AlertRule):
+    """Value above a fixed limit"""
+
+    def __init__(self, name, above, **kwargs):
+        super().__init__(name, **kwargs)
+        self.above = float(above)
+
+    def check(self, state, value, moment):
+        return value > self.above, f"{self.metric} {value:.2f} above {self.above:g}"
+
+
+class ZScoreRule(AlertRule):
+    """Value far above the process's own exponentially weighted mean
+
+    The EWMA mean and variance are updated in O(1) per sample. A sample is
+    scored against the statistics before it is folded in, and only after
+    `warmup` samples. `min_std` keeps near-constant series from alerting on
+    tiny changes.
+    """
+
+    def __init__(self, name, z=4, alpha=0.1, warmup=10, min_std=1.0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.z = float(z)
+        self.alpha = float(alpha)
+        self.warmup = int(warmup)
+        self.min_std = float(min_std)
+
+    def new_state(self):
+        return {'mean': None, 'var': 0.0, 'samples': 0}
+
+    def check(self, state, value, moment):
+        mean = state['mean']
+        if mean is None:
+            state['mean'] = value
+            state['samples'] = 1
+            return False, ''
+
+        std = max(math.sqrt(state['var']), self.min_std)
+        score = (value - mean) / std
+        diff = value - mean
+        increment = self.alpha * diff
+        state['mean'] = mean + increment
+        state['var'] = (1 - self.alpha) * (state['var'] + diff * increment)
+        state['samples'] += 1
+        if state['samples'] <= self.warmup:
+            return False, ''
+        return score > self.z, f"{self.metric} {value:.2f} is {score:.1f} sigma above its mean {mean:.2f}"
+
+
+class GrowthRule(AlertRule):
+    """RSS growing faster than a rate, smoothed with an EWMA of the per-cycle growth"""
+
+    def __init__(self, name, rate_mb_per_min, alpha=0.3, **kwargs):
+        kwargs['metric'] = 'memory'
+        super().__init__(name, **kwargs)
+        self.rate = float(rate_mb_per_min)
+        self.alpha = float(alpha)
+
+    def new_state(self):
+        return {'last': None, 'last_moment': None, 'rate': 0.0}
+
+    def check(self, state, value, moment):
+        last, last_moment = state['last'], state['last_moment']
+        state['last'], state['last_moment'] = value, moment
+        if last is None or moment <= last_moment:
+            return False, ''
+        rate = (value - last) * 60.0 / (moment - last_moment)
+        state['rate'] += self.alpha * (rate - state['rate'])
+        return state['rate'] > self.rate, f"RSS growing {state['rate']:.1f} MB/min (limit {self.rate:g})"
+
+
+RULE_TYPES = {'threshold': ThresholdRule, 'zscore': ZScoreRule, 'growth': GrowthRule}
+
+
+def load_rules(path=None):
+    """Build rules from a JSON list of rule objects, or the defaults when no path is given"""
+    if path:
+        with open(path, encoding='utf-8') as file:
+            specs = json.load(file)
+    else:
+        specs = DEFAULT_RULES
+    rules = []
+    for spec in specs:
+        spec = dict(spec)
+        rule_type = spec.pop('type', 'threshold')
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown alert rule type: {rule_type}")
+        rules.append(RULE_TYPES[rule_type](**spec))
+    return rules
+
+
+class LogSink():
+    """Writes alert events to the task monitor log"""
+
+    def __init__(self):
+        self.logger = TaskMonitorLogger.get_logger('alerts')
+
+    def emit(self, event, active):
+        if event['state'] == 'firing':
+            self.logger.warning(f"ALERT {event['rule']}: {event['name']} (PID: {event['pid']}) - {event['detail']}")
+        else:
+            self.logger.info(f"Resolved {event['rule']}: {event['name']} (PID: {event['pid']}) - {event['detail']}")
+
+
+class JsonlSink():
+    """Appends alert events to a JSON-lines file and keeps the active alerts in a JSON file
+
+    The dashboard's /api/alerts reads both files.
+    """
+
+    def __init__(self, events_file='databag/alerts.jsonl', active_file='databag/alerts-active.json'):
+        self.events_file = Path(events_file)
+        self.active_file = Path(active_file)
+
+    def emit(self, event, active):
+        self.events_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.events_file, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(event) + '\n')
+        temp_file = f"{self.active_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(active, file)
+        os.replace(temp_file, self.active_file)
+
+
+class WebhookSink():
+    """POSTs alert events as JSON to a URL from a background thread
+
+    Delivery never blocks the sampler: events wait in a bounded queue and
+    are dropped (and counted) when the webhook cannot keep up.
+    """
+
+    QUEUE_SIZE = 1000
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.queue = queue.Queue(self.QUEUE_SIZE)
+        self.logger = TaskMonitorLogger.get_logger('alerts')
+        self.thread = threading.Thread(target=self._run, name='alert-webhook', daemon=True)
+        self.thread.start()
+
+    def emit(self, event, active):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            WEBHOOK_ERRORS.inc()
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            request = urllib.request.Request(
+                self.url, data=json.dumps(event).encode('utf-8'),
+                headers={'Content-Type': 'application/json'}, method='POST'
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    pass
+            except Exception as e:
+                WEBHOOK_ERRORS.inc()
+                self.logger.error(f"Error posting alert to {self.url}: {e}")
+
+
+def build_alert_engine(rules_file=None, webhook_url=None, databag='databag'):
+    """AlertEngine with the log and databag/alerts.jsonl sinks, plus a webhook when a URL is given"""
+    sinks = [LogSink(), JsonlSink(Path(databag) / 'alerts.jsonl', Path(databag) / 'alerts-active.json')]
+    if webhook_url:
+        sinks.append(WebhookSink(webhook_url))
+    return AlertEngine(load_rules(rules_file), sinks)
+
+
+class AlertEngine():
+    """Evaluates alert rules on every monitoring cycle.
+
+    Each cycle's process dicts are folded into per-(PID, name) rule state in
+    O(1) per process and rule; history is never rescanned. An alert fires
+    once its condition has held for the rule's `for_cycles` and resolves when
+    the condition clears or the process leaves the top-k for `stale_cycles`.
+    """
+
+    def __init__(self, rules, sinks, stale_cycles=30):
+        """
+        Args:
+            rules: AlertRule instances
+            sinks: Objects with emit(event, active_alerts)
+            stale_cycles: Cycles a process may be missing before its state is dropped
+        """
+        self.rules = rules
+        self.sinks = sinks
+        self.stale_cycles = stale_cycles
+        self.states = {}  # (pid, name) -> [last_seen_cycle, [(rule, state, streak, firing) per applicable rule]]
+        self.active = {}  # (rule, pid, name) -> firing event
+        self.cycle = 0
+        self.logger = TaskMonitorLogger.get_logger('alerts')
+
+    def evaluate(self, timestamp, processes):
+        """Fold one monitoring cycle ('%Y-%m-%d %H:%M:%S' timestamp) into the rules"""
+        self.cycle += 1
+        moment = datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+        for proc in processes:
+            key = (proc['pid'], proc['name'])
+            entry = self.states.get(key)
+            if entry is None:
+                entry = self.states[key] = [
+                    self.cycle,
+                    [[rule, rule.new_state(), 0, False] for rule in self.rules if rule.applies_to(proc['name'])]
+                ]
+            entry[0] = self.cycle
+            for rule_state in entry[1]:
+                rule, state = rule_state[0], rule_state[1]
+                value = proc.get(rule.key)
+                if value is None:
+                    continue  # CPU not measured yet
+                holds, detail = rule.check(state, value, moment)
+                rule_state[2] = rule_state[2] + 1 if holds else 0
+                firing = rule_state[2] >= rule.for_cycles
+                if firing != rule_state[3]:
+                    rule_state[3] = firing
+                    if not firing:
+                        detail = f"{rule.metric} back to {value:.2f}"
+                    self._transition(rule, proc, firing, detail, timestamp)
+
+        for key in [key for key, entry in self.states.items() if self.cycle - entry[0] > self.stale_cycles]:
+            for rule, _, _, firing in self.states.pop(key)[1]:
+                if firing:
+                    self._transition(rule, {'pid': key[0], 'name': key[1]}, False, 'process left the top list',
+                                     timestamp)
+
+    def _transition(self, rule, proc, firing, detail, timestamp):
+        event = {
+            'timestamp': timestamp,
+            'rule': rule.name,
+            'state': 'firing' if firing else 'resolved',
+            'pid': proc['pid'],
+            'name': proc['name'],
+            'metric': rule.metric,
+            'value': None if proc.get(rule.key) is None else round(proc[rule.key], 2),
+            'detail': detail
+        }
+        alert_key = (rule.name, proc['pid'], proc['name'])
+        if firing:
+            self.active[alert_key] = event
+        else:
+            self.active.pop(alert_key, None)
+        ALERT_EVENTS.labels(rule.name, event['state']).inc()
+        active = list(self.active.values())
+        for sink in self.sinks:
+            try:
+                sink.emit(event, active)
+            except Exception as e:
+                self.logger.error(f"Error delivering alert to {type(sink).__name__}: {e}")
@@ -0,0 +1,251 @@
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.src.rollup import TIMESTAMP_FORMAT, find_timestamp_offset
+from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
+
+ARCHIVE_QUERY_SECONDS = REGISTRY.histogram(
+    'taskmonitor_archive_query_seconds', 'Time to answer one query from the Parquet archive'
+)
+ARCHIVE_ROW_GROUPS = REGISTRY.counter(
+    'taskmonitor_archive_row_groups_total', 'Archive row groups considered by queries', ['result']
+)
+
+FILE_TIME_FORMAT = '%Y%m%dT%H%M%S'
+# Monitoring timestamps are naive local times; segments are cut on that wall clock
+EPOCH = datetime(1970, 1, 1)
+
+
+class ParquetArchive():
+    """Compressed, columnar archive of closed monitoring CSV segments.
+
+    Rows are cut into segments (one day by default) and each segment is
+    written once to a Parquet file named after the first and last timestamp
+    it holds. Files are sorted by time and split into row groups, whose
+    min/max statistics let a query skip every row group outside its time
+    range or PID. Only the requested columns are decoded.
+
+    pyarrow is imported on first use, so reading an empty archive costs
+    nothing.
+    """
+
+    ROW_GROUP_ROWS = 32768  # About one hour of 20 processes sampled every 2 s
+    COLUMN_TYPES = {
+        'Timestamp': 'timestamp[s]', 'PID': 'int64', 'Name': 'string',
+        'Memory (MB)': 'float64', 'CPU (%)': 'float64', 'PPID': 'int64', 'Create Time': 'float64',
+        'Threads': 'int64', 'Ctx Switches/s': 'float64', 'Read (KB/s)': 'float64', 'Write (KB/s)': 'float64',
+        'FDs': 'int64', 'USS (MB)': 'float64', 'PSS (MB)': 'float64'
+    }
+
+    def __init__(self, directory='databag/archive', segment_seconds=86400, compression='zstd'):
+        """
+        Args:
+            directory: Directory holding the segment files
+            segment_seconds: Length of one archive segment; a segment is closed once it lies in the past
+            compression: Parquet codec for the column chunks
+        """
+        self.directory = Path(directory)
+        self.segment_seconds = segment_seconds
+        self.compression = compression
+        self._metadata = {}  # path -> FileMetaData; segment files never change once written
+        self.logger = TaskMonitorLogger.get_logger('archive')
+
+    def segments(self):
+        """Sorted (first, last, path) of every archived segment"""
+        if not self.directory.exists():
+            return []
+        segments = []
+        for path in self.directory.glob('monitoring-*.parquet'):
+            try:
+                _, first, last = path.stem.split('-')
+                segments.append((
+                    datetime.strptime(first, FILE_TIME_FORMAT), datetime.strptime(last, FILE_TIME_FORMAT), path
+                ))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    def bounds(self):
+        """(first, last) archived sample time, None when the archive is empty"""
+        segments = self.segments()
+        if not segments:
+            return None
+        return segments[0][0], max(last for _, last, _ in segments)
+
+    def archive_csv(self, csv_path, now=None, close_all=False):
+        """Append the closed segments of a monitoring CSV that are not archived yet
+
+        The CSV is read and encoded one segment at a time, so memory stays
+        bounded by one segment however many are pending. Collectors call
+        this from their retention thread, never from a sampling tick.
+
+        Args:
+            csv_path: Time-sorted monitoring CSV
+            now: Segments ending before this moment are closed (default: now)
+            close_all: Archive every row, e.g. before the CSV is cleared for a new run
+
+        Returns:
+            Number of rows archived
+        """
+        csv_path = Path(csv_path)
+        if not csv_path.exists():
+            return 0
+
+        bounds = self.bounds()
+        start = (bounds[1] + timedelta(seconds=1)).strftime(TIMESTAMP_FORMAT) if bounds else None
+        if close_all:
+            cutoff = None
+        else:
+            seconds = int(((now or datetime.now()) - EPOCH).total_seconds())
+            cutoff = (EPOCH + timedelta(seconds=seconds - seconds % self.segment_seconds)).strftime(TIMESTAMP_FORMAT)
+
+        rows = 0
+        with open(csv_path, 'rb') as file:
+            header = file.readline()
+            size = os.fstat(file.fileno()).st_size
+            low = find_timestamp_offset(file, len(header), size, start) if start else len(header)
+            high = find_timestamp_offset(file, low, size, cutoff) if cutoff else size
+            while low < high:
+                file.seek(low)
+                first = datetime.strptime(file.readline().split(b',', 1)[0].decode('utf-8'), TIMESTAMP_FORMAT)
+                seconds = int((first - EPOCH).total_seconds())
+                boundary = EPOCH + timedelta(seconds=seconds - seconds % self.segment_seconds + self.segment_seconds)
+                end = min(find_timestamp_offset(file, low, high, boundary.strftime(TIMESTAMP_FORMAT)), high)
+                file.seek(low)
+                data = file.read(end - low)
+                # A collector may be appending; leave a partly written last row for next time
+                data = data[:data.rfind(b'\n') + 1]
+                if not data:
+                    break
+                rows += self._write_segments(self._parse(header + data))
+                low += len(data)
+        return rows
+
+    def _parse(self, data):
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        column_types = {name: pa.type_for_alias(alias) for name, alias in self.COLUMN_TYPES.items()}
+        return pa_csv.read_csv(
+            pa.py_buffer(data),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types, timestamp_parsers=[TIMESTAMP_FORMAT]
+            )
+        )
+
+    def _write_segments(self, table):
+        """Split a time-sorted table on segment boundaries and write one file per segment"""
+        import numpy as np
+        import pyarrow.parquet as pq
+
+        seconds = table.column('Timestamp').cast('int64').to_numpy()
+        segment_ids = seconds // self.segment_seconds
+        # Rows are time-sorted, so each segment is a contiguous slice
+        boundaries = np.flatnonzero(np.diff(segment_ids)) + 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for begin, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(seconds)]):
+            segment = table.slice(begin, end - begin)
+            first = EPOCH + timedelta(seconds=int(seconds[begin]))
+            last = EPOCH + timedelta(seconds=int(seconds[end - 1]))
+            path = self.directory / (
+                f"monitoring-{first.strftime(FILE_TIME_FORMAT)}-{last.strftime(FILE_TIME_FORMAT)}.parquet"
+            )
+            temp_path = path.with_suffix('.tmp')
+            pq.write_table(
+                segment, temp_path, row_group_size=self.ROW_GROUP_ROWS,
+                compression=self.compression, write_statistics=True
+            )
+            os.replace(temp_path, path)
+            self.logger.info(f"Archived {segment.num_rows} rows from {first} to {last} into {path.name}")
+        return table.num_rows
+
+    def query(self, start=None, end=None, name=None, pid=None, columns=None):
+        """Rows of the archive in [start, end], optionally for one process name and/or PID
+
+        Segment files outside the range are never opened, and row groups are
+        skipped on their Timestamp and PID statistics before anything is
+        decoded.
+
+        Args:
+            start, end: Naive datetime bounds (inclusive), None for open-ended
+            name: Process name to select
+            pid: PID to select
+            columns: Columns to return (default: all)
+
+        Returns:
+            pyarrow Table, None when nothing in the archive matches
+        """
+        started = time.perf_counter()
+        segments = [
+            path for first, last, path in self.segments()
+            if (start is None or last >= start) and (end is None or first <= end)
+        ]
+        if not segments:
+            return None
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        wanted = list(columns) if columns else None
+        read_columns = None
+        if wanted is not None:
+            # Filter columns are read as well, and dropped again below
+            read_columns = wanted + ['Timestamp']
+            if name is not None:
+                read_columns.append('Name')
+            if pid is not None:
+                read_columns.append('PID')
+            read_columns = list(dict.fromkeys(read_columns))
+
+        tables = []
+        for path in segments:
+            parquet_file = pq.ParquetFile(path, metadata=self._metadata.get(path))
+            metadata = self._metadata.setdefault(path, parquet_file.metadata)
+            groups = [index for index in range(metadata.num_row_groups)
+                      if self._row_group_matches(metadata.row_group(index), start, end, pid)]
+            ARCHIVE_ROW_GROUPS.labels('read').inc(len(groups))
+            ARCHIVE_ROW_GROUPS.labels('skipped').inc(metadata.num_row_groups - len(groups))
+            if groups:
+                tables.append(parquet_file.read_row_groups(groups, columns=read_columns))
+        if not tables:
+            return None
+
+        # Older segments may lack columns added since (PPID, Create Time); they read as nulls
+        table = pa.concat_tables(tables, promote_options='default')
+        # Samples have whole-second timestamps
+        start = start.replace(microsecond=0) if start else None
+        end = end.replace(microsecond=0) if end else None
+        mask = None
+        for condition in (
+            pc.greater_equal(table['Timestamp'], pa.scalar(start, pa.timestamp('s'))) if start else None,
+            pc.less_equal(table['Timestamp'], pa.scalar(end, pa.timestamp('s'))) if end else None,
+            pc.equal(table['Name'], name) if name is not None else None,
+            pc.equal(table['PID'], pid) if pid is not None else None,
+        ):
+            if condition is not None:
+                mask = condition if mask is None else pc.and_(mask, condition)
+        if mask is not None:
+            table = table.filter(mask)
+        if wanted is not None:
+            table = table.select(wanted)
+        ARCHIVE_QUERY_SECONDS.observe(time.perf_counter() - started)
+        return table
+
+    @staticmethod
+    def _row_group_matches(row_group, start, end, pid):
+        """Whether a row group's column statistics allow rows in the requested range"""
+        for index in range(row_group.num_columns):
+            column = row_group.column(index)
+            stats = column.statistics
+            if stats is None or not stats.has_min_max:
+                continue
+            if column.path_in_schema == 'Timestamp':
+                if (start is not None and stats.max < start) or (end is not None and stats.min > end):
+                    return False
+            elif column.path_in_schema == 'PID' and pid is not None:
+                if not stats.min <= pid <= stats.max:
+                    return False
+        return True
@@ -1,20 +1,44 @@
 import csv
+import json
 import os
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
+from app.src.extmetrics import EXTENDED_COLUMNS, ExtendedMetrics
 from app.src.gettasks import GetProcesses
+from app.src.procfilter import ProcessFilter
+from app.src.rollup import RollupWriter
+from app.src.scheduler import SamplingScheduler
 from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
+
+APPEND_SECONDS = REGISTRY.histogram(
+    'taskmonitor_store_append_seconds', 'Time to write one cycle to a store', ['store']
+)
 
 class CSVConverter():
-    def __init__(self):
-        self.get_processes = GetProcesses()
-        self.output_file = "databag/performance-snapshot.csv"
+    def __init__(self, collector='psutil', detail_every=1, workers=0, worker_type='process', process_tree=False,
+                 extended_metrics=False, expensive_every=10, extended_budget=0.05, include=None, exclude=None,
+                 users=None, cgroup=None, cgroup_depth=None):
+        extended = ExtendedMetrics(expensive_every, extended_budget) if extended_metrics else None
+        process_filter = ProcessFilter(include=include, exclude=exclude, users=users, cgroup=cgroup)
+        self.get_processes = GetProcesses(collector=collector, detail_every=detail_every,
+                                          workers=workers, worker_type=worker_type, track_tree=process_tree,
+                                          extended=extended, process_filter=process_filter,
+                                          cgroup_depth=cgroup_depth)
+        self.snapshot_file = "databag/performance-snapshot.csv"
+        self.output_file = self.snapshot_file
+        self.metrics_file = "databag/collector-metrics.prom"
+        self.tree_file = "databag/process-tree.json"
+        self.system_file = "databag/system.ring"
         self.logger = TaskMonitorLogger.get_snapshot_logger()
+        self.scheduler = None
+        self.append_lock = threading.Lock()  # Held while appending; retention takes it to swap the file
     
-    def _ensure_databag_directory(self):
-        """Ensure the databag directory exists, create if it doesn't"""
-        databag_dir = Path('databag')
+    def _ensure_databag_directory(self, output_file=None):
+        """Ensure the databag directory (or the directory of output_file) exists, create if it doesn't"""
+        databag_dir = Path(output_file).parent if output_file else Path('databag')
         if not databag_dir.exists():
             databag_dir.mkdir(parents=True, exist_ok=True)
             self.logger.info(f"Created databag directory: {databag_dir.absolute()}")
@@ -25,13 +49,15 @@ class CSVConverter():
             csv_data += f"{proc['pid']},{proc['name']},{proc['memory_mb']:.2f}\n"
         return csv_data
     
-    def write_to_csv_file(self, processes):
+    def write_to_csv_file(self, processes, output_file=None):
         """Write process data to performance-snapshot.csv file in write mode"""
+        output_file = output_file or self.output_file
+        started = time.perf_counter()
         try:
             # Ensure databag directory exists
-            self._ensure_databag_directory()
+            self._ensure_databag_directory(output_file)
             
-            with open(self.output_file, mode='w', newline='', encoding='utf-8') as file:
+            with open(output_file, mode='w', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 
                 # Write header
@@ -47,7 +73,8 @@ class CSVConverter():
                         f"{proc['memory_mb']:.2f}"
                     ])
                         
-            self.logger.info(f"Data successfully written to {self.output_file}")
+            APPEND_SECONDS.labels('snapshot').observe(time.perf_counter() - started)
+            self.logger.info(f"Data successfully written to {output_file}")
             return True
             
         except Exception as e:
@@ -56,47 +83,76 @@ class CSVConverter():
     
     def append_to_csv_file(self, timestamp, processes):
         """Append process data to CSV file (for monitoring mode)"""
+        return self.append_cycles_to_csv_file([(timestamp, processes)])
+    
+    def append_cycles_to_csv_file(self, cycles):
+        """Append several (timestamp, processes) cycles to the CSV file with one open and write"""
+        started = time.perf_counter()
         try:
             # Ensure databag directory exists
-            self._ensure_databag_directory()
+            self._ensure_databag_directory(self.output_file)
             
             file_exists = Path(self.output_file).exists()
             
-            with open(self.output_file, mode='a', newline='', encoding='utf-8') as file:
+            with self.append_lock, open(self.output_file, mode='a', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
                 
                 # Write header only if file doesn't exist
                 if not file_exists:
-                    if any('cpu_percent' in proc for proc in processes):
-                        writer.writerow(['Timestamp', 'PID', 'Name', 'Memory (MB)', 'CPU (%)'])
-                    else:
-                        writer.writerow(['Timestamp', 'PID', 'Name', 'Memory (MB)'])
+                    header = ['Timestamp', 'PID', 'Name', 'Memory (MB)']
+                    if any('cpu_percent' in proc for _, processes in cycles for proc in processes):
+                        header.append('CPU (%)')
+                    if any('ppid' in proc for _, processes in cycles for proc in processes):
+                        header.append('PPID')
+                    if any('create_time' in proc for _, processes in cycles for proc in processes):
+                        header.append('Create Time')
+                    for key, column in EXTENDED_COLUMNS:
+                        if any(key in proc for _, processes in cycles for proc in processes):
+                            header.append(column)
+                    writer.writerow(header)
                 
                 # Write process data with timestamp
-                for proc in processes:
-                    if 'cpu_percent' in proc:
-                        writer.writerow([
-                            timestamp,
-                            proc['pid'],
-                            proc['name'],
-                            round(proc['memory_mb'], 2),
-                            round(proc['cpu_percent'], 2)
-                        ])
-                    else:
-                        writer.writerow([
+                for timestamp, processes in cycles:
+                    for proc in processes:
+                        row = [
                             timestamp,
                             proc['pid'],
                             proc['name'],
                             round(proc['memory_mb'], 2)
-                        ])
+                        ]
+                        if 'cpu_percent' in proc:
+                            # Empty: unknown
+                            row.append('' if proc['cpu_percent'] is None else round(proc['cpu_percent'], 2))
+                        if 'ppid' in proc:
+                            row.append('' if proc['ppid'] is None else proc['ppid'])
+                        if 'create_time' in proc:
+                            row.append(round(proc['create_time'], 2))
+                        for key, _ in EXTENDED_COLUMNS:
+                            if key in proc:
+                                row.append('' if proc[key] is None else proc[key])
+                        writer.writerow(row)
             
-            self.logger.debug(f"Data appended to {self.output_file}")
+            APPEND_SECONDS.labels('csv').observe(time.perf_counter() - started)
+            self.logger.debug(f"{len(cycles)} cycle(s) appended to {self.output_file}")
             return True
             
         except Exception as e:
             self.logger.error(f"Error appending to CSV file: {e}")
             return False
     
+    def append_to_ring_store(self, timestamp, processes):
+        """Append process data to the memory-mapped ring store (for monitoring mode)"""
+        started = time.perf_counter()
+        try:
+            self.ring_store.append(timestamp, processes)
+            APPEND_SECONDS.labels('ring').observe(time.perf_counter() - started)
+            self.logger.debug(f"Data appended to {self.output_file}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error appending to ring store: {e}")
+            return False
+    
     def save_performance_data(self, limit=20):
         """Get current processes and save them to CSV file"""
         try:
@@ -105,30 +161,322 @@ class CSVConverter():
         except Exception as e:
             self.logger.error(f"Error getting process data: {e}")
             return False
+        finally:
+            self.get_processes.close()
     
-    def start_monitoring(self, limit=20, refresh_interval=2):
-        """Start continuous monitoring mode"""
-        self.logger.info(f"Starting continuous monitoring with {refresh_interval}s intervals")
-        self.logger.info("Press Ctrl+C to stop monitoring")
+    def write_process_tree(self, output_file=None):
+        """Atomically write the collector's process tree with subtree totals as JSON"""
+        output_file = output_file or self.tree_file
+        try:
+            self._ensure_databag_directory(output_file)
+            tree = {
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                **self.get_processes.tree.to_dict()
+            }
+            temp_file = f"{output_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(tree, file)
+            os.replace(temp_file, output_file)
+            self.logger.debug(f"Process tree with {len(tree['nodes'])} nodes written to {output_file}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error writing process tree: {e}")
+            return False
+    
+    def _get_archive(self):
+        # Imported here so runs without archiving don't load the archive module
+        from app.src.archive import ParquetArchive
         
-        # Set output file for monitoring
-        self.output_file = "databag/performance-monitoring.csv"
+        return ParquetArchive('databag/archive')
+    
+    def _archive_previous_run(self, monitoring_file):
+        """Archive all rows of the previous run's monitoring CSV before it is cleared"""
+        try:
+            rows = self._get_archive().archive_csv(monitoring_file, close_all=True)
+            if rows:
+                self.logger.info(f"Archived {rows} rows of the previous run from {monitoring_file}")
+        except Exception as e:
+            self.logger.error(f"Error archiving {monitoring_file}: {e}")
+    
+    def archive_monitoring_data(self):
+        """Convert closed segments of databag/performance-monitoring.csv to Parquet"""
+        try:
+            rows = self._get_archive().archive_csv("databag/performance-monitoring.csv")
+            self.logger.info(f"Archived {rows} rows to databag/archive")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error archiving monitoring data: {e}")
+            return False
+    
+    def analyze_leaks(self, limit=20, store='csv', **options):
+        """Log the processes whose RSS grew steadily over the monitoring history
         
-        # Clear existing monitoring file if it exists
-        monitoring_file = Path(self.output_file)
-        if monitoring_file.exists():
-            monitoring_file.unlink()
-            self.logger.info(f"Cleared existing monitoring file: {self.output_file}")
+        Args:
+            limit: Number of suspects to report
+            store: Monitoring store to analyze: 'csv' or 'ring'
+            **options: Thresholds for app.src.leaks.rank_leak_suspects
+        """
+        # Imported here so monitoring runs don't load the analysis module
+        from app.src.leaks import analyze_csv, analyze_ring_store
         
         try:
-            while True:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                processes = self.get_processes.monitor_top_processes(limit)
+            started = time.perf_counter()
+            if store == 'ring':
+                from app.src.ringstore import RingStore
                 
-                # Save to CSV
-                self.append_to_csv_file(timestamp, processes)
+                monitoring_file = "databag/performance-monitoring.ring"
+                suspects = analyze_ring_store(RingStore(monitoring_file), limit=limit, **options)
+            else:
+                monitoring_file = "databag/performance-monitoring.csv"
+                suspects = analyze_csv(monitoring_file, limit=limit, **options)
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            self.logger.error(f"Error analyzing {monitoring_file}: {e}")
+            return False
+        
+        self.logger.info(f"Analyzed {monitoring_file} in {elapsed:.2f}s, {len(suspects)} leak suspect(s)")
+        for rank, suspect in enumerate(suspects, 1):
+            self.logger.info(
+                f"{rank:>3}. {suspect['name']} (PID: {suspect['pid']}) "
+                f"+{suspect['slope_mb_per_hour']:.2f} MB/h, R² {suspect['r_squared']:.3f}, "
+                f"{suspect['start_memory_mb']:.2f} -> {suspect['end_memory_mb']:.2f} MB "
+                f"from {suspect['first_seen']} to {suspect['last_seen']}"
+            )
+        return True
+    
+    def _open_stores(self, store='csv', capacity=None, rollup=True, retention=None, archive=False, alerts=False,
+                     alert_rules=None, alert_webhook=None):
+        """Prepare the monitoring store, rollup tiers and alert engine for a new run
+        
+        Shared by live monitoring and replay, so replayed cycles take the same
+        write path. See start_monitoring for the arguments.
+        
+        Returns:
+            Function storing one (timestamp, processes) cycle
+        """
+        if store == 'ring':
+            # Imported here so CSV-only runs don't pay for numpy
+            from app.src.ringstore import RingStore
+            
+            self.output_file = "databag/performance-monitoring.ring"
+            self.ring_store = RingStore(self.output_file, capacity or RingStore.DEFAULT_CAPACITY, writable=True)
+            append = self.append_to_ring_store
+        else:
+            # Set output file for monitoring
+            self.output_file = "databag/performance-monitoring.csv"
+            append = self.append_to_csv_file
+            
+            # Clear existing monitoring file if it exists
+            monitoring_file = Path(self.output_file)
+            if monitoring_file.exists():
+                if archive:
+                    self._archive_previous_run(monitoring_file)
+                monitoring_file.unlink()
+                self.logger.info(f"Cleared existing monitoring file: {self.output_file}")
+        
+        self.rollup = None
+        if rollup:
+            # The ring store is bounded by its capacity, so raw retention only applies to the CSV
+            raw_file = self.output_file if store == 'csv' else None
+            parquet_archive = self._get_archive() if archive and raw_file else None
+            self.rollup = RollupWriter('databag', raw_file=raw_file, archive=parquet_archive,
+                                       raw_lock=self.append_lock, **(retention or {}))
+        
+        self.alerts = None
+        if alerts:
+            from app.src.alerts import build_alert_engine
+            
+            self.alerts = build_alert_engine(alert_rules, alert_webhook)
+        
+        def store_cycle(timestamp, processes):
+            # Save to the selected store
+            append(timestamp, processes)
+            if self.rollup:
+                self.rollup.add_cycle(timestamp, processes)
+            if self.alerts:
+                self.alerts.evaluate(timestamp, processes)
+        
+        return store_cycle
+    
+    def replay(self, recording, speed=None, store='csv', capacity=None, snapshot_interval=300, rollup=True,
+               retention=None, alerts=False, alert_rules=None, alert_webhook=None, probe=None):
+        """Feed a recording made with start_monitoring(record=...) through the monitoring write path
+        
+        Cycles are written to the selected store, rollup tiers and alert
+        engine exactly as live cycles are, so a dashboard server reading
+        databag/ sees production-shaped data without any live processes.
+        Timestamps are shifted so the recording starts now, keeping its
+        original spacing. Ingest throughput and write latency are logged at
+        the end, plus API latency when a dashboard URL is probed.
+        
+        Args:
+            recording: File written by CycleRecorder
+            speed: Multiple of real time to replay at, None for as fast as possible
+            snapshot_interval: Recorded seconds between performance-snapshot.csv refreshes (0 disables them)
+            probe: Optional dashboard base URL whose API is polled during the replay
+            store, capacity, rollup, retention, alerts, alert_rules, alert_webhook: As for start_monitoring
+        """
+        from app.src.replay import ApiProbe, percentiles, read_recording
+        
+        store_cycle = self._open_stores(store, capacity, rollup, retention, False, alerts, alert_rules, alert_webhook)
+        api_probe = None
+        if probe:
+            api_probe = ApiProbe(probe)
+            api_probe.start()
+        
+        self.logger.info(f"Replaying {recording} at {f'{speed:g}x' if speed else 'full speed'}")
+        write_seconds = []
+        rows = 0
+        first = last = last_snapshot = None
+        offset = 0.0
+        started = time.perf_counter()
+        try:
+            for moment, processes in read_recording(recording):
+                if first is None:
+                    first = moment
+                    offset = time.time() - moment
+                if speed:
+                    delay = started + (moment - first) / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
                 
-                time.sleep(refresh_interval)
+                cycle_started = time.perf_counter()
+                store_cycle(datetime.fromtimestamp(moment + offset).strftime('%Y-%m-%d %H:%M:%S'), processes)
+                if snapshot_interval and (last_snapshot is None or moment - last_snapshot >= snapshot_interval):
+                    self.write_to_csv_file(processes, self.snapshot_file)
+                    last_snapshot = moment
+                write_seconds.append(time.perf_counter() - cycle_started)
+                rows += len(processes)
+                last = moment
+        except KeyboardInterrupt:
+            self.logger.info("Replay stopped by user")
+        except Exception as e:
+            self.logger.error(f"Error during replay: {e}")
+            return False
+        finally:
+            if self.rollup:
+                self.rollup.flush()
+            elapsed = time.perf_counter() - started
+            api_latency = api_probe.stop() if api_probe else {}
+        
+        cycles = len(write_seconds)
+        if not cycles:
+            self.logger.warning(f"No cycles found in {recording}")
+            return True
+        latency = percentiles(write_seconds)
+        self.logger.info(
+            f"Replayed {cycles} cycles ({rows} rows) spanning {last - first:.0f}s in {elapsed:.2f}s: "
+            f"{cycles / elapsed:.1f} cycles/s, {rows / elapsed:.0f} rows/s, "
+            f"{(last - first) / elapsed:.1f}x real time"
+        )
+        self.logger.info(
+            "Cycle write latency: " + ", ".join(f"{key} {value * 1000:.2f} ms" for key, value in latency.items())
+        )
+        for endpoint, stats in api_latency.items():
+            self.logger.info(
+                f"API {endpoint}: {len(api_probe.latencies[endpoint])} requests, "
+                + ", ".join(f"{key} {value * 1000:.1f} ms" for key, value in stats.items())
+            )
+        if api_probe and api_probe.errors:
+            self.logger.warning(f"{api_probe.errors} API probe requests failed")
+        return True
+    
+    def start_monitoring(self, limit=20, refresh_interval=2, store='csv', capacity=None, snapshot_interval=300,
+                         rollup=True, retention=None, metrics_interval=60, archive=False, tree_interval=10,
+                         alerts=False, alert_rules=None, alert_webhook=None, record=None, system_interval=1,
+                         system_capacity=86400):
+        """Start continuous monitoring mode
+        
+        Samplers run on a drift-free SamplingScheduler: the process table every
+        refresh_interval seconds and a full snapshot every snapshot_interval
+        seconds. When both are due on the same tick they share one process scan.
+        Host-wide counters are sampled separately every system_interval seconds.
+        
+        Args:
+            limit: Number of top processes to record per cycle
+            refresh_interval: Seconds between cycles
+            store: 'csv' to append text rows, 'ring' for the memory-mapped ring store
+            capacity: Number of samples the ring store holds before overwriting
+            snapshot_interval: Seconds between performance-snapshot.csv refreshes (0 disables them)
+            rollup: Maintain the 1-minute and 1-hour rollup tiers alongside the raw data
+            retention: Optional dict of RollupWriter retention overrides in seconds
+                (raw_retention, minute_retention, hour_retention)
+            metrics_interval: Seconds between self-instrumentation summaries in the log and
+                refreshes of databag/collector-metrics.prom for the dashboard's /metrics (0 disables them)
+            archive: Convert closed segments of the CSV store to Parquet under databag/archive
+                before retention drops them (requires rollup)
+            tree_interval: Seconds between databag/process-tree.json refreshes when the collector
+                tracks the process tree (0 disables them)
+            alerts: Evaluate alert rules on every cycle; alerts go to the log and databag/alerts.jsonl
+            alert_rules: JSON file of alert rules (default: built-in rules)
+            alert_webhook: URL that alert events are POSTed to
+            record: Optional file every cycle's process dicts are also recorded to, for replay
+            system_interval: Seconds between system-wide samples in databag/system.ring (0 disables them)
+            system_capacity: Number of system samples kept before the oldest are overwritten
+        """
+        self.logger.info(f"Starting continuous monitoring with {refresh_interval}s intervals")
+        self.logger.info("Press Ctrl+C to stop monitoring")
+        
+        store_cycle = self._open_stores(store, capacity, rollup, retention, archive, alerts, alert_rules,
+                                        alert_webhook)
+        
+        recorder = None
+        if record:
+            from app.src.replay import CycleRecorder
+            
+            recorder = CycleRecorder(record)
+            self.logger.info(f"Recording monitoring cycles to {record}")
+        
+        system_sampler = None
+        if system_interval:
+            from app.src.sysmetrics import SystemSampler, open_system_ring
+            
+            system_sampler = SystemSampler()
+            system_ring = open_system_ring(self.system_file, system_sampler.dtype, system_capacity)
+        
+        get_processes = self.get_processes
+        scan_size = limit + get_processes.hysteresis
+        
+        def shared_scan(tick):
+            return tick.shared('scan', lambda: get_processes.scan(scan_size))
+        
+        def sample_process_table(tick):
+            now = datetime.now()
+            processes = get_processes.monitor_top_processes(limit, scan=shared_scan(tick))
+            store_cycle(now.strftime('%Y-%m-%d %H:%M:%S'), processes)
+            if recorder:
+                recorder.write(now.timestamp(), processes)
+        
+        def sample_snapshot(tick):
+            processes = get_processes.snapshot_top_memory_processes(limit, scan=shared_scan(tick))
+            self.write_to_csv_file(processes, self.snapshot_file)
+        
+        def report_metrics(tick):
+            summary = REGISTRY.summary()
+            if summary:
+                self.logger.info(f"Metrics: {summary}")
+            try:
+                REGISTRY.write_textfile(self.metrics_file)
+            except OSError as e:
+                self.logger.error(f"Error writing metrics file: {e}")
+        
+        self.scheduler = SamplingScheduler()
+        if system_sampler:
+            # Registered first: it is cheap, so it stays on time when it coincides with a process scan
+            self.scheduler.add_job('system', system_interval, lambda tick: system_sampler.sample_into(system_ring))
+        self.scheduler.add_job('process-table', refresh_interval, sample_process_table)
+        if snapshot_interval:
+            self.scheduler.add_job('snapshot', snapshot_interval, sample_snapshot)
+        if get_processes.tree and tree_interval:
+            # The tree is rebuilt by every scan; this only publishes it
+            self.scheduler.add_job('process-tree', tree_interval, lambda tick: self.write_process_tree())
+        if metrics_interval:
+            # Registered last, so each report includes the cycle that ran on the same tick
+            self.scheduler.add_job('metrics', metrics_interval, report_metrics)
+        
+        try:
+            self.scheduler.run()
+            return True
                 
         except KeyboardInterrupt:
             self.logger.info("\n\nMonitoring stopped. CSV saved.")
@@ -136,4 +484,18 @@ class CSVConverter():
             return True
         except Exception as e:
             self.logger.error(f"Error during monitoring: {e}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            if self.rollup:
+                self.rollup.flush()
+            if recorder:
+                recorder.close()
+                self.logger.info(f"Recorded {recorder.cycles} cycles to {record}")
+            self.get_processes.close()
+            if metrics_interval:
+                report_metrics(None)
+            for name, stats in self.scheduler.stats().items():
+                self.logger.info(
+                    f"Sampler '{name}': {stats['runs']} runs, {stats['missed_ticks']} missed ticks, "
+                    f"max lag {stats['max_lag'] * 1000:.1f} ms"
+                )
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling
+
+    Picks `threshold` points from the series (x sorted ascending) that
+    preserve its visual shape: the first and last points are always kept,
+    and from each bucket in between the point forming the largest triangle
+    with the previously kept point and the next bucket's average.
+
+    Args:
+        x: 1-D array of increasing x values (e.g. epoch seconds)
+        y: 1-D array of values
+        threshold: Number of points to keep
+
+    Returns:
+        Array of indices into x/y of the kept points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 interior points
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of each bucket; the last bucket is followed by the final point
+    lengths = ends - starts
+    avg_x = np.append(np.add.reduceat(x[:n - 1], starts) / lengths, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], starts) / lengths, y[-1])
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = starts[i], ends[i]
+        areas = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
@@ -0,0 +1,254 @@
+import threading
+from collections import deque
+from datetime import datetime
+from app.src.rollup import TIMESTAMP_FORMAT
+from app.src.scheduler import SamplingScheduler
+from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
+
+COLLECTOR_RUNNING = REGISTRY.gauge(
+    'taskmonitor_embedded_collector_running', '1 while the embedded collector thread is sampling, 0 once it stopped'
+)
+
+
+class CycleBuffer():
+    """Bounded in-memory time series of monitoring cycles.
+
+    The embedded collector appends process dicts as sampled, and the API
+    reads them directly, so nothing is serialized and parsed back in
+    between. The last `capacity` cycles are kept for history queries.
+    Per-name totals cover every cycle since the start, like the
+    aggregates over the monitoring CSV.
+    """
+
+    def __init__(self, capacity=1800):
+        """
+        Args:
+            capacity: Number of cycles kept for history (1800 is one hour at 2 s)
+        """
+        self.cycles = deque(maxlen=capacity)  # (epoch seconds, timestamp string, processes)
+        self.totals = {}  # name -> [memory_sum, cpu_sum, cpu_count, row_count]
+        self.snapshot = None
+        self.tree = None
+        self.version = 0
+        self.snapshot_version = 0
+        self.tree_version = 0
+        self.condition = threading.Condition()
+
+    def append(self, timestamp, processes):
+        """Add one monitoring cycle ('%Y-%m-%d %H:%M:%S' timestamp) and wake waiting readers"""
+        moment = datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+        with self.condition:
+            self.cycles.append((moment, timestamp, processes))
+            for proc in processes:
+                totals = self.totals.setdefault(proc['name'], [0.0, 0.0, 0, 0])
+                totals[0] += proc['memory_mb']
+                cpu = proc.get('cpu_percent')
+                if cpu is not None:
+                    totals[1] += cpu
+                    totals[2] += 1
+                totals[3] += 1
+            self.version += 1
+            self.condition.notify_all()
+
+    def set_snapshot(self, processes):
+        with self.condition:
+            self.snapshot = processes
+            self.snapshot_version += 1
+
+    def set_tree(self, tree):
+        """Publish a ProcessTree.to_dict export for /api/process-tree"""
+        with self.condition:
+            self.tree = tree
+            self.tree_version += 1
+
+    def records(self):
+        """Return per-name averages as a list of dicts"""
+        with self.condition:
+            return [
+                {
+                    'name': name,
+                    'avg_memory': memory_sum / count,
+                    'avg_cpu': cpu_sum / cpu_count if cpu_count else 0.0,
+                    'count': count
+                }
+                for name, (memory_sum, cpu_sum, cpu_count, count) in self.totals.items()
+            ]
+
+    def first_time(self):
+        """Time of the oldest buffered cycle, None while empty"""
+        with self.condition:
+            return datetime.fromtimestamp(self.cycles[0][0]) if self.cycles else None
+
+    def series(self, name=None, pid=None, start=None, end=None, metric='memory'):
+        """Values of matching processes summed per cycle
+
+        Returns (times, values, labels): epoch seconds, summed values and
+        timestamp strings of the cycles where at least one process matched.
+        """
+        key = 'memory_mb' if metric == 'memory' else 'cpu_percent'
+        start = start.timestamp() if start else None
+        end = end.timestamp() if end else None
+        with self.condition:
+            cycles = list(self.cycles)
+
+        times, values, labels = [], [], []
+        for moment, timestamp, processes in cycles:
+            if (start is not None and moment < start) or (end is not None and moment > end):
+                continue
+            matched = [
+                proc[key] for proc in processes
+                if (name is None or proc['name'] == name) and (pid is None or proc['pid'] == pid)
+                and proc.get(key) is not None
+            ]
+            if matched:
+                times.append(moment)
+                values.append(sum(matched))
+                labels.append(timestamp)
+        return times, values, labels
+
+    def wait_for(self, predicate, timeout):
+        """Block until predicate() is true (checked after each new cycle) or timeout expires"""
+        with self.condition:
+            return self.condition.wait_for(predicate, timeout)
+
+
+class BatchedCSVSink():
+    """Optional disk sink for the embedded collector.
+
+    Cycles are appended to the monitoring CSV every `flush_every` cycles in
+    a single write, and folded into the rollup tiers as they arrive.
+    """
+
+    def __init__(self, converter, flush_every=10, rollup=None):
+        """
+        Args:
+            converter: CSVConverter whose output_file and snapshot_file are written
+            flush_every: Number of cycles buffered before they are written
+            rollup: Optional RollupWriter fed with every cycle
+        """
+        self.converter = converter
+        self.flush_every = max(1, flush_every)
+        self.rollup = rollup
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def add_cycle(self, timestamp, processes):
+        if self.rollup:
+            self.rollup.add_cycle(timestamp, processes)
+        with self.lock:
+            self.pending.append((timestamp, processes))
+            if len(self.pending) < self.flush_every:
+                return
+            batch, self.pending = self.pending, []
+        self.converter.append_cycles_to_csv_file(batch)
+
+    def write_snapshot(self, processes):
+        self.converter.write_to_csv_file(processes, self.converter.snapshot_file)
+
+    def flush(self):
+        """Write pending cycles and open rollup buckets, e.g. on shutdown"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if batch:
+            self.converter.append_cycles_to_csv_file(batch)
+        if self.rollup:
+            self.rollup.flush()
+
+
+class EmbeddedCollector():
+    """Runs the process samplers on a background thread inside the dashboard server"""
+
+    def __init__(self, get_processes, buffer, limit=20, refresh_interval=2, snapshot_interval=300, sink=None,
+                 tree_interval=10, alerts=None, system_sampler=None, system_buffer=None, system_interval=1):
+        """
+        Args:
+            get_processes: GetProcesses instance to sample with
+            buffer: CycleBuffer the API reads from
+            limit: Number of top processes to record per cycle
+            refresh_interval: Seconds between cycles
+            snapshot_interval: Seconds between snapshots (0 disables them)
+            sink: Optional BatchedCSVSink persisting cycles and snapshots
+            tree_interval: Seconds between process tree exports when get_processes tracks the tree
+            alerts: Optional AlertEngine evaluated on every cycle
+            system_sampler: Optional SystemSampler for host-wide counters
+            system_buffer: SystemBuffer the system samples go into, read by /api/system
+            system_interval: Seconds between system samples
+        """
+        self.get_processes = get_processes
+        self.buffer = buffer
+        self.limit = limit
+        self.refresh_interval = refresh_interval
+        self.snapshot_interval = snapshot_interval
+        self.sink = sink
+        self.tree_interval = tree_interval
+        self.alerts = alerts
+        self.system_sampler = system_sampler
+        self.system_buffer = system_buffer
+        self.system_interval = system_interval
+        # A failing job is logged and counted, and sampling goes on; the API would otherwise serve a frozen buffer
+        self.scheduler = SamplingScheduler(catch_errors=True)
+        self.thread = None
+        self.logger = TaskMonitorLogger.get_logger('embedded_collector')
+
+    def start(self):
+        get_processes = self.get_processes
+        scan_size = self.limit + get_processes.hysteresis
+
+        def shared_scan(tick):
+            return tick.shared('scan', lambda: get_processes.scan(scan_size))
+
+        def sample_process_table(tick):
+            timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+            processes = get_processes.monitor_top_processes(self.limit, scan=shared_scan(tick))
+            self.buffer.append(timestamp, processes)
+            if self.sink:
+                self.sink.add_cycle(timestamp, processes)
+            if self.alerts:
+                self.alerts.evaluate(timestamp, processes)
+
+        def sample_snapshot(tick):
+            processes = get_processes.snapshot_top_memory_processes(self.limit, scan=shared_scan(tick))
+            self.buffer.set_snapshot(processes)
+            if self.sink:
+                self.sink.write_snapshot(processes)
+
+        def export_tree(tick):
+            self.buffer.set_tree({
+                'timestamp': datetime.now().strftime(TIMESTAMP_FORMAT),
+                **get_processes.tree.to_dict()
+            })
+
+        if self.system_sampler and self.system_interval:
+            self.scheduler.add_job('system', self.system_interval,
+                                   lambda tick: self.system_sampler.sample_into(self.system_buffer))
+        self.scheduler.add_job('process-table', self.refresh_interval, sample_process_table)
+        if self.snapshot_interval:
+            self.scheduler.add_job('snapshot', self.snapshot_interval, sample_snapshot)
+        if get_processes.tree and self.tree_interval:
+            self.scheduler.add_job('process-tree', self.tree_interval, export_tree)
+
+        self.thread = threading.Thread(target=self._run, name='embedded-collector', daemon=True)
+        self.thread.start()
+        self.logger.info(
+            f"Embedded collector sampling top {self.limit} processes every {self.refresh_interval}s"
+            f"{', persisting to ' + self.sink.converter.output_file if self.sink else ''}"
+        )
+
+    def _run(self):
+        COLLECTOR_RUNNING.set(1)
+        try:
+            self.scheduler.run()
+        except Exception as e:
+            self.logger.error(f"Embedded collector stopped: {e}")
+        finally:
+            COLLECTOR_RUNNING.set(0)
+            if self.sink:
+                self.sink.flush()
+            self.get_processes.close()
+
+    def stop(self, timeout=10):
+        """Stop sampling and wait for the sink to flush"""
+        self.scheduler.stop()
+        if self.thread is not None:
+            self.thread.join(timeout)
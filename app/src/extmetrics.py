@@ -0,0 +1,170 @@
+import time
+import psutil
+from app.src.utils.metrics import REGISTRY
+
+EXTENDED_SECONDS = REGISTRY.histogram(
+    'taskmonitor_extended_metrics_seconds', 'Time to read extended process metrics in one cycle', ['tier']
+)
+EXTENDED_DEFERRED = REGISTRY.counter(
+    'taskmonitor_extended_metrics_deferred_total',
+    'Extended metric reads postponed because the per-cycle budget ran out', ['tier']
+)
+
+# Process dict key -> monitoring CSV column, in column order
+EXTENDED_COLUMNS = [
+    ('threads', 'Threads'),
+    ('ctx_switches_per_s', 'Ctx Switches/s'),
+    ('read_kb_per_s', 'Read (KB/s)'),
+    ('write_kb_per_s', 'Write (KB/s)'),
+    ('fds', 'FDs'),
+    ('uss_mb', 'USS (MB)'),
+    ('pss_mb', 'PSS (MB)'),
+]
+
+# Unsupported on this platform, or not readable for this process
+UNAVAILABLE = (psutil.AccessDenied, psutil.ZombieProcess, AttributeError, NotImplementedError)
+
+
+class ExtendedMetrics():
+    """Thread, context switch, I/O, file descriptor and USS/PSS metrics in cost tiers.
+
+    The cheap tier (threads, context switches and I/O counters, a few
+    reads of /proc/[pid]/status and io on Linux) is read every cycle for
+    every reported process. Rates come from counter deltas between cycles,
+    so they are None the first time a process instance is seen, like CPU.
+    The expensive tier (open FDs and USS/PSS, which walk the fd directory
+    and every memory mapping) is read at most every `expensive_every`
+    cycles per process, stalest first. Between reads its last values are
+    carried forward.
+
+    Both tiers share a per-cycle time budget; the cheap tier may use at
+    most half of it, so the expensive tier keeps making progress. Within a
+    tier the stalest processes are read first. Once the budget is spent the
+    remaining processes keep their previous values until a later cycle, so
+    extended metrics add at most about `budget` to a cycle.
+    """
+
+    STALE_CYCLES = 30  # Cycles a process may be missing before its counters are forgotten
+
+    def __init__(self, expensive_every=10, budget=0.05):
+        """
+        Args:
+            expensive_every: Cycles between reads of the expensive tier for one process
+            budget: Seconds per cycle that extended metric collection may take
+        """
+        self.expensive_every = max(1, int(expensive_every))
+        self.budget = budget
+        self.cycle = 0
+        self.state = {}  # (pid, create_time) -> ExtendedState
+
+    def collect(self, processes, handles=None):
+        """Add the extended metrics to this cycle's process dicts in place
+
+        Args:
+            processes: Process dicts with 'pid' and 'create_time', largest first
+            handles: Matching psutil.Process objects, created here when not given (procfs collector)
+        """
+        self.cycle += 1
+        started = time.perf_counter()
+        deadline = started + self.budget
+
+        entries = []
+        for index, proc in enumerate(processes):
+            key = (proc['pid'], proc.get('create_time'))
+            entry = self.state.get(key)
+            if entry is None:
+                entry = self.state[key] = ExtendedState(handles[index] if handles else None)
+            entry.last_seen = self.cycle
+            entries.append((proc, entry))
+
+        cheap_deadline = started + self.budget / 2
+        deferred = 0
+        for proc, entry in sorted(entries, key=lambda item: item[1].counters_time or 0):
+            if time.perf_counter() >= cheap_deadline:
+                deferred += 1
+                continue
+            self._read_cheap(proc['pid'], entry)
+        EXTENDED_DEFERRED.labels('cheap').inc(deferred)
+        cheap_done = time.perf_counter()
+        EXTENDED_SECONDS.labels('cheap').observe(cheap_done - started)
+
+        due = [(proc['pid'], entry) for proc, entry in entries
+               if entry.expensive_cycle is None or self.cycle - entry.expensive_cycle >= self.expensive_every]
+        due.sort(key=lambda item: -1 if item[1].expensive_cycle is None else item[1].expensive_cycle)
+        deferred = 0
+        for pid, entry in due:
+            if time.perf_counter() >= deadline:
+                deferred += 1
+                continue
+            self._read_expensive(pid, entry)
+        EXTENDED_DEFERRED.labels('expensive').inc(deferred)
+        EXTENDED_SECONDS.labels('expensive').observe(time.perf_counter() - cheap_done)
+
+        for proc, entry in entries:
+            proc.update(entry.values)
+
+        for key in [key for key, entry in self.state.items() if self.cycle - entry.last_seen > self.STALE_CYCLES]:
+            del self.state[key]
+
+    def _handle(self, pid, entry):
+        if entry.handle is None:
+            entry.handle = psutil.Process(pid)
+        return entry.handle
+
+    def _read_cheap(self, pid, entry):
+        now = time.monotonic()
+        try:
+            handle = self._handle(pid, entry)
+            with handle.oneshot():
+                threads = handle.num_threads()
+                ctx = handle.num_ctx_switches()
+                ctx_switches = ctx.voluntary + ctx.involuntary
+                try:
+                    io = handle.io_counters()
+                    io_bytes = (io.read_bytes, io.write_bytes)
+                except UNAVAILABLE:
+                    io_bytes = None
+        except (psutil.NoSuchProcess, *UNAVAILABLE):
+            return
+
+        values = entry.values
+        values['threads'] = threads
+        previous = entry.counters
+        elapsed = now - entry.counters_time if previous else 0
+        if elapsed > 0:
+            values['ctx_switches_per_s'] = round((ctx_switches - previous[0]) / elapsed, 1)
+            if io_bytes is not None and previous[1] is not None:
+                values['read_kb_per_s'] = round((io_bytes[0] - previous[1][0]) / 1024 / elapsed, 2)
+                values['write_kb_per_s'] = round((io_bytes[1] - previous[1][1]) / 1024 / elapsed, 2)
+        entry.counters = (ctx_switches, io_bytes)
+        entry.counters_time = now
+
+    def _read_expensive(self, pid, entry):
+        entry.expensive_cycle = self.cycle  # Also on failure, so a denied process is not retried every cycle
+        values = entry.values
+        try:
+            handle = self._handle(pid, entry)
+            values['fds'] = handle.num_fds()
+        except psutil.NoSuchProcess:
+            return
+        except UNAVAILABLE:
+            pass
+        try:
+            memory = handle.memory_full_info()
+            values['uss_mb'] = round(memory.uss / (1024 * 1024), 2)
+            pss = getattr(memory, 'pss', None)  # Linux only
+            values['pss_mb'] = None if pss is None else round(pss / (1024 * 1024), 2)
+        except (psutil.NoSuchProcess, *UNAVAILABLE):
+            pass
+
+
+class ExtendedState():
+    """Counters and carried-forward values of one process instance"""
+
+    def __init__(self, handle=None):
+        self.handle = handle
+        self.values = dict.fromkeys(key for key, _ in EXTENDED_COLUMNS)
+        self.counters = None  # (context switches, (read bytes, write bytes) or None)
+        self.counters_time = None
+        self.expensive_cycle = None
+        self.last_seen = 0
@@ -1,50 +1,214 @@
 import psutil
+import heapq
+import itertools
+import logging
 import time
 import os
+import weakref
+from app.src.cgroups import CgroupCollector
+from app.src.proccollector import ProcFSCollector
+from app.src.proctree import ProcessTree
 from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
 
-class GetProcesses():
+SCAN_SECONDS = REGISTRY.histogram(
+    'taskmonitor_process_scan_seconds', 'Time to walk the process table and rank it by RSS', ['collector']
+)
+CYCLE_SECONDS = REGISTRY.histogram(
+    'taskmonitor_cycle_seconds', 'Collection time of one monitoring cycle, scan included'
+)
+ACCESS_ERRORS = REGISTRY.counter(
+    'taskmonitor_process_access_errors_total', 'Processes that vanished or denied access while being read'
+)
+PROCESSES_SCANNED = REGISTRY.gauge('taskmonitor_processes_scanned', 'Processes seen by the last scan')
+INFO_CACHE_LOOKUPS = REGISTRY.counter(
+    'taskmonitor_process_info_cache_lookups_total', 'Static attribute cache lookups', ['result']
+)
+
+
+def rank_shard(pids, keep):
+    """Find the `keep` largest processes by RSS among `pids`
+    
+    Runs in a collection worker, so it only returns plain tuples:
+    ((rss, pid, create_time) sorted by RSS descending, process_count, error_count).
+    Processes that exit between enumeration and the read are counted as errors.
+    """
+    heap = []
+    process_count = 0
+    error_count = 0
+    for pid in pids:
+        try:
+            proc = psutil.Process(pid)
+            entry = (proc.memory_info().rss, pid, proc.create_time())
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            error_count += 1
+            continue
+        if len(heap) < keep:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+        process_count += 1
+    heap.sort(reverse=True)
+    return heap, process_count, error_count
+
+
+class ProcessInfoCache():
+    """Static attributes of process instances, keyed by (pid, create_time)
+    
+    Name, exe, cmdline, username and ppid never change for a process
+    instance, so they are read once, when the process first becomes a top-k
+    candidate, and reused every cycle after that. An entry is replaced when
+    its PID is reused by a new process (different create_time) and evicted
+    when the PID disappears from the process table.
+    """
+    STATIC_ATTRS = ['name', 'exe', 'cmdline', 'username', 'ppid']
+    
     def __init__(self):
+        self.entries = {}  # pid -> (create_time, attrs)
+    
+    def get(self, proc):
+        """Static attributes of a psutil.Process, reading them on first sight of this instance"""
+        create_time = proc.create_time()  # Cached by psutil on the Process object
+        entry = self.entries.get(proc.pid)
+        if entry is not None and entry[0] == create_time:
+            INFO_CACHE_LOOKUPS.labels('hit').inc()
+            return entry[1]
+        
+        INFO_CACHE_LOOKUPS.labels('miss').inc()
+        attrs = proc.as_dict(attrs=self.STATIC_ATTRS, ad_value=None)  # Inaccessible attributes are None
+        attrs['name'] = attrs['name'] or 'Unknown'
+        attrs['cmdline'] = ' '.join(attrs['cmdline']) if attrs['cmdline'] else None
+        self.entries[proc.pid] = (create_time, attrs)
+        return attrs
+    
+    def evict_exited(self, seen_pids):
+        """Evict entries whose process has exited
+        
+        seen_pids were just returned by the scan, so only the other cached
+        PIDs need a liveness check (a signal-0 kill on POSIX).
+        """
+        for pid in self.entries.keys() - seen_pids:
+            if not psutil.pid_exists(pid):
+                del self.entries[pid]
+    
+    def __len__(self):
+        return len(self.entries)
+
+
+class GetProcesses():
+    COLLECTORS = ('psutil', 'procfs', 'cgroup')
+    WORKER_TYPES = ('process', 'thread')
+    
+    TREE_ATTRS = ['ppid', 'name', 'cpu_times', 'create_time']
+    
+    def __init__(self, collector='psutil', hysteresis=5, detail_every=1, workers=0, worker_type='process',
+                 track_tree=False, extended=None, process_filter=None, cgroup_depth=None):
+        """
+        Args:
+            collector: 'psutil' (portable), 'procfs' (Linux fast path reading /proc directly) or
+                'cgroup' (one entry per cgroup with its memory and CPU totals, instead of processes)
+            hysteresis: Extra processes just below the top-k cutoff whose CPU baseline is kept fresh
+            detail_every: Log per-process detail every N monitoring cycles (0 disables it)
+            workers: Shard the psutil scan across this many workers (0 or 1 scans serially)
+            worker_type: 'process' pool (parallel on all cores) or 'thread' pool
+            track_tree: Maintain a ProcessTree of every process with subtree RSS and CPU totals
+            extended: Optional ExtendedMetrics adding I/O, thread, FD and USS/PSS metrics to monitoring cycles
+            process_filter: Optional ProcessFilter applied before any expensive attribute is read
+            cgroup_depth: Levels below the cgroup root to aggregate at with the cgroup collector (default: leaves)
+        """
         self.processes = []
+        self.info_cache = ProcessInfoCache()
         self.logger = TaskMonitorLogger.get_process_logger()
+        self.detail_logger = TaskMonitorLogger.get_process_detail_logger()
+        self.detail_every = detail_every
+        self.cycle_count = 0
+        self._scan_started = time.perf_counter()
         self.refresh_interval = 2  # seconds
-        self._prime_cpu_counters()
+        self.hysteresis = hysteresis
+        self.collector = collector
+        self.process_filter = process_filter if process_filter and process_filter.active else None
+        self.procfs = None
+        self.cgroups = None
+        if collector == 'cgroup':
+            if CgroupCollector.is_supported():
+                self.cgroups = CgroupCollector(depth=cgroup_depth, process_filter=self.process_filter)
+            else:
+                self.logger.warning("/sys/fs/cgroup is not available, falling back to the psutil collector")
+                self.collector = 'psutil'
+        if collector == 'procfs':
+            if ProcFSCollector.is_supported():
+                self.procfs = ProcFSCollector(process_filter=self.process_filter)
+            else:
+                self.logger.warning("/proc is not available, falling back to the psutil collector")
+                self.collector = 'psutil'
+        # Collector returning ready-made process dicts, None for psutil
+        self.source = self.procfs or self.cgroups
+        self.workers = workers if workers > 1 else 0
+        self.worker_type = worker_type
+        self.executor = None
+        self._process_objects = {}  # pid -> psutil.Process of the last parallel scan's candidates
+        if self.workers and self.source:
+            self.logger.warning("Parallel collection is only supported by the psutil collector, scanning serially")
+            self.workers = 0
+        if self.workers and self.process_filter:
+            self.logger.warning("Process filters need a serial scan, parallel collection is disabled")
+            self.workers = 0
+        self.tree = None
+        if track_tree and self.cgroups:
+            self.logger.warning("The process tree is not available with the cgroup collector")
+        elif track_tree:
+            if self.workers:
+                self.logger.warning("The process tree needs a serial scan, parallel collection is disabled")
+                self.workers = 0
+            self.tree = ProcessTree()
+        self._tree_cpu = {}  # pid -> (create_time, cpu seconds) at the previous tree scan
+        self._tree_time = None
+        if extended and self.cgroups:
+            self.logger.warning("Extended metrics are per process, they are not collected with the cgroup collector")
+            extended = None
+        self.extended = extended
+        # Process objects whose cpu_percent has been called; psutil drops exited ones
+        self._cpu_baselined = weakref.WeakSet()
     
-    def _prime_cpu_counters(self):
-        """Prime CPU counters so cpu_percent is meaningful"""
-        self.logger.debug("Priming CPU counters...")
-        for proc in psutil.process_iter():
-            try:
-                proc.cpu_percent(None)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        time.sleep(1)
-        self.logger.debug("CPU counters primed")
-    
-    def snapshot_top_memory_processes(self, limit=20):
-        """Get top memory-consuming processes (snapshot mode)"""
-        # Reset processes list for fresh data
-        self.processes = []
-        self.logger.debug(f"Starting to collect top {limit} memory processes")
+    def _rank_by_memory(self, keep):
+        """Phase one: find the `keep` largest processes by RSS with a bounded heap
         
-        # Get all processes and their memory usage
+        Only memory_info is read for every process. Returns a list of
+        (rss, pid, proc) tuples sorted by RSS descending, plus the number of
+        processes scanned and access errors. With a process filter, the
+        process table is walked without prefetched attributes, and memory_info
+        is only read for processes that pass the filter.
+        """
+        heap = []
         process_count = 0
         error_count = 0
+        tree_rows = [] if self.tree else None
+        attrs = ['memory_info'] + (self.TREE_ATTRS if self.tree else [])
+        process_filter = self.process_filter
+        seen_pids = set()
         
-        for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
+        for proc in psutil.process_iter(attrs=None if process_filter else attrs):
             try:
+                if process_filter:
+                    seen_pids.add(proc.pid)
+                    with proc.oneshot():
+                        if not process_filter.allows(proc.pid, proc.create_time(), proc.name, proc.username):
+                            continue
+                        proc.info = proc.as_dict(attrs)
                 # Check if memory_info is available and not None
                 if proc.info['memory_info'] is None:
                     error_count += 1
-                    self.logger.debug(f"Process {proc.info.get('pid', 'unknown')} has no memory info")
+                    self.logger.debug(f"Process {proc.pid} has no memory info")
                     continue
-                    
-                mem_mb = proc.info['memory_info'].rss / (1024 * 1024)  # Convert bytes to MB
-                self.processes.append({
-                    'pid': proc.info['pid'],
-                    'name': proc.info['name'] or 'Unknown',
-                    'memory_mb': mem_mb
-                })
+                if tree_rows is not None:
+                    tree_rows.append((proc.pid, proc.info))
+                
+                # (rss, pid) is unique, so the Process object is never compared
+                entry = (proc.info['memory_info'].rss, proc.pid, proc)
+                if len(heap) < keep:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
                 process_count += 1
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
                 error_count += 1
@@ -53,53 +217,228 @@ class GetProcesses():
                 error_count += 1
                 self.logger.debug(f"Process data error: {e}")
         
-        # Sort processes by memory usage and return the top n
-        top_processes = sorted(self.processes, key=lambda x: x['memory_mb'], reverse=True)[:limit]
+        heap.sort(reverse=True)
+        if process_filter:
+            process_filter.end_scan(seen_pids)
+        self.info_cache.evict_exited({pid for _, pid, _ in heap})
+        if tree_rows is not None:
+            self._update_tree(tree_rows)
+        return heap, process_count, error_count
+    
+    def _update_tree(self, infos):
+        """Feed the process tree from (pid, process_iter info) pairs, deriving CPU% from cpu_times deltas"""
+        now = time.monotonic()
+        elapsed = now - self._tree_time if self._tree_time else None
+        previous_cpu = self._tree_cpu
+        current_cpu = {}
+        rows = []
+        for pid, info in infos:
+            cpu = None
+            times = info['cpu_times']
+            if times is not None:
+                seconds = times.user + times.system
+                current_cpu[pid] = (info['create_time'], seconds)
+                previous = previous_cpu.get(pid)
+                if elapsed and previous is not None and previous[0] == info['create_time']:
+                    cpu = (seconds - previous[1]) * 100.0 / elapsed
+            rows.append((pid, info['ppid'], info['name'] or 'Unknown', info['memory_info'].rss / (1024 * 1024), cpu))
+        self._tree_cpu = current_cpu
+        self._tree_time = now
+        self.tree.update(rows)
+    
+    def _rank_by_memory_parallel(self, keep):
+        """Phase one, sharded: every worker ranks an interleaved slice of the PID list
         
-        self.logger.info(f"Collected {process_count} processes, {error_count} access errors, returning top {len(top_processes)}")
+        The per-shard top-k lists are merged into the global top-k, which is
+        exact because each global top-k process is in its shard's top-k.
+        Returns the same (rss, pid, proc) tuples as _rank_by_memory. Process
+        objects are kept between scans so cpu_percent baselines survive.
+        """
+        if self.executor is None:
+            # Imported here so serial and snapshot runs don't pay for it
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+            
+            pool = ProcessPoolExecutor if self.worker_type == 'process' else ThreadPoolExecutor
+            self.executor = pool(max_workers=self.workers)
         
-        return top_processes
-    
-    def monitor_top_processes(self, limit=20):
-        """Get top processes with both memory and CPU usage (for monitoring mode)"""
-        # Don't reset processes list - continuous monitoring
-        processes = []
+        pids = psutil.pids()
+        futures = [
+            self.executor.submit(rank_shard, pids[shard::self.workers], keep)
+            for shard in range(self.workers)
+        ]
+        shard_tops = []
         process_count = 0
         error_count = 0
+        for future in futures:
+            top, shard_count, shard_errors = future.result()
+            shard_tops.append(top)
+            process_count += shard_count
+            error_count += shard_errors
+        
+        ranked = []
+        process_objects = {}
+        for rss, pid, create_time in heapq.nlargest(keep, itertools.chain.from_iterable(shard_tops)):
+            proc = self._process_objects.get(pid)
+            try:
+                if proc is None or proc.create_time() != create_time:
+                    proc = psutil.Process(pid)
+                    if proc.create_time() != create_time:
+                        raise psutil.NoSuchProcess(pid)  # PID reused since the worker read it
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
+                error_count += 1
+                self.logger.debug(f"Could not access process info: {e}")
+                continue
+            process_objects[pid] = proc
+            ranked.append((rss, pid, proc))
         
+        self._process_objects = process_objects
+        self.info_cache.evict_exited(process_objects.keys())
+        return ranked, process_count, error_count
+    
+    def close(self):
+        """Shut down the collection worker pool, if one was started"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+    
+    def scan(self, keep):
+        """Walk the process table once and keep the `keep` largest processes by RSS
+        
+        The result can be passed to both monitor_top_processes and
+        snapshot_top_memory_processes, so samplers that run at the same time
+        share one process table walk. Returns (ranked, process_count, error_count);
+        ranked holds process dicts for the procfs and cgroup collectors and
+        (rss, pid, proc) tuples for psutil.
+        """
+        self._scan_started = time.perf_counter()
+        if self.source:
+            processes, error_count = self.source.collect()
+            ranked = heapq.nlargest(keep, processes, key=lambda x: x['memory_mb'])
+            if self.tree:
+                self.tree.update(
+                    (proc['pid'], proc['ppid'], proc['name'], proc['memory_mb'], proc['cpu_percent'])
+                    for proc in processes
+                )
+            result = ranked, len(processes), error_count
+        elif self.workers:
+            result = self._rank_by_memory_parallel(keep)
+        else:
+            result = self._rank_by_memory(keep)
+        
+        SCAN_SECONDS.labels(self.collector).observe(time.perf_counter() - self._scan_started)
+        PROCESSES_SCANNED.set(result[1])
+        if result[2]:
+            ACCESS_ERRORS.inc(result[2])
+        return result
+    
+    def snapshot_top_memory_processes(self, limit=20, scan=None):
+        """Get top memory-consuming processes (snapshot mode)"""
+        # Reset processes list for fresh data
+        self.processes = []
+        self.logger.debug(f"Starting to collect top {limit} memory processes")
+        
+        ranked, process_count, error_count = scan or self.scan(limit)
+        ranked = ranked[:limit]
+        
+        if self.source:
+            self.processes = [
+                {'pid': proc['pid'], 'name': proc['name'], 'memory_mb': proc['memory_mb']}
+                for proc in ranked
+            ]
+            self.logger.info(f"Collected {process_count} processes, {error_count} access errors, returning top {len(self.processes)}")
+            return self.processes
+        
+        # Phase two: static attributes come from the cache for the processes being returned
+        for rss, pid, proc in ranked:
+            try:
+                self.processes.append({
+                    'pid': pid,
+                    'memory_mb': rss / (1024 * 1024),  # Convert bytes to MB
+                    **self.info_cache.get(proc)
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
+                error_count += 1
+                ACCESS_ERRORS.inc()
+                self.logger.debug(f"Could not access process info: {e}")
+        
+        self.logger.info(f"Collected {process_count} processes, {error_count} access errors, returning top {len(self.processes)}")
+        
+        return self.processes
+    
+    def monitor_top_processes(self, limit=20, scan=None):
+        """Get top processes with both memory and CPU usage (for monitoring mode)
+        
+        RSS is read for every process, but cpu_percent only for the top
+        `limit` plus `hysteresis` runners-up. Calling cpu_percent on the
+        runners-up keeps their CPU baseline fresh, so a process crossing the
+        cutoff reports a real value on its first appearance. There is no
+        blocking priming step: the first cycle that sees a process only
+        establishes its baseline, and its CPU is reported as None (unknown).
+        Name, exe, cmdline, username and ppid come from the static attribute
+        cache and are only read once per process instance.
+        """
         self.logger.debug(f"Monitoring top {limit} processes with CPU and memory data")
+        self.cycle_count += 1
+        
+        ranked, process_count, error_count = scan or self.scan(limit + self.hysteresis)
         
-        for proc in psutil.process_iter(attrs=['pid', 'name', 'memory_info']):
+        if self.source:
+            top_processes = ranked[:limit]
+            if self.extended:
+                self.extended.collect(top_processes)
+            self._log_cycle(top_processes, process_count, error_count)
+            return top_processes
+        
+        # Phase two: expensive attributes for the candidates only
+        top_processes = []
+        handles = []
+        for rss, pid, proc in ranked:
             try:
-                if proc.info['memory_info'] is None:
-                    error_count += 1
-                    continue
-                    
-                mem_mb = proc.info['memory_info'].rss / (1024 * 1024)
                 cpu = proc.cpu_percent(None)  # % since last call
+                if proc not in self._cpu_baselined:
+                    cpu = None  # First call only sets the baseline
+                    self._cpu_baselined.add(proc)
+                if len(top_processes) >= limit:
+                    continue  # Runner-up: baseline refreshed, not reported
                 
-                process_name = proc.info['name'] or 'Unknown'
-                processes.append({
-                    'pid': proc.info['pid'],
-                    'name': process_name,
-                    'memory_mb': mem_mb,
-                    'cpu_percent': cpu
+                top_processes.append({
+                    'pid': pid,
+                    'memory_mb': rss / (1024 * 1024),
+                    'cpu_percent': cpu,
+                    'create_time': proc.create_time(),  # Cached by psutil on the Process object
+                    **self.info_cache.get(proc)
                 })
-                
-                # Log process details being polled
-                self.logger.info(f"Polled process: {process_name} (PID: {proc.info['pid']}) - Memory: {mem_mb:.2f} MB, CPU: {cpu:.1f}%")
-                process_count += 1
+                handles.append(proc)
                 
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess) as e:
                 error_count += 1
+                ACCESS_ERRORS.inc()
                 self.logger.debug(f"Could not access process info: {e}")
-            except (AttributeError, TypeError, KeyError) as e:
-                error_count += 1
-                self.logger.debug(f"Process data error: {e}")
         
-        # Sort by memory usage
-        top_processes = sorted(processes, key=lambda x: x['memory_mb'], reverse=True)[:limit]
-        
-        self.logger.debug(f"Monitored {process_count} processes, {error_count} access errors, returning top {len(top_processes)}")
+        if self.extended:
+            self.extended.collect(top_processes, handles)
+        self._log_cycle(top_processes, process_count, error_count)
         
         return top_processes
+    
+    def _log_cycle(self, top_processes, process_count, error_count):
+        """Log one summary record per cycle, and sampled per-process detail"""
+        # Measured from the start of the scan, which may have been shared with other samplers
+        elapsed = time.perf_counter() - self._scan_started
+        CYCLE_SECONDS.observe(elapsed)
+        elapsed_ms = elapsed * 1000
+        total_memory = sum(proc['memory_mb'] for proc in top_processes)
+        self.logger.info(
+            f"Cycle {self.cycle_count}: monitored {process_count} processes, {error_count} access errors, "
+            f"top {len(top_processes)} using {total_memory:.2f} MB, collected in {elapsed_ms:.1f} ms"
+        )
+        
+        if not self.detail_every or self.cycle_count % self.detail_every:
+            return
+        if not self.detail_logger.isEnabledFor(logging.INFO):
+            return
+        
+        # Log process details being polled
+        for proc in top_processes:
+            cpu = 'n/a' if proc['cpu_percent'] is None else f"{proc['cpu_percent']:.1f}%"
+            self.detail_logger.info(f"Polled process: {proc['name']} (PID: {proc['pid']}) - Memory: {proc['memory_mb']:.2f} MB, CPU: {cpu}")
@@ -0,0 +1,193 @@
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from app.src.archive import EPOCH
+from app.src.rollup import TIMESTAMP_FORMAT
+from app.src.utils.metrics import REGISTRY
+
+LEAK_ANALYSIS_SECONDS = REGISTRY.histogram(
+    'taskmonitor_leak_analysis_seconds', 'Time to fit RSS growth over the whole monitoring history'
+)
+
+LEAK_COLUMNS = ['Timestamp', 'PID', 'Name', 'Memory (MB)', 'Create Time']
+
+
+def fit_memory_slopes(times, pids, instances, memory):
+    """Least-squares RSS growth of every process instance, in one vectorized pass
+
+    Samples are grouped by (pid, instance) with one lexsort, and the sums
+    for the per-group linear regression of memory on time are accumulated
+    with np.bincount, so the cost does not depend on the number of series.
+    Times are centred on each series' mean before squaring to keep float64
+    precision with epoch-second timestamps.
+
+    Args:
+        times: Sample times in seconds
+        pids: PID of each sample
+        instances: Second key telling apart processes that reused a PID (create time), 0 when unknown
+        memory: RSS of each sample in MB
+
+    Returns:
+        Dict of per-series arrays: 'first' and 'last' (row index of the first and
+        last sample), 'samples', 'span' (seconds), 'slope' (MB per hour),
+        'r_squared', 'start_mb' and 'end_mb' (fitted values at the ends)
+    """
+    times = np.asarray(times, dtype=np.float64)
+    memory = np.asarray(memory, dtype=np.float64)
+    pids = np.asarray(pids)
+    instances = np.asarray(instances)
+    if len(times) == 0:
+        empty = np.empty(0)
+        return {key: empty for key in ('first', 'last', 'samples', 'span', 'slope', 'r_squared',
+                                       'start_mb', 'end_mb')}
+
+    order = np.lexsort((times, instances, pids))
+    t, y = times[order], memory[order]
+    pid_sorted, instance_sorted = pids[order], instances[order]
+    boundary = (pid_sorted[1:] != pid_sorted[:-1]) | (instance_sorted[1:] != instance_sorted[:-1])
+    group = np.concatenate(([0], np.cumsum(boundary)))
+    starts = np.concatenate(([0], np.flatnonzero(boundary) + 1))
+    ends = np.append(starts[1:], len(t)) - 1
+
+    counts = np.bincount(group).astype(np.float64)
+    mean_t = np.bincount(group, weights=t) / counts
+    mean_y = np.bincount(group, weights=y) / counts
+    dt = t - mean_t[group]
+    dy = y - mean_y[group]
+    sxx = np.bincount(group, weights=dt * dt)
+    sxy = np.bincount(group, weights=dt * dy)
+    syy = np.bincount(group, weights=dy * dy)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+        r_squared = np.where((sxx > 0) & (syy > 0), sxy * sxy / (sxx * syy), 0.0)
+
+    return {
+        'first': order[starts],
+        'last': order[ends],
+        'samples': counts.astype(np.int64),
+        'span': t[ends] - t[starts],
+        'slope': slope * 3600,
+        'r_squared': r_squared,
+        'start_mb': mean_y + slope * (t[starts] - mean_t),
+        'end_mb': mean_y + slope * (t[ends] - mean_t)
+    }
+
+
+def rank_leak_suspects(fit, limit=20, min_samples=30, min_span=600, min_slope=1.0, min_r_squared=0.8):
+    """Indices into a fit_memory_slopes result of the steadiest growers, fastest first
+
+    Args:
+        fit: Result of fit_memory_slopes
+        limit: Number of suspects to return
+        min_samples: Samples a series needs before it is considered
+        min_span: Seconds a series must cover
+        min_slope: Growth in MB per hour below which a series is not a suspect
+        min_r_squared: Goodness of fit required, so noisy or stepwise series are left out
+    """
+    candidates = np.flatnonzero(
+        (fit['samples'] >= min_samples) & (fit['span'] >= min_span)
+        & (fit['slope'] >= min_slope) & (fit['r_squared'] >= min_r_squared)
+    )
+    return candidates[np.argsort(-fit['slope'][candidates], kind='stable')][:limit]
+
+
+def find_leak_suspects(times, pids, instances, memory, names, create_times=None, to_datetime=None, **options):
+    """Fit every series and describe the ranked suspects
+
+    Args:
+        times, pids, instances, memory: Sample arrays as for fit_memory_slopes
+        names: Callable mapping an array of row indices to their process names
+        create_times: Optional per-row process create time (epoch seconds, NaN or 0 when unknown)
+        to_datetime: Converts a sample time to a datetime (default: datetime.fromtimestamp)
+        **options: Thresholds passed to rank_leak_suspects
+
+    Returns:
+        List of suspect dicts, fastest growth first
+    """
+    started = time.perf_counter()
+    to_datetime = to_datetime or datetime.fromtimestamp
+    fit = fit_memory_slopes(times, pids, instances, memory)
+    ranked = rank_leak_suspects(fit, **options)
+    last_rows = fit['last'][ranked]
+    suspect_names = names(last_rows) if len(ranked) else []
+
+    suspects = []
+    for index, row, name in zip(ranked, last_rows, suspect_names):
+        create_time = float(create_times[row]) if create_times is not None else None
+        suspects.append({
+            'pid': int(pids[row]),
+            'name': name,
+            'create_time': (datetime.fromtimestamp(create_time).strftime(TIMESTAMP_FORMAT)
+                            if create_time and not np.isnan(create_time) else None),
+            'samples': int(fit['samples'][index]),
+            'first_seen': to_datetime(float(times[fit['first'][index]])).strftime(TIMESTAMP_FORMAT),
+            'last_seen': to_datetime(float(times[row])).strftime(TIMESTAMP_FORMAT),
+            'start_memory_mb': round(float(fit['start_mb'][index]), 2),
+            'end_memory_mb': round(float(fit['end_mb'][index]), 2),
+            'slope_mb_per_hour': round(float(fit['slope'][index]), 3),
+            'r_squared': round(float(fit['r_squared'][index]), 4)
+        })
+    LEAK_ANALYSIS_SECONDS.observe(time.perf_counter() - started)
+    return suspects
+
+
+def wall_clock(seconds):
+    """Datetime of a naive wall-clock second count, as parsed from monitoring CSV timestamps"""
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def read_csv_samples(csv_path):
+    """Columns of a monitoring CSV needed for leak analysis, parsed with pyarrow
+
+    Returns (times, pids, create_times, memory, names): numpy arrays with
+    wall-clock seconds (see wall_clock), and the Name column as a pyarrow
+    array. create_times is all NaN for files written before the Create Time
+    column existed.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    table = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={
+                'Timestamp': pa.timestamp('s'), 'PID': pa.int64(), 'Name': pa.string(),
+                'Memory (MB)': pa.float64(), 'Create Time': pa.float64()
+            },
+            timestamp_parsers=[TIMESTAMP_FORMAT],
+            include_columns=LEAK_COLUMNS,
+            include_missing_columns=True
+        )
+    )
+    return (
+        table.column('Timestamp').cast(pa.int64()).to_numpy().astype(np.float64),
+        table.column('PID').to_numpy(),
+        table.column('Create Time').to_numpy(zero_copy_only=False).astype(np.float64),
+        table.column('Memory (MB)').to_numpy(zero_copy_only=False).astype(np.float64),
+        table.column('Name')
+    )
+
+
+def analyze_csv(csv_path, **options):
+    """Leak suspects of a monitoring CSV; see find_leak_suspects for the options"""
+    times, pids, create_times, memory, names = read_csv_samples(csv_path)
+    return find_leak_suspects(
+        times, pids, np.nan_to_num(create_times), memory,
+        names=lambda rows: names.take(rows).to_pylist(),
+        create_times=create_times, to_datetime=wall_clock, **options
+    )
+
+
+def analyze_ring_store(ring_store, **options):
+    """Leak suspects of a RingStore; see find_leak_suspects for the options
+
+    The records are already columnar, so they are fitted in place. The ring
+    store has no create time, so series are told apart by PID and name.
+    """
+    records = ring_store.view()
+    return find_leak_suspects(
+        records['timestamp'], records['pid'], records['name_id'], records['rss'] / (1024 * 1024),
+        names=lambda rows: [ring_store.names.get_name(records['name_id'][row]) for row in rows],
+        **options
+    )
@@ -0,0 +1,107 @@
+import os
+import time
+
+
+class ProcFSCollector():
+    """Linux process collector that reads /proc/[pid]/stat directly.
+
+    A single read of ``stat`` yields the name, RSS (field 24, the same resident
+    page count psutil reads from ``statm``) and utime/stime jiffies. CPU% is
+    computed from jiffy deltas between cycles, so no per-process objects are
+    kept around; it is None until a process has been seen in a previous
+    cycle. The returned dicts have the same shape as the psutil path.
+    An optional ProcessFilter is applied right after the stat read, so
+    filtered processes cost one read and are not ranked or kept.
+    """
+
+    def __init__(self, proc_path='/proc', process_filter=None):
+        self.proc_path = proc_path
+        self.process_filter = process_filter
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self._last_cpu = {}  # pid -> (starttime, utime + stime)
+        self._last_time = None
+        self.boot_time = self._read_boot_time()
+
+    @staticmethod
+    def is_supported(proc_path='/proc'):
+        return os.path.exists(os.path.join(proc_path, 'self', 'stat'))
+
+    def _read_boot_time(self):
+        """Boot time in epoch seconds ('btime' in /proc/stat), 0 when unavailable"""
+        try:
+            with open(os.path.join(self.proc_path, 'stat'), 'rb') as file:
+                for line in file:
+                    if line.startswith(b'btime '):
+                        return int(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            pass
+        return 0
+
+    def read_stat(self, pid):
+        """Parse /proc/[pid]/stat into (name, ppid, cpu_jiffies, starttime, rss_bytes)"""
+        with open(f"{self.proc_path}/{pid}/stat", 'rb') as file:
+            data = file.read()
+
+        # The command name may itself contain spaces and parentheses
+        name_end = data.rfind(b')')
+        name = data[data.find(b'(') + 1:name_end].decode('utf-8', 'replace')
+        fields = data[name_end + 2:].split()
+
+        # fields[0] is field 3 (state) in proc(5) numbering
+        ppid = int(fields[1])
+        cpu_jiffies = int(fields[11]) + int(fields[12])
+        starttime = int(fields[19])
+        rss_bytes = int(fields[21]) * self.page_size
+        return name, ppid, cpu_jiffies, starttime, rss_bytes
+
+    def collect(self):
+        """Read every process once; returns (processes, error_count)"""
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time else None
+        scale = 100.0 / (elapsed * self.clock_ticks) if elapsed else None
+
+        processes = []
+        error_count = 0
+        current_cpu = {}
+        process_filter = self.process_filter
+        seen_pids = set()
+
+        for entry in os.listdir(self.proc_path):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            try:
+                name, ppid, cpu_jiffies, starttime, rss_bytes = self.read_stat(pid)
+                if process_filter:
+                    seen_pids.add(pid)
+                    if not process_filter.allows(pid, starttime, name):
+                        continue
+            except (FileNotFoundError, ProcessLookupError, PermissionError):
+                error_count += 1  # Vanished between listdir and open, or not readable
+                continue
+            except (ValueError, IndexError):
+                error_count += 1
+                continue
+
+            current_cpu[pid] = (starttime, cpu_jiffies)
+            previous = self._last_cpu.get(pid)
+            if scale is not None and previous is not None and previous[0] == starttime:
+                cpu = (cpu_jiffies - previous[1]) * scale
+            else:
+                cpu = None  # No baseline yet for this process instance
+
+            processes.append({
+                'pid': pid,
+                'ppid': ppid,
+                'name': name or 'Unknown',
+                'memory_mb': rss_bytes / (1024 * 1024),
+                'cpu_percent': cpu,
+                'create_time': self.boot_time + starttime / self.clock_ticks
+            })
+
+        if process_filter:
+            process_filter.end_scan(seen_pids)
+        self._last_cpu = current_cpu
+        self._last_time = now
+        return processes, error_count
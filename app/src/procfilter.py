@@ -0,0 +1,113 @@
+import os
+import re
+from app.src.cgroups import read_process_cgroup
+from app.src.utils.metrics import REGISTRY
+
+PROCESSES_FILTERED = REGISTRY.gauge(
+    'taskmonitor_processes_filtered', 'Processes skipped by the include/exclude filters in the last scan'
+)
+
+
+class ProcessFilter():
+    """Include/exclude rules applied before any expensive process attribute is read.
+
+    The regular expressions are compiled once. A rule matches anywhere in
+    its subject (re.search), so anchor it with ^...$ for an exact match. A
+    process is kept when its name matches `include` (if given), does not
+    match `exclude`, belongs to one of `users` (if given) and its cgroup
+    path matches `cgroup` (if given). Rules are checked cheapest first,
+    and only the name is needed for the first two.
+
+    Verdicts are cached per process instance, (pid, create time or
+    starttime), so a long-lived process is evaluated once: afterwards the
+    collectors only read what they need to rank it.
+    """
+
+    def __init__(self, include=None, exclude=None, users=None, cgroup=None, proc_path='/proc'):
+        """
+        Args:
+            include: Regex a process name must match
+            exclude: Regex of process names to skip
+            users: Usernames whose processes are kept (a uid without a passwd entry is its number)
+            cgroup: Regex the process' cgroup path must match
+            proc_path: procfs mount point, for cgroup paths and process owners
+        """
+        self.include = re.compile(include) if include else None
+        self.exclude = re.compile(exclude) if exclude else None
+        self.users = set(users) if users else None
+        self.cgroup = re.compile(cgroup) if cgroup else None
+        self.proc_path = proc_path
+        self.verdicts = {}  # pid -> (instance, allowed)
+        self._usernames = {}  # uid -> username
+        self.filtered = 0
+
+    @property
+    def active(self):
+        return any(rule is not None for rule in (self.include, self.exclude, self.users, self.cgroup))
+
+    def allows(self, pid, instance, name, username=None):
+        """Whether the process instance passes the rules
+
+        Args:
+            pid: Process ID
+            instance: Create time or starttime, telling apart processes that reused a PID
+            name: Process name, or a callable returning it (only called on a cache miss)
+            username: Callable returning the owner's username (default: owner of /proc/[pid])
+        """
+        cached = self.verdicts.get(pid)
+        if cached is not None and cached[0] == instance:
+            allowed = cached[1]
+        else:
+            allowed = self._evaluate(pid, name() if callable(name) else name, username)
+            self.verdicts[pid] = (instance, allowed)
+        if not allowed:
+            self.filtered += 1
+        return allowed
+
+    def _evaluate(self, pid, name, username):
+        if self.include and not self.include.search(name):
+            return False
+        if self.exclude and self.exclude.search(name):
+            return False
+        if self.users:
+            owner = username() if username else self.proc_username(pid)
+            if owner not in self.users:
+                return False
+        if self.cgroup:
+            path = read_process_cgroup(pid, self.proc_path)
+            if path is None or not self.cgroup.search(path):
+                return False
+        return True
+
+    def allows_cgroup(self, path):
+        """Whether a cgroup path passes the rules, in cgroup aggregation mode
+
+        The name rules and the cgroup rule all apply to the path; users do
+        not apply to cgroups.
+        """
+        allowed = not ((self.include and not self.include.search(path))
+                       or (self.exclude and self.exclude.search(path))
+                       or (self.cgroup and not self.cgroup.search(path)))
+        if not allowed:
+            self.filtered += 1
+        return allowed
+
+    def proc_username(self, pid):
+        """Owner of a process from the uid of /proc/[pid], the numeric uid when it has no passwd entry"""
+        uid = os.stat(f"{self.proc_path}/{pid}").st_uid
+        username = self._usernames.get(uid)
+        if username is None:
+            try:
+                import pwd
+                username = pwd.getpwuid(uid).pw_name
+            except (ImportError, KeyError):
+                username = str(uid)
+            self._usernames[uid] = username
+        return username
+
+    def end_scan(self, seen_pids):
+        """Publish this scan's filtered count and forget verdicts of PIDs that were not seen"""
+        PROCESSES_FILTERED.set(self.filtered)
+        self.filtered = 0
+        for pid in self.verdicts.keys() - seen_pids:
+            del self.verdicts[pid]
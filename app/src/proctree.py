@@ -0,0 +1,135 @@
+import heapq
+
+
+class ProcessTree():
+    """Parent -> children index over the whole process table, with subtree totals.
+
+    update() is called once per collector cycle with every process. The
+    index is patched incrementally: only processes that appeared, exited or
+    were re-parented touch the children sets. Subtree totals are then rolled
+    up in a single pass over a breadth-first order, children before
+    parents, so a cycle stays O(n) however deep the tree is and no
+    recursion is involved.
+    """
+
+    def __init__(self):
+        self.parents = {}  # pid -> ppid
+        self.children = {}  # pid -> set of child pids
+        self.nodes = {}  # pid -> [name, memory_mb, cpu_percent]
+        self.subtree = {}  # pid -> [memory_mb, cpu_percent, descendants]
+        self.roots = []
+
+    def update(self, rows):
+        """Replace the process table and recompute subtree totals
+
+        Args:
+            rows: Iterable of (pid, ppid, name, memory_mb, cpu_percent); cpu_percent may be None
+        """
+        nodes = {}
+        parents = self.parents
+        children = self.children
+        for pid, ppid, name, memory_mb, cpu_percent in rows:
+            nodes[pid] = [name, memory_mb, cpu_percent]
+            previous = parents.get(pid)
+            if previous != ppid:
+                if previous is not None:
+                    children[previous].discard(pid)
+                children.setdefault(ppid, set()).add(pid)
+                parents[pid] = ppid
+
+        for pid in parents.keys() - nodes.keys():
+            children[parents.pop(pid)].discard(pid)
+        for pid in [pid for pid, kids in children.items() if not kids and pid not in nodes]:
+            del children[pid]
+        self.nodes = nodes
+
+        # A process whose parent is not in the table (init, kthreadd, orphans of a vanished reader) is a root
+        self.roots = [pid for pid, ppid in parents.items() if ppid not in nodes or ppid == pid]
+        order = list(self.roots)
+        for pid in order:  # Grows while iterating: breadth-first over the children index
+            order.extend(child for child in children.get(pid, ()) if child != pid)
+
+        subtree = {}
+        for pid in reversed(order):
+            _, memory_mb, cpu_percent = nodes[pid]
+            totals = subtree.get(pid)
+            if totals is None:
+                totals = subtree[pid] = [0.0, 0.0, 0]
+            totals[0] += memory_mb
+            totals[1] += cpu_percent or 0.0
+            ppid = parents[pid]
+            if ppid in nodes and ppid != pid:
+                parent_totals = subtree.get(ppid)
+                if parent_totals is None:
+                    parent_totals = subtree[ppid] = [0.0, 0.0, 0]
+                parent_totals[0] += totals[0]
+                parent_totals[1] += totals[1]
+                parent_totals[2] += totals[2] + 1
+        self.subtree = subtree
+
+    def node(self, pid):
+        name, memory_mb, cpu_percent = self.nodes[pid]
+        subtree_memory, subtree_cpu, descendants = self.subtree[pid]
+        return {
+            'pid': pid,
+            'ppid': self.parents[pid],
+            'name': name,
+            'memory_mb': round(memory_mb, 2),
+            'cpu_percent': None if cpu_percent is None else round(cpu_percent, 2),
+            'subtree_memory_mb': round(subtree_memory, 2),
+            'subtree_cpu_percent': round(subtree_cpu, 2),
+            'descendants': descendants
+        }
+
+    def to_dict(self, limit=200):
+        """Flat, connected export of the `limit` largest subtrees by memory
+
+        Every ancestor of a selected process is included, so the result can
+        be re-assembled into a tree from the roots down.
+        """
+        selected = set()
+        for pid in heapq.nlargest(limit, self.subtree, key=lambda pid: self.subtree[pid][0]):
+            while pid not in selected:
+                selected.add(pid)
+                ppid = self.parents[pid]
+                if ppid not in self.nodes or ppid == pid:
+                    break
+                pid = ppid
+        return {
+            'process_count': len(self.nodes),
+            'roots': [pid for pid in self.roots if pid in selected],
+            'nodes': [self.node(pid) for pid in selected]
+        }
+
+
+def build_tree(tree, root=None, depth=3, limit=10):
+    """Nest the flat export of ProcessTree.to_dict for display
+
+    Args:
+        tree: Dict with 'roots' and 'nodes' as written by ProcessTree.to_dict
+        root: PID to start from (default: every root)
+        depth: Levels of children to include below the starting processes
+        limit: Children kept per process, largest subtree memory first
+
+    Returns:
+        List of node dicts, each with a 'children' list
+    """
+    nodes = {node['pid']: node for node in tree['nodes']}
+    children = {}
+    for node in tree['nodes']:
+        if node['ppid'] in nodes and node['ppid'] != node['pid']:
+            children.setdefault(node['ppid'], []).append(node)
+
+    def nest(node, level):
+        kids = sorted(children.get(node['pid'], []), key=lambda kid: kid['subtree_memory_mb'], reverse=True)
+        nested = dict(node, children=[])
+        if level < depth:
+            nested['children'] = [nest(kid, level + 1) for kid in kids[:limit]]
+        return nested
+
+    if root is not None:
+        starts = [nodes[root]] if root in nodes else []
+    else:
+        starts = [nodes[pid] for pid in tree['roots'] if pid in nodes]
+    starts.sort(key=lambda node: node['subtree_memory_mb'], reverse=True)
+    return [nest(node, 0) for node in starts]
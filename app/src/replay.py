@@ -0,0 +1,139 @@
+import gzip
+import json
+import struct
+import threading
+import time
+import urllib.request
+import zlib
+from app.src.utils import TaskMonitorLogger
+
+MAGIC = b'TMREC001'
+FRAME_HEADER = struct.Struct('<dI')  # Cycle time in epoch seconds, payload length
+
+
+class CycleRecorder():
+    """Records the raw output of monitor_top_processes to a compact binary file.
+
+    The file is one gzip stream: the magic bytes, then one frame per cycle
+    made of a fixed header (cycle time, payload length) and the process
+    dicts as compact JSON. Process names, keys and most values repeat from
+    cycle to cycle, so the stream compresses to a fraction of the CSV.
+    The stream is flushed every `flush_every` cycles, so an interrupted
+    recording loses at most that many cycles.
+    """
+
+    def __init__(self, path, flush_every=30):
+        """
+        Args:
+            path: Recording file to create (replaced if it exists)
+            flush_every: Cycles between flushes to disk
+        """
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.cycles = 0
+        self.file = gzip.open(path, 'wb', compresslevel=6)
+        self.file.write(MAGIC)
+
+    def write(self, moment, processes):
+        """Append one cycle sampled at `moment` (epoch seconds)"""
+        payload = json.dumps(processes, separators=(',', ':')).encode('utf-8')
+        self.file.write(FRAME_HEADER.pack(moment, len(payload)))
+        self.file.write(payload)
+        self.cycles += 1
+        if self.cycles % self.flush_every == 0:
+            self.file.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self):
+        self.file.close()
+
+
+def read_recording(path):
+    """Yield (epoch seconds, process dicts) for every cycle of a recording
+
+    A recording cut short (e.g. by a killed collector) ends at its last
+    complete frame.
+    """
+    with gzip.open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a task monitor recording")
+        while True:
+            try:
+                header = file.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    return
+                moment, length = FRAME_HEADER.unpack(header)
+                payload = file.read(length)
+            except (EOFError, zlib.error, gzip.BadGzipFile):
+                return
+            if len(payload) < length:
+                return
+            yield moment, json.loads(payload)
+
+
+def parse_speed(value):
+    """'50x', '50' or 'max' -> replay speed factor, None for as fast as possible"""
+    value = str(value).strip().lower()
+    if value in ('max', 'asap', '0', '0x'):
+        return None
+    speed = float(value[:-1] if value.endswith('x') else value)
+    if speed <= 0:
+        raise ValueError(f"Replay speed must be positive: {value}")
+    return speed
+
+
+def percentiles(samples, points=(0.5, 0.95, 0.99)):
+    """Nearest-rank percentiles of a list of numbers, plus the maximum"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    stats = {f"p{int(point * 100)}": ordered[min(len(ordered) - 1, int(point * len(ordered)))] for point in points}
+    stats['max'] = ordered[-1]
+    return stats
+
+
+class ApiProbe():
+    """Polls dashboard API endpoints from a background thread and records their latency"""
+
+    DEFAULT_ENDPOINTS = ('/api/dashboard', '/api/process-metrics', '/api/alerts')
+
+    def __init__(self, base_url, endpoints=DEFAULT_ENDPOINTS, interval=0.5, timeout=10):
+        """
+        Args:
+            base_url: Dashboard server, e.g. http://localhost:5000
+            endpoints: Paths requested in turn
+            interval: Seconds between rounds of requests
+            timeout: Seconds before a request counts as failed
+        """
+        self.base_url = base_url.rstrip('/')
+        self.endpoints = endpoints
+        self.interval = interval
+        self.timeout = timeout
+        self.latencies = {endpoint: [] for endpoint in endpoints}
+        self.errors = 0
+        self.stopped = threading.Event()
+        self.thread = None
+        self.logger = TaskMonitorLogger.get_logger('replay')
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='api-probe', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            for endpoint in self.endpoints:
+                started = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(self.base_url + endpoint, timeout=self.timeout) as response:
+                        response.read()
+                    self.latencies[endpoint].append(time.perf_counter() - started)
+                except Exception as e:
+                    self.errors += 1
+                    self.logger.debug(f"Probe of {endpoint} failed: {e}")
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        """Stop polling; returns {endpoint: latency percentiles in seconds}"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(self.timeout)
+        return {endpoint: percentiles(samples) for endpoint, samples in self.latencies.items()}
@@ -0,0 +1,248 @@
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from app.src.utils import TaskMonitorLogger
+
+HEADER_SIZE = 64
+MAGIC = b'TMRING01'
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('record_size', '<u4'),
+    ('capacity', '<u8'),
+    ('written', '<u8'),  # Total records ever appended; head = written % capacity
+    ('created', '<u8'),  # time_ns() at creation, tells apart rings that reuse an inode
+])
+
+PROCESS_RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),  # Seconds since the epoch
+    ('pid', '<u4'),
+    ('name_id', '<u4'),
+    ('rss', '<u8'),  # Bytes
+    ('cpu', '<f4'),  # Percent, NaN when unknown
+])
+
+
+class RingBuffer():
+    """Fixed-width records in a preallocated memory-mapped file.
+
+    Layout: a 64 byte header followed by ``capacity`` records. Once the buffer
+    is full, new records overwrite the oldest ones in ring order.
+
+    A writer never truncates a mapped file: it builds a new file and renames
+    it over the old one, so readers keep a valid mapping of the old inode
+    until is_replaced() tells them to reopen.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, dtype, capacity=None, writable=False):
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype)
+        self.writable = writable
+        self.logger = TaskMonitorLogger.get_logger('ring_store')
+
+        if writable:
+            self._create(capacity)
+
+        mode = 'r+' if writable else 'r'
+        self.header = np.memmap(self.path, dtype=HEADER_DTYPE, mode=mode, shape=(1,))
+        if self.header['magic'][0] != MAGIC or self.header['record_size'][0] != self.dtype.itemsize:
+            raise ValueError(f"{self.path} is not a ring store with {self.dtype.itemsize} byte records")
+
+        self.capacity = int(self.header['capacity'][0])
+        self.records = np.memmap(self.path, dtype=self.dtype, mode=mode,
+                                 offset=HEADER_SIZE, shape=(self.capacity,))
+        self.created = int(self.header['created'][0])
+        self.inode = os.stat(self.path).st_ino
+
+    def _create(self, capacity):
+        """Preallocate a fresh ring file, replacing any existing one"""
+        if not capacity or capacity <= 0:
+            raise ValueError("A positive capacity is required to create a ring store")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(temp_path, 'wb') as file:
+            file.truncate(HEADER_SIZE + capacity * self.dtype.itemsize)
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header['magic'] = MAGIC
+            header['version'] = self.VERSION
+            header['record_size'] = self.dtype.itemsize
+            header['capacity'] = capacity
+            header['created'] = time.time_ns()
+            file.write(header.tobytes())
+        os.replace(temp_path, self.path)
+        self.logger.info(f"Created ring store {self.path} with capacity {capacity}")
+
+    @property
+    def generation(self):
+        """(inode, creation stamp) identifying this instance of the file"""
+        return self.inode, self.created
+
+    @property
+    def written(self):
+        return int(self.header['written'][0])
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def append(self, records):
+        """Write records at the head of the ring, overwriting the oldest ones"""
+        count = len(records)
+        if count == 0:
+            return
+        if count > self.capacity:
+            records = records[-self.capacity:]
+            count = self.capacity
+
+        written = self.written
+        start = written % self.capacity
+        first = min(count, self.capacity - start)
+        self.records[start:start + first] = records[:first]
+        if first < count:
+            self.records[:count - first] = records[first:]
+
+        # Publish the new head only after the records are in place
+        self.header['written'] = written + len(records)
+        self.records.flush()
+        self.header.flush()
+
+    def view(self):
+        """Zero-copy view of all valid records in storage order (not time order)"""
+        return self.records[:len(self)]
+
+    def ordered(self):
+        """Valid records oldest first; copies only when the ring has wrapped"""
+        written = self.written
+        if written <= self.capacity:
+            return self.records[:written]
+        head = written % self.capacity
+        return np.concatenate((self.records[head:], self.records[:head]))
+
+    def is_replaced(self):
+        """True when the file on disk is no longer the one that is mapped"""
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+
+class NameDictionary():
+    """Append-only name table mapping name ids to process names, one per line"""
+
+    def __init__(self, path, writable=False):
+        self.path = Path(path)
+        self.names = []
+        self.ids = {}
+        self._offset = 0
+        self._inode = None
+
+        if writable:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+            temp_path.write_text('', encoding='utf-8')
+            os.replace(temp_path, self.path)
+        self.refresh()
+
+    def refresh(self):
+        """Pick up names appended by the writer since the last refresh
+
+        Starts over when the writer replaced the file (a new inode) or it
+        shrank, since the ids then refer to a new table.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset:
+                    self.names = []
+                    self.ids = {}
+                    self._offset = 0
+                    self._inode = stat.st_ino
+                file.seek(self._offset)
+                data = file.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].decode('utf-8').splitlines():
+            self.ids[line] = len(self.names)
+            self.names.append(line)
+        self._offset += end
+
+    def get_id(self, name):
+        """Return the id for a name, registering it if it is new"""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name = name.replace('\n', ' ')
+            name_id = self.ids.setdefault(name, len(self.names))
+            if name_id == len(self.names):
+                self.names.append(name)
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(name + '\n')
+        return name_id
+
+    def get_name(self, name_id):
+        if name_id >= len(self.names):
+            self.refresh()
+        return self.names[name_id] if name_id < len(self.names) else 'Unknown'
+
+
+class RingStore():
+    """Process samples in a memory-mapped ring buffer with a separate name dictionary"""
+
+    DEFAULT_CAPACITY = 1_000_000
+
+    def __init__(self, path, capacity=None, writable=False):
+        self.path = Path(path)
+        # Names first: a reader that sees the new ring must not pair it with the old names
+        self.names = NameDictionary(self.path.with_suffix('.names'), writable)
+        self.ring = RingBuffer(self.path, PROCESS_RECORD_DTYPE, capacity, writable)
+
+    def append(self, timestamp, processes):
+        """Append one monitoring cycle; timestamp uses the CSV '%Y-%m-%d %H:%M:%S' format"""
+        epoch = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').timestamp()
+        records = np.empty(len(processes), dtype=PROCESS_RECORD_DTYPE)
+        for i, proc in enumerate(processes):
+            cpu = proc.get('cpu_percent')
+            records[i] = (
+                epoch,
+                proc['pid'],
+                self.names.get_id(proc['name']),
+                int(proc['memory_mb'] * 1024 * 1024),
+                np.nan if cpu is None else cpu
+            )
+        self.ring.append(records)
+
+    def view(self):
+        """Zero-copy view of the stored samples"""
+        return self.ring.view()
+
+    def is_replaced(self):
+        return self.ring.is_replaced()
+
+    def aggregate_by_name(self):
+        """Per-name mean memory (MB), mean CPU and sample count over the ring"""
+        records = self.view()
+        if len(records) == 0:
+            return []
+
+        name_ids = records['name_id']
+        counts = np.bincount(name_ids)
+        memory_sums = np.bincount(name_ids, weights=records['rss']) / (1024 * 1024)
+        cpu = records['cpu']
+        cpu_known = ~np.isnan(cpu)
+        cpu_counts = np.bincount(name_ids[cpu_known], minlength=len(counts))
+        cpu_sums = np.bincount(name_ids[cpu_known], weights=cpu[cpu_known], minlength=len(counts))
+
+        return [
+            {
+                'name': self.names.get_name(name_id),
+                'avg_memory': float(memory_sums[name_id] / counts[name_id]),
+                'avg_cpu': float(cpu_sums[name_id] / cpu_counts[name_id]) if cpu_counts[name_id] else 0.0,
+                'count': int(counts[name_id])
+            }
+            for name_id in np.flatnonzero(counts)
+        ]
@@ -0,0 +1,250 @@
+import contextlib
+import csv
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.src.utils import TaskMonitorLogger
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+ROLLUP_COLUMNS = [
+    'Timestamp', 'PID', 'Name',
+    'Memory Min (MB)', 'Memory Max (MB)', 'Memory Mean (MB)', 'Memory Last (MB)',
+    'CPU Min (%)', 'CPU Max (%)', 'CPU Mean (%)', 'CPU Last (%)',
+    'Samples'
+]
+
+
+def find_timestamp_offset(file, data_start, size, cutoff):
+    """Byte offset of the first row whose timestamp is >= cutoff in a time-sorted CSV
+
+    Binary search narrows the range, then a short linear scan finds the row start.
+    """
+    low, high = data_start, size
+    while high - low > 64 * 1024:
+        middle = (low + high) // 2
+        file.seek(middle)
+        file.readline()  # Skip to the next row start
+        position = file.tell()
+        line = file.readline()
+        if not line or line[:len(cutoff)].decode('utf-8') >= cutoff:
+            high = middle
+        else:
+            low = position
+
+    file.seek(low)
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line or line[:len(cutoff)].decode('utf-8') >= cutoff:
+            return position
+
+
+def oldest_timestamp(path):
+    """Timestamp string of the first row of a time-sorted CSV, None when it has no rows"""
+    try:
+        with open(path, 'rb') as file:
+            file.readline()  # Header
+            line = file.readline()
+    except FileNotFoundError:
+        return None
+    return line.split(b',', 1)[0].decode('utf-8') if line.endswith(b'\n') else None
+
+
+def trim_csv_before(path, cutoff, lock=None):
+    """Drop rows older than cutoff from a time-sorted CSV, keeping the header
+
+    The remaining rows are copied to a new file that replaces the original,
+    so readers see a new inode and rebuild their state. The bulk of the copy
+    runs without `lock`; it is only taken, when given, to copy the rows that
+    writers holding it appended meanwhile and to swap the file in. Returns
+    the number of bytes dropped.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 0
+
+    with open(path, 'rb') as source:
+        header = source.readline()
+        size = os.fstat(source.fileno()).st_size
+        offset = find_timestamp_offset(source, len(header), size, cutoff)
+        if offset <= len(header):
+            return 0
+
+        temp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(temp_path, 'wb') as target:
+            target.write(header)
+            source.seek(offset)
+            shutil.copyfileobj(source, target)
+            with lock or contextlib.nullcontext():
+                shutil.copyfileobj(source, target)  # Rows appended during the copy
+                target.flush()
+                os.replace(temp_path, path)
+    return offset - len(header)
+
+
+class RollupTier():
+    """One rollup resolution: open bucket accumulators plus its output file"""
+
+    def __init__(self, name, resolution, retention, path):
+        self.name = name
+        self.resolution = resolution  # seconds
+        self.retention = retention  # seconds, None keeps everything
+        self.path = Path(path)
+        self.bucket_start = None
+        self.accumulators = {}
+
+    def bucket_for(self, moment):
+        epoch = int(moment.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % self.resolution)
+
+
+class RollupWriter():
+    """Rolls raw monitoring samples up into 1-minute and 1-hour tiers.
+
+    Each tier row holds min/max/mean/last memory and CPU per (PID, name)
+    for one bucket. Buckets are written when the first sample of the next
+    bucket arrives. Once an hour, a background thread archives closed raw
+    segments and trims every tier and the raw CSV to their retention
+    period, so the sampling tick never waits on it. Rows may outlive their
+    retention by up to TRIM_SLACK, so that a file is rewritten about once
+    per TRIM_SLACK rather than every hour.
+    """
+
+    TRIM_SLACK = 86400  # seconds
+
+    def __init__(self, databag='databag', raw_file=None, raw_retention=7 * 86400,
+                 minute_retention=30 * 86400, hour_retention=365 * 86400, archive=None, raw_lock=None):
+        """
+        Args:
+            databag: Directory holding the tier files
+            raw_file: Raw monitoring CSV to apply raw_retention to (None to leave it alone)
+            raw_retention, minute_retention, hour_retention: Seconds of data to keep per tier
+            archive: Optional ParquetArchive that closed segments of raw_file are appended to
+            raw_lock: Lock held by whoever appends to raw_file, taken to swap in the trimmed file
+        """
+        databag = Path(databag)
+        self.raw_file = Path(raw_file) if raw_file else None
+        self.raw_retention = raw_retention
+        self.raw_lock = raw_lock
+        self.archive = archive
+        self.lock = threading.Lock()  # Held while appending to the tier files
+        self._retention_thread = None
+        self.tiers = [
+            RollupTier('1m', 60, minute_retention, databag / 'rollup-1m.csv'),
+            RollupTier('1h', 3600, hour_retention, databag / 'rollup-1h.csv'),
+        ]
+        self.logger = TaskMonitorLogger.get_logger('rollup')
+
+    def add_cycle(self, timestamp, processes):
+        """Fold one monitoring cycle ('%Y-%m-%d %H:%M:%S' timestamp) into every tier"""
+        moment = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        for tier in self.tiers:
+            bucket = tier.bucket_for(moment)
+            if tier.bucket_start is not None and bucket != tier.bucket_start:
+                self._flush_tier(tier)
+                if tier.name == '1h':
+                    self._start_retention(moment)
+            tier.bucket_start = bucket
+
+            for proc in processes:
+                self._accumulate(tier, proc)
+
+    @staticmethod
+    def _accumulate(tier, proc):
+        memory = proc['memory_mb']
+        cpu = proc.get('cpu_percent')
+        key = (proc['pid'], proc['name'])
+        acc = tier.accumulators.get(key)
+        if acc is None:
+            # [mem_min, mem_max, mem_sum, mem_last, cpu_min, cpu_max, cpu_sum, cpu_count, cpu_last, samples]
+            acc = tier.accumulators[key] = [memory, memory, 0.0, memory, None, None, 0.0, 0, None, 0]
+        acc[0] = min(acc[0], memory)
+        acc[1] = max(acc[1], memory)
+        acc[2] += memory
+        acc[3] = memory
+        if cpu is not None:
+            acc[4] = cpu if acc[4] is None else min(acc[4], cpu)
+            acc[5] = cpu if acc[5] is None else max(acc[5], cpu)
+            acc[6] += cpu
+            acc[7] += 1
+            acc[8] = cpu
+        acc[9] += 1
+
+    def _flush_tier(self, tier):
+        """Append the open bucket of a tier to its file"""
+        if not tier.accumulators:
+            return
+        tier.path.parent.mkdir(parents=True, exist_ok=True)
+        file_exists = tier.path.exists()
+        bucket = tier.bucket_start.strftime(TIMESTAMP_FORMAT)
+
+        def fmt(value):
+            return '' if value is None else round(value, 2)
+
+        with self.lock, open(tier.path, mode='a', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            if not file_exists:
+                writer.writerow(ROLLUP_COLUMNS)
+            for (pid, name), acc in tier.accumulators.items():
+                mem_min, mem_max, mem_sum, mem_last, cpu_min, cpu_max, cpu_sum, cpu_count, cpu_last, samples = acc
+                writer.writerow([
+                    bucket, pid, name,
+                    fmt(mem_min), fmt(mem_max), fmt(mem_sum / samples), fmt(mem_last),
+                    fmt(cpu_min), fmt(cpu_max), fmt(cpu_sum / cpu_count if cpu_count else None), fmt(cpu_last),
+                    samples
+                ])
+        self.logger.debug(f"Wrote {len(tier.accumulators)} {tier.name} rollup rows for {bucket}")
+        tier.accumulators = {}
+
+    def flush(self):
+        """Write all open buckets and wait for a running retention pass, e.g. when monitoring stops"""
+        for tier in self.tiers:
+            self._flush_tier(tier)
+        if self._retention_thread is not None:
+            self._retention_thread.join()
+
+    def _start_retention(self, now):
+        """Run apply_retention on a background thread, unless the previous pass is still running"""
+        if self._retention_thread is not None and self._retention_thread.is_alive():
+            self.logger.warning("Previous retention pass is still running, skipping this one")
+            return
+        self._retention_thread = threading.Thread(
+            target=self.apply_retention, args=(now,), name='rollup-retention', daemon=True
+        )
+        self._retention_thread.start()
+
+    def apply_retention(self, now=None):
+        """Archive closed raw segments, then trim the raw CSV and every tier to its retention period
+
+        A file is only rewritten once its oldest row is more than TRIM_SLACK
+        (or its retention, if shorter) past the cutoff.
+        """
+        now = now or datetime.now()
+        trim_raw = self.raw_file is not None
+        if self.archive and self.raw_file:
+            try:
+                self.archive.archive_csv(self.raw_file, now)
+            except Exception as e:
+                # Keep the raw rows until a later pass has archived them
+                trim_raw = False
+                self.logger.error(f"Error archiving {self.raw_file}, raw retention postponed: {e}")
+        targets = [(self.raw_file, self.raw_retention, self.raw_lock)] if trim_raw else []
+        targets += [(tier.path, tier.retention, self.lock) for tier in self.tiers]
+        for path, retention, lock in targets:
+            if not retention:
+                continue
+            cutoff = now - timedelta(seconds=retention)
+            oldest = oldest_timestamp(path)
+            slack = timedelta(seconds=min(self.TRIM_SLACK, retention))
+            if oldest is None or oldest >= (cutoff - slack).strftime(TIMESTAMP_FORMAT):
+                continue
+            cutoff = cutoff.strftime(TIMESTAMP_FORMAT)
+            try:
+                dropped = trim_csv_before(path, cutoff, lock)
+                if dropped:
+                    self.logger.info(f"Retention: dropped {dropped} bytes older than {cutoff} from {path}")
+            except Exception as e:
+                self.logger.error(f"Error applying retention to {path}: {e}")
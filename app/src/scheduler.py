@@ -0,0 +1,144 @@
+import threading
+import time
+from app.src.utils import TaskMonitorLogger
+from app.src.utils.metrics import REGISTRY
+
+LAG_SECONDS = REGISTRY.histogram(
+    'taskmonitor_scheduler_lag_seconds', 'Delay between a job deadline and the job starting', ['job']
+)
+MISSED_TICKS = REGISTRY.counter(
+    'taskmonitor_scheduler_missed_ticks_total', 'Job deadlines skipped because the job overran', ['job']
+)
+JOB_ERRORS = REGISTRY.counter(
+    'taskmonitor_scheduler_job_errors_total', 'Job runs that raised an exception', ['job']
+)
+
+
+class ScheduledJob():
+    """A sampler run by SamplingScheduler at a fixed interval"""
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_deadline = None
+        self.runs = 0
+        self.missed_ticks = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+
+class SchedulerTick():
+    """Context shared by all jobs that are due at the same moment
+
+    Jobs use shared() for data more than one of them needs, e.g. a process
+    scan, so coinciding samplers don't repeat the same expensive work.
+    """
+
+    def __init__(self, monotonic_time):
+        self.monotonic_time = monotonic_time
+        self._shared = {}
+
+    def shared(self, key, factory):
+        if key not in self._shared:
+            self._shared[key] = factory()
+        return self._shared[key]
+
+
+class SamplingScheduler():
+    """Runs several samplers at fixed cadences on time.monotonic deadlines.
+
+    Each job's deadlines lie on a fixed grid (start + n * interval), so the
+    time spent collecting and writing does not accumulate into drift. When a
+    job overruns past one or more of its next deadlines, those ticks are
+    skipped, counted as missed and reported instead of being run late in a burst.
+    """
+
+    def __init__(self, clock=time.monotonic, catch_errors=False):
+        """
+        Args:
+            clock: Monotonic time source
+            catch_errors: Log and count an exception raised by a job and keep running,
+                instead of letting it stop the scheduler
+        """
+        self.clock = clock
+        self.catch_errors = catch_errors
+        self.jobs = []
+        self.stop_event = threading.Event()
+        self.logger = TaskMonitorLogger.get_logger('scheduler')
+
+    def add_job(self, name, interval, func):
+        """
+        Register a sampler
+
+        Args:
+            name: Label used in logs and stats
+            interval: Seconds between runs
+            func: Callable taking the SchedulerTick it runs in
+        """
+        if interval <= 0:
+            raise ValueError(f"Interval for {name} must be positive")
+        job = ScheduledJob(name, interval, func)
+        self.jobs.append(job)
+        return job
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        """Run jobs until stop() is called or, unless catch_errors is set, a job raises"""
+        start = self.clock()
+        for job in self.jobs:
+            job.next_deadline = start
+
+        while not self.stop_event.is_set():
+            now = self.clock()
+            due = [job for job in self.jobs if job.next_deadline <= now]
+            if due:
+                tick = SchedulerTick(now)
+                for job in due:
+                    job.last_lag = self.clock() - job.next_deadline
+                    job.max_lag = max(job.max_lag, job.last_lag)
+                    LAG_SECONDS.labels(job.name).observe(job.last_lag)
+                    try:
+                        job.func(tick)
+                    except Exception as e:
+                        if not self.catch_errors:
+                            raise
+                        job.errors += 1
+                        JOB_ERRORS.labels(job.name).inc()
+                        self.logger.error(f"Job '{job.name}' failed: {e}")
+                    job.runs += 1
+                    self._advance(job)
+
+            next_deadline = min(job.next_deadline for job in self.jobs)
+            self.stop_event.wait(max(0.0, next_deadline - self.clock()))
+
+    def _advance(self, job):
+        """Move a job to its next deadline on the grid, skipping any it has already missed"""
+        job.next_deadline += job.interval
+        behind = self.clock() - job.next_deadline
+        if behind >= 0:
+            missed = int(behind // job.interval) + 1
+            job.missed_ticks += missed
+            MISSED_TICKS.labels(job.name).inc(missed)
+            job.next_deadline += missed * job.interval
+            self.logger.warning(
+                f"Job '{job.name}' overran its {job.interval}s interval, missed {missed} tick(s) "
+                f"({job.missed_ticks} total)"
+            )
+
+    def stats(self):
+        """Per-job run counts, missed ticks and lag"""
+        return {
+            job.name: {
+                'interval': job.interval,
+                'runs': job.runs,
+                'missed_ticks': job.missed_ticks,
+                'errors': job.errors,
+                'last_lag': job.last_lag,
+                'max_lag': job.max_lag
+            }
+            for job in self.jobs
+        }
@@ -0,0 +1,210 @@
+import threading
+import time
+from pathlib import Path
+import numpy as np
+import psutil
+from app.src.ringstore import HEADER_DTYPE, RingBuffer
+from app.src.utils.metrics import REGISTRY
+
+SYSTEM_SAMPLE_SECONDS = REGISTRY.histogram(
+    'taskmonitor_system_sample_seconds', 'Time to read and store one system-wide sample'
+)
+
+# Record field -> API key, in record order after the timestamp; the per-core CPU array follows
+SYSTEM_FIELDS = [
+    ('cpu', 'cpu_percent'),
+    ('memory_used', 'memory_used_mb'),
+    ('memory_available', 'memory_available_mb'),
+    ('memory_percent', 'memory_percent'),
+    ('swap_used', 'swap_used_mb'),
+    ('swap_percent', 'swap_percent'),
+    ('load_1', 'load_1'),
+    ('load_5', 'load_5'),
+    ('load_15', 'load_15'),
+    ('disk_read', 'disk_read_kb_per_s'),
+    ('disk_write', 'disk_write_kb_per_s'),
+    ('net_recv', 'net_recv_kb_per_s'),
+    ('net_sent', 'net_sent_kb_per_s'),
+]
+
+BASE_RECORD_SIZE = 8 + 4 * len(SYSTEM_FIELDS)
+
+
+def system_dtype(cores):
+    """Fixed-size record of one system sample on a host with `cores` logical CPUs
+
+    All values are float32 (MB, percent, KB/s, load average); a counter
+    that is not available on the host is NaN.
+    """
+    return np.dtype([('timestamp', '<f8')] + [(field, '<f4') for field, _ in SYSTEM_FIELDS]
+                    + [('cores', '<f4', (cores,))])
+
+
+class SystemSampler():
+    """Host-wide CPU, memory, swap, load and disk/network throughput in one cheap read.
+
+    Each sample reads /proc/stat, /proc/meminfo, /proc/vmstat, /proc/loadavg,
+    /proc/diskstats and /proc/net/dev once (or their psutil equivalents on
+    other platforms), so it costs a fraction of a millisecond whatever
+    the number of processes. CPU and throughput are rates over the time
+    since the previous sample, so the first call only sets the baseline
+    and returns None.
+    """
+
+    def __init__(self):
+        self.cores = psutil.cpu_count() or 1
+        self.dtype = system_dtype(self.cores)
+        self._last = None  # (monotonic time, cpu times array, disk counters, net counters)
+
+    @staticmethod
+    def _cpu_times():
+        """(cores, 2) array of busy and total CPU seconds per logical CPU"""
+        times = psutil.cpu_times(percpu=True)
+        fields = times[0]._fields
+        values = np.array(times, dtype=np.float64)
+        total = values.sum(axis=1)
+        # Guest time is already counted in user time on Linux
+        for field in ('guest', 'guest_nice'):
+            if field in fields:
+                total -= values[:, fields.index(field)]
+        idle = sum(values[:, fields.index(field)] for field in ('idle', 'iowait') if field in fields)
+        return np.column_stack((total - idle, total))
+
+    def sample(self):
+        """One record (a 1-element array of self.dtype), None for the baseline sample"""
+        now = time.monotonic()
+        cpu_times = self._cpu_times()
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        load = psutil.getloadavg()
+
+        previous, self._last = self._last, (now, cpu_times, disk, net)
+        if previous is None or len(previous[1]) != len(cpu_times):
+            return None
+        elapsed = now - previous[0]
+
+        record = np.zeros(1, dtype=self.dtype)
+        record['timestamp'] = time.time()
+        delta = cpu_times - previous[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cores = np.clip(np.where(delta[:, 1] > 0, delta[:, 0] / delta[:, 1], 0.0) * 100, 0, 100)
+            busy, total = delta.sum(axis=0)
+        record['cores'][0, :len(cores)] = cores[:self.cores]
+        record['cpu'] = 100.0 * busy / total if total > 0 else 0.0
+
+        mb = 1024 * 1024
+        record['memory_used'] = memory.used / mb
+        record['memory_available'] = memory.available / mb
+        record['memory_percent'] = memory.percent
+        record['swap_used'] = swap.used / mb
+        record['swap_percent'] = swap.percent
+        record['load_1'], record['load_5'], record['load_15'] = load
+
+        for field, counters, last, attr in (
+            ('disk_read', disk, previous[2], 'read_bytes'), ('disk_write', disk, previous[2], 'write_bytes'),
+            ('net_recv', net, previous[3], 'bytes_recv'), ('net_sent', net, previous[3], 'bytes_sent')
+        ):
+            if counters is None or last is None or elapsed <= 0:
+                record[field] = np.nan  # No disks or interfaces visible, e.g. in some containers
+            else:
+                record[field] = max(getattr(counters, attr) - getattr(last, attr), 0) / 1024 / elapsed
+        return record
+
+    def sample_into(self, store):
+        """Take one sample and append it to a RingBuffer or SystemBuffer"""
+        started = time.perf_counter()
+        record = self.sample()
+        if record is not None:
+            store.append(record)
+        SYSTEM_SAMPLE_SECONDS.observe(time.perf_counter() - started)
+
+
+class SystemBuffer():
+    """In-memory ring of system samples for the embedded collector, read like a RingBuffer"""
+
+    def __init__(self, dtype, capacity=3600):
+        """
+        Args:
+            dtype: Record dtype (see system_dtype)
+            capacity: Number of samples kept (3600 is one hour at 1 s)
+        """
+        self.records = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def append(self, records):
+        with self.lock:
+            for record in records[-self.capacity:]:
+                self.records[self.written % self.capacity] = record
+                self.written += 1
+
+    def ordered(self):
+        """Copy of the valid records, oldest first"""
+        with self.lock:
+            if self.written <= self.capacity:
+                return self.records[:self.written].copy()
+            head = self.written % self.capacity
+            return np.concatenate((self.records[head:], self.records[:head]))
+
+
+def open_system_ring(path, dtype=None, capacity=None):
+    """Memory-mapped ring of system samples
+
+    Without a dtype the file is opened read-only and the record layout
+    (the number of cores) is derived from its header, so a dashboard can
+    read a ring written on a host with a different CPU count. The writer
+    swaps in a new file on every start (see RingBuffer), so a reader
+    reopens it once is_replaced() is true.
+    """
+    if dtype is not None:
+        return RingBuffer(path, dtype, capacity, writable=True)
+    header = np.fromfile(Path(path), dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0:
+        raise ValueError(f"{path} is not a ring store")
+    cores = (int(header['record_size'][0]) - BASE_RECORD_SIZE) // 4
+    return RingBuffer(path, system_dtype(max(cores, 1)))
+
+
+def downsample_system(records, points=300, include_cores=False):
+    """Bucket a time-ordered slice of system records down to at most `points` points
+
+    Samples are grouped into equal-count buckets. Each point carries the
+    bucket's mean of every field, plus its CPU peak (cpu_max) so that a
+    short saturation spike stays visible however wide the range is.
+    Timestamps are those of the last sample in each bucket.
+
+    Returns:
+        Dict with 'timestamps' (epoch seconds) and one list per API key, plus
+        'cores' (a list per logical CPU) when include_cores is set
+    """
+    count = len(records)
+    if count == 0:
+        series = {'timestamps': [], 'cpu_max': [], **{key: [] for _, key in SYSTEM_FIELDS}}
+        if include_cores:
+            series['cores'] = []
+        return series
+
+    buckets = min(points, count)
+    starts = np.arange(buckets) * count // buckets
+    ends = np.append(starts[1:], count) - 1
+    lengths = np.diff(np.append(starts, count))
+
+    def mean(values):
+        values = np.asarray(values, dtype=np.float64)
+        return np.round(np.add.reduceat(values, starts, axis=0) / (lengths if values.ndim == 1
+                                                                   else lengths[:, None]), 2)
+
+    series = {
+        'timestamps': records['timestamp'][ends].tolist(),
+        'cpu_max': np.round(np.maximum.reduceat(records['cpu'].astype(np.float64), starts), 2).tolist()
+    }
+    for field, key in SYSTEM_FIELDS:
+        values = mean(records[field])
+        # NaN (counter not available) is not valid JSON
+        series[key] = [None if np.isnan(value) else value for value in values.tolist()]
+    if include_cores:
+        series['cores'] = mean(records['cores']).T.tolist()
+    return series
@@ -1,8 +1,9 @@
 """
 Utils package for Task Monitor
-Contains utility modules like logging and configuration
+Contains utility modules like logging, configuration and metrics
 """
 from .logger_utils import TaskMonitorLogger, get_logger, setup_logging
 from .logging_config import configure_logging
+from .metrics import REGISTRY, MetricsRegistry
 
-__all__ = ['TaskMonitorLogger', 'get_logger', 'setup_logging', 'configure_logging']
\ No newline at end of file
+__all__ = ['TaskMonitorLogger', 'get_logger', 'setup_logging', 'configure_logging', 'REGISTRY', 'MetricsRegistry']
\ No newline at end of file
@@ -1,19 +1,70 @@
 """
 Centralized logging utility for the task monitor application
 """
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
 
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the caller; records are dropped when the queue is full"""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-bucket filter allowing at most `rate` records per second with bursts up to `burst`"""
+    
+    def __init__(self, rate, burst=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.suppressed = 0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return False
+            self.tokens -= 1
+            if self.suppressed:
+                record.msg = f"{record.msg} ({self.suppressed} similar records suppressed)"
+                self.suppressed = 0
+            return True
+
+
 class TaskMonitorLogger:
     """Centralized logger for task monitor application"""
     
     _loggers = {}
     _configured = False
+    _listener = None
+    _queue_handler = None
+    _detail_filter = None
+    
+    QUEUE_SIZE = 10000
     
     @classmethod
-    def setup_logging(cls, log_level=logging.INFO, log_file=None, console_output=True):
+    def setup_logging(cls, log_level=logging.INFO, log_file=None, console_output=True, async_logging=False):
         """
         Setup global logging configuration
         
@@ -21,6 +72,8 @@ class TaskMonitorLogger:
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             log_file: Optional file path for logging output
             console_output: Whether to output logs to console
+            async_logging: Hand records to a background writer thread through a
+                bounded queue, so callers never wait on disk or console I/O
         """
         if cls._configured:
             return
@@ -44,22 +97,73 @@ class TaskMonitorLogger:
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         
+        handlers = []
+        
         # Add console handler if requested
         if console_output:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(log_level)
             console_handler.setFormatter(formatter)
-            root_logger.addHandler(console_handler)
+            handlers.append(console_handler)
         
         # Add file handler if requested
         if log_file:
             file_handler = logging.FileHandler(log_file)
             file_handler.setLevel(log_level)
             file_handler.setFormatter(formatter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
+        
+        if async_logging:
+            # The real handlers run on the listener's thread
+            log_queue = queue.Queue(cls.QUEUE_SIZE)
+            cls._queue_handler = DroppingQueueHandler(log_queue)
+            cls._listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            cls._listener.start()
+            atexit.register(cls.shutdown)
+            root_logger.addHandler(cls._queue_handler)
+        else:
+            for handler in handlers:
+                root_logger.addHandler(handler)
         
         cls._configured = True
     
+    @classmethod
+    def shutdown(cls):
+        """Flush queued records and stop the background writer thread
+        
+        The real handlers are attached to the root logger afterwards, so the
+        dropped-records warning and anything logged later are still written.
+        """
+        if cls._listener is not None:
+            listener, cls._listener = cls._listener, None
+            listener.stop()
+            dropped = cls._queue_handler.dropped
+            root_logger = logging.getLogger()
+            root_logger.removeHandler(cls._queue_handler)
+            for handler in listener.handlers:
+                root_logger.addHandler(handler)
+            if dropped:
+                logging.getLogger(__name__).warning(
+                    f"{dropped} log records were dropped because the log queue was full"
+                )
+    
+    @classmethod
+    def set_detail_rate_limit(cls, rate, burst=None):
+        """
+        Limit per-process detail records to `rate` per second (0 disables the limit)
+        
+        Args:
+            rate: Maximum sustained detail records per second
+            burst: Maximum records allowed in a burst (defaults to one second's worth)
+        """
+        detail_logger = cls.get_process_detail_logger()
+        if cls._detail_filter is not None:
+            detail_logger.removeFilter(cls._detail_filter)
+            cls._detail_filter = None
+        if rate:
+            cls._detail_filter = RateLimitFilter(rate, burst)
+            detail_logger.addFilter(cls._detail_filter)
+    
     @classmethod
     def get_logger(cls, name):
         """
@@ -99,6 +203,11 @@ class TaskMonitorLogger:
     def get_process_logger(cls):
         """Get a specific logger for process monitoring"""
         return cls.get_logger('process_monitor')
+    
+    @classmethod
+    def get_process_detail_logger(cls):
+        """Get the logger for per-process detail records (sampled and rate limited)"""
+        return cls.get_logger('process_monitor.detail')
 
 
 # Convenience functions for quick access
@@ -121,7 +230,7 @@ def get_logger(name=None):
     return TaskMonitorLogger.get_logger(name)
 
 
-def setup_logging(log_level=logging.INFO, log_file=None, console_output=True):
+def setup_logging(log_level=logging.INFO, log_file=None, console_output=True, async_logging=False):
     """
     Convenience function to setup logging
     
@@ -129,8 +238,9 @@ def setup_logging(log_level=logging.INFO, log_file=None, console_output=True):
         log_level: Logging level
         log_file: Optional log file path
         console_output: Whether to output to console
+        async_logging: Whether to write through a background thread
     """
-    TaskMonitorLogger.setup_logging(log_level, log_file, console_output)
+    TaskMonitorLogger.setup_logging(log_level, log_file, console_output, async_logging)
 
 
 # Default configuration - can be overridden
@@ -138,5 +248,6 @@ if not TaskMonitorLogger._configured:
     setup_logging(
         log_level=logging.INFO,
         log_file=os.path.join(os.path.dirname(__file__), '..', '..', 'logs', 'task-monitor.log'),
-        console_output=True
+        console_output=True,
+        async_logging=True
     )
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+In-process metrics for task monitor self-instrumentation
+
+Counters, gauges and fixed-bucket histograms that render in the Prometheus
+text exposition format. Updating a metric costs a lock and a bisect, so
+instrumentation stays on all the time.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter():
+    """Monotonically increasing value"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, label_names, label_values):
+        yield f"{name}{_format_labels(label_names, label_values)} {_format_value(self.value)}"
+
+
+class Gauge():
+    """Value that can go up and down"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self, name, label_names, label_values):
+        yield f"{name}{_format_labels(label_names, label_values)} {_format_value(self.value)}"
+
+
+class Histogram():
+    """Distribution of observations over fixed cumulative buckets"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            if value > self.max:
+                self.max = value
+
+    @contextmanager
+    def time(self):
+        """Observe the wall time of a with-block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation within its bucket"""
+        with self._lock:
+            counts, count, maximum = list(self.counts), self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else maximum
+                return min(lower + (upper - lower) * (rank - cumulative) / bucket_count, maximum)
+            cumulative += bucket_count
+        return maximum
+
+    def samples(self, name, label_names, label_values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            labels = _format_labels(label_names, label_values, ('le', _format_value(float(bound))))
+            yield f"{name}_bucket{labels} {cumulative}"
+        labels = _format_labels(label_names, label_values)
+        yield f"{name}_sum{labels} {_format_value(total)}"
+        yield f"{name}_count{labels} {count}"
+
+
+class MetricFamily():
+    """A named metric with one child per combination of label values"""
+
+    def __init__(self, name, documentation, metric_type, label_names, factory):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.label_names = tuple(label_names)
+        self.factory = factory
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Child metric for the given label values, created on first use"""
+        child = self.children.get(values)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(values, self.factory())
+        return child
+
+    # Unlabelled families proxy to their single child
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for values, child in sorted(self.children.items()):
+            lines.extend(child.samples(self.name, self.label_names, values))
+        return lines
+
+
+class MetricsRegistry():
+    """Holds metric families and renders them for /metrics and the log"""
+
+    def __init__(self):
+        self.families = {}
+        self._lock = threading.Lock()
+        self._last_summary = time.monotonic()
+
+    def _register(self, name, documentation, metric_type, label_names, factory):
+        with self._lock:
+            family = self.families.get(name)
+            if family is None:
+                family = self.families[name] = MetricFamily(name, documentation, metric_type, label_names, factory)
+            elif family.metric_type != metric_type:
+                raise ValueError(f"Metric {name} is already registered as a {family.metric_type}")
+            return family
+
+    def counter(self, name, documentation, label_names=()):
+        return self._register(name, documentation, 'counter', label_names, Counter)
+
+    def gauge(self, name, documentation, label_names=()):
+        return self._register(name, documentation, 'gauge', label_names, Gauge)
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(name, documentation, 'histogram', label_names, lambda: Histogram(buckets))
+
+    def render(self):
+        """Prometheus text exposition of every family that has been used"""
+        lines = []
+        for name in sorted(self.families):
+            family = self.families[name]
+            if family.children:
+                lines.extend(family.render())
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write_textfile(self, path):
+        """Atomically write the exposition to a file, for another process to serve"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(self.render())
+        os.replace(temp_path, path)
+
+    def summary(self):
+        """One-line digest: p50/p95/max of histograms in ms and counter totals"""
+        parts = []
+        for name in sorted(self.families):
+            family = self.families[name]
+            short = name.replace('taskmonitor_', '')
+            for values, child in sorted(family.children.items()):
+                label = f"{short}[{','.join(map(str, values))}]" if values else short
+                if isinstance(child, Histogram):
+                    if child.count:
+                        parts.append(
+                            f"{label} n={child.count} p50={child.quantile(0.5) * 1000:.1f}ms "
+                            f"p95={child.quantile(0.95) * 1000:.1f}ms max={child.max * 1000:.1f}ms"
+                        )
+                elif child.value:
+                    parts.append(f"{label}={_format_value(child.value)}")
+        return '; '.join(parts)
+
+    def log_summary_if_due(self, logger, interval):
+        """Log summary() at most once per `interval` seconds; cheap to call on every request"""
+        now = time.monotonic()
+        if now - self._last_summary < interval:
+            return False
+        with self._lock:
+            if now - self._last_summary < interval:
+                return False
+            self._last_summary = now
+        summary = self.summary()
+        if summary:
+            logger.info(f"Metrics: {summary}")
+        return True
+
+
+# Process-wide registry used by the collector and the dashboard server
+REGISTRY = MetricsRegistry()
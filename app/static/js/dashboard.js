@@ -6,8 +6,12 @@ class TaskMonitorDashboard {
     constructor() {
         this.charts = {};
         this.autoRefreshInterval = null;
+        this.eventSource = null;
+        this.liveState = null;
         this.isAutoRefreshEnabled = false;
-        this.refreshIntervalTime = 30000; // 30 seconds
+        this.refreshIntervalTime = 30000; // 30 seconds, polling fallback only
+        this.systemRefreshInterval = null;
+        this.systemRefreshTime = 5000; // Host samples arrive every second; unchanged data is a 304
 
         this.init();
     }
@@ -19,12 +23,9 @@ class TaskMonitorDashboard {
         // Initialize all charts
         this.initializeCharts();
 
-        // Load initial data
+        // Load initial charts and summary statistics
         this.refreshAllCharts();
 
-        // Load summary statistics
-        this.loadSummaryStats();
-
         // Set up event listeners
         this.setupEventListeners();
 
@@ -59,6 +60,13 @@ class TaskMonitorDashboard {
             console.error('❌ cpu-usage-chart element not found');
         }
 
+        // Initialize Host Utilization Chart (Line Chart)
+        const systemEl = document.getElementById('system-chart');
+        if (systemEl) {
+            this.charts.system = { element: systemEl };
+            console.log('✅ System chart container ready');
+        }
+
         // Handle window resize
         window.addEventListener('resize', () => {
             this.refreshAllCharts();
@@ -142,8 +150,7 @@ class TaskMonitorDashboard {
             cpuContainer.style.display = 'block';
 
             // Refresh monitoring charts
-            this.refreshChart('memory-monitoring');
-            this.refreshChart('cpu-usage');
+            this.refreshAllCharts();
         }
 
         console.log(`✅ Switched to ${viewType} view`);
@@ -408,24 +415,119 @@ class TaskMonitorDashboard {
         element.innerHTML = `<div class="error">Error: ${message}</div>`;
     }
 
-    async refreshChart(chartType) {
-        console.log(`🔄 Refreshing chart: ${chartType}`);
-        let endpoint, chartKey, chartId, unit = 'MB';
+    async loadSystemData() {
+        const element = document.getElementById('system-chart');
+        const rangeElement = document.getElementById('system-range');
+        const range = rangeElement ? Number(rangeElement.value) : 3600;
+        // Aligned to the refresh period, so repeated requests within it share a cached response
+        const now = Math.floor(Date.now() / this.systemRefreshTime) * this.systemRefreshTime / 1000;
+        const points = Math.max(50, Math.min(600, Math.round((element ? element.clientWidth : 800) / 2)));
+        return this.loadChartData(`system?from=${now - range}&points=${points}`);
+    }
+
+    async refreshSystemChart() {
+        const element = document.getElementById('system-chart');
+        if (!element) {
+            return;
+        }
+
+        const result = await this.loadSystemData();
+        if (result.success && result.data.timestamps.length > 1) {
+            this.createSystemChart(result.data, element);
+        } else {
+            this.showError('system-chart', result.error || 'No system samples in this range');
+        }
+    }
+
+    createSystemChart(data, containerElement) {
+        d3.select(containerElement).selectAll("*").remove();
+
+        const width = containerElement.clientWidth || 800;
+        const height = containerElement.clientHeight || 320;
+        const margin = { top: 40, right: 30, bottom: 30, left: 45 };
+
+        const svg = d3.select(containerElement).append("svg")
+            .attr("viewBox", `0 0 ${width} ${height}`)
+            .attr("preserveAspectRatio", "xMidYMid meet");
+
+        const times = data.timestamps.map(t => new Date(t * 1000));
+        const x = d3.scaleTime()
+            .domain(d3.extent(times))
+            .range([margin.left, width - margin.right]);
+        const y = d3.scaleLinear()
+            .domain([0, 100])
+            .range([height - margin.bottom, margin.top]);
+
+        svg.append("g")
+            .attr("class", "axis")
+            .attr("transform", `translate(0, ${height - margin.bottom})`)
+            .call(d3.axisBottom(x).ticks(Math.max(2, Math.floor(width / 100))));
+        svg.append("g")
+            .attr("class", "axis")
+            .attr("transform", `translate(${margin.left}, 0)`)
+            .call(d3.axisLeft(y).ticks(5).tickFormat(d => `${d}%`));
+
+        const series = [
+            { key: 'cpu_max', label: 'CPU peak', color: '#b3bdf5', dash: '4,3' },
+            { key: 'cpu_percent', label: 'CPU', color: '#667eea' },
+            { key: 'memory_percent', label: 'Memory', color: '#e67e22' },
+            { key: 'swap_percent', label: 'Swap', color: '#e74c3c' }
+        ];
+
+        series.forEach(({ key, color, dash }) => {
+            const line = d3.line()
+                .defined(d => d[1] !== null)
+                .x(d => x(d[0]))
+                .y(d => y(d[1]));
+            svg.append("path")
+                .datum(times.map((t, i) => [t, data[key][i]]))
+                .attr("class", "line")
+                .style("stroke", color)
+                .style("stroke-dasharray", dash || null)
+                .attr("d", line);
+        });
+
+        // Legend with the latest value of each series, then the load averages
+        const last = data.timestamps.length - 1;
+        const legend = svg.append("g")
+            .attr("transform", `translate(${margin.left}, 18)`);
+        let offset = 0;
+        series.forEach(({ key, label, color }) => {
+            const item = legend.append("g").attr("transform", `translate(${offset}, 0)`);
+            item.append("rect")
+                .attr("width", 12)
+                .attr("height", 12)
+                .attr("y", -6)
+                .style("fill", color);
+            const text = item.append("text")
+                .attr("x", 16)
+                .attr("dy", "0.35em")
+                .attr("class", "legend-text")
+                .text(`${label} ${data[key][last] === null ? 'n/a' : data[key][last] + '%'}`);
+            offset += text.node().getComputedTextLength() + 36;
+        });
+        legend.append("text")
+            .attr("x", offset)
+            .attr("dy", "0.35em")
+            .attr("class", "legend-text")
+            .text(`Load ${data.load_1[last]} / ${data.load_5[last]} / ${data.load_15[last]} ` +
+                `(${data.cores_count} CPUs)`);
+    }
+
+    async loadDashboardData() {
+        // One request returns every chart and the summary, computed from a single load of each data source
+        return this.loadChartData('dashboard');
+    }
+
+    renderChart(chartType, payload, timestamp) {
+        let chartId, unit = 'MB';
 
         switch (chartType) {
             case 'memory-monitoring':
-                endpoint = 'memory-monitoring';
-                chartKey = 'memoryMonitoring';
-                chartId = 'memory-chart';  // Use main memory chart container
-                break;
             case 'memory-snapshot':
-                endpoint = 'memory-snapshot';
-                chartKey = 'memorySnapshot';
                 chartId = 'memory-chart';  // Use main memory chart container
                 break;
             case 'cpu-usage':
-                endpoint = 'cpu-usage';
-                chartKey = 'cpuUsage';
                 chartId = 'cpu-usage-chart';
                 unit = '%';
                 break;
@@ -434,26 +536,50 @@ class TaskMonitorDashboard {
                 return;
         }
 
-        this.showLoading(chartId);
-
-        const result = await this.loadChartData(endpoint);
-        console.log(`📊 Chart data for ${chartType}:`, result);
-
-        if (result.success && result.data.length > 0) {
+        if (payload && payload.data.length > 0) {
             console.log(`🎨 Creating D3.js chart for ${chartType}`);
 
             const containerElement = document.getElementById(chartId);
 
             if (containerElement) {
-                this.createNightingaleChart(result.data, result.title, containerElement, unit);
-                this.updateTimestamp(result.timestamp);
+                this.createNightingaleChart(payload.data, payload.title, containerElement, unit);
+                this.updateTimestamp(timestamp);
                 console.log(`✅ Chart ${chartType} updated successfully`);
             } else {
                 console.error(`❌ Container ${chartId} not found for ${chartType}`);
                 this.showError(chartId, 'Chart container not found');
             }
         } else {
-            console.log(`⚠️ No data or error for ${chartType}:`, result);
+            console.log(`⚠️ No data for ${chartType}`);
+            this.showError(chartId, 'No data available');
+        }
+    }
+
+    renderSummaryStats(data, timestamp) {
+        // Update stats
+        document.getElementById('total-processes').textContent =
+            data.monitoring.total_processes || 0;
+        document.getElementById('total-memory').textContent =
+            Math.round(data.monitoring.total_memory || 0);
+        document.getElementById('total-cpu').textContent =
+            Math.round((data.monitoring.total_cpu || 0) * 100) / 100;
+
+        this.updateTimestamp(timestamp);
+    }
+
+    async refreshChart(chartType) {
+        console.log(`🔄 Refreshing chart: ${chartType}`);
+        if (chartType === 'system') {
+            return this.refreshSystemChart();
+        }
+        const chartId = chartType === 'cpu-usage' ? 'cpu-usage-chart' : 'memory-chart';
+
+        this.showLoading(chartId);
+
+        const result = await this.loadDashboardData();
+        if (result.success) {
+            this.renderChart(chartType, result.data[chartType], result.timestamp);
+        } else {
             this.showError(chartId, result.error || 'No data available');
         }
     }
@@ -473,34 +599,20 @@ class TaskMonitorDashboard {
 
         console.log(`🔄 Refreshing charts for ${currentView} view:`, chartTypes);
 
-        // Refresh charts in parallel
-        const promises = chartTypes.map(chartType => this.refreshChart(chartType));
-        await Promise.all(promises);
-
-        // Also refresh summary stats
-        await this.loadSummaryStats();
-    }
+        // Host utilization is independent of the view and has its own endpoint
+        this.refreshSystemChart();
 
-    async loadSummaryStats() {
-        try {
-            const result = await this.loadChartData('process-summary');
-
-            if (result.success) {
-                const data = result.data;
-
-                // Update stats
-                document.getElementById('total-processes').textContent =
-                    data.monitoring.total_processes || 0;
-                document.getElementById('total-memory').textContent =
-                    Math.round(data.monitoring.total_memory || 0);
-                document.getElementById('total-cpu').textContent =
-                    Math.round((data.monitoring.total_cpu || 0) * 100) / 100;
-
-                this.updateTimestamp(result.timestamp);
-            }
-        } catch (error) {
-            console.error('Error loading summary stats:', error);
+        const result = await this.loadDashboardData();
+        if (!result.success) {
+            chartTypes.forEach(chartType => this.showError(
+                chartType === 'cpu-usage' ? 'cpu-usage-chart' : 'memory-chart',
+                result.error || 'No data available'
+            ));
+            return;
         }
+
+        chartTypes.forEach(chartType => this.renderChart(chartType, result.data[chartType], result.timestamp));
+        this.renderSummaryStats(result.data.summary, result.timestamp);
     }
 
     updateTimestamp(timestamp) {
@@ -521,25 +633,118 @@ class TaskMonitorDashboard {
         this.isAutoRefreshEnabled = true;
         document.getElementById('auto-refresh-status').textContent = 'Auto-refresh: ON';
 
-        this.autoRefreshInterval = setInterval(() => {
-            this.refreshAllCharts();
-        }, this.refreshIntervalTime);
+        this.systemRefreshInterval = setInterval(() => {
+            this.refreshSystemChart();
+        }, this.systemRefreshTime);
+
+        if (typeof EventSource === 'undefined') {
+            // Fall back to polling on browsers without Server-Sent Events
+            this.autoRefreshInterval = setInterval(() => {
+                this.refreshAllCharts();
+            }, this.refreshIntervalTime);
+            console.log('Auto-refresh started (polling)');
+            return;
+        }
+
+        // The server pushes a full snapshot on connect, then only changed values
+        this.eventSource = new EventSource('/api/stream');
+        this.eventSource.addEventListener('snapshot', (event) => {
+            this.liveState = JSON.parse(event.data);
+            this.renderLiveState({ memory: true, cpu: true, summary: true });
+        });
+        this.eventSource.addEventListener('update', (event) => {
+            this.applyStreamUpdate(JSON.parse(event.data));
+        });
+        this.eventSource.onerror = () => {
+            console.warn('⚠️ Live stream interrupted, the browser will reconnect');
+        };
 
-        console.log('Auto-refresh started');
+        console.log('Auto-refresh started (live stream)');
     }
 
     stopAutoRefresh() {
         this.isAutoRefreshEnabled = false;
         document.getElementById('auto-refresh-status').textContent = 'Auto-refresh: OFF';
 
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+
         if (this.autoRefreshInterval) {
             clearInterval(this.autoRefreshInterval);
             this.autoRefreshInterval = null;
         }
 
+        if (this.systemRefreshInterval) {
+            clearInterval(this.systemRefreshInterval);
+            this.systemRefreshInterval = null;
+        }
+
         console.log('Auto-refresh stopped');
     }
 
+    applyStreamUpdate(update) {
+        if (!this.liveState) {
+            return;
+        }
+
+        const dirty = {};
+        ['memory', 'cpu'].forEach(chart => {
+            const diff = update[chart];
+            if (!diff) {
+                return;
+            }
+            Object.assign(this.liveState[chart], diff.changed);
+            diff.removed.forEach(name => delete this.liveState[chart][name]);
+            dirty[chart] = true;
+        });
+
+        if (update.summary) {
+            Object.assign(this.liveState.summary, update.summary);
+            dirty.summary = true;
+        }
+
+        this.liveState.timestamp = update.timestamp;
+        this.renderLiveState(dirty);
+    }
+
+    renderLiveState(dirty) {
+        const toChartData = values => Object.entries(values)
+            .map(([name, value]) => ({ name, value }))
+            .sort((a, b) => b.value - a.value);
+
+        const currentViewElement = document.querySelector('input[name="view-type"]:checked');
+        const currentView = currentViewElement ? currentViewElement.value : 'monitoring';
+
+        // The snapshot view keeps its own memory chart; only monitoring data is streamed
+        if (dirty.memory && currentView === 'monitoring') {
+            const data = toChartData(this.liveState.memory);
+            if (data.length > 0) {
+                this.createNightingaleChart(data, 'Memory Usage (Performance Monitoring)',
+                    document.getElementById('memory-chart'));
+            }
+        }
+
+        if (dirty.cpu) {
+            const data = toChartData(this.liveState.cpu);
+            if (data.length > 0) {
+                this.createNightingaleChart(data, 'CPU Usage (Performance Monitoring)',
+                    document.getElementById('cpu-usage-chart'), '%');
+            }
+        }
+
+        if (dirty.summary) {
+            const summary = this.liveState.summary;
+            document.getElementById('total-processes').textContent = summary.total_processes || 0;
+            document.getElementById('total-memory').textContent = Math.round(summary.total_memory || 0);
+            document.getElementById('total-cpu').textContent =
+                Math.round((summary.total_cpu || 0) * 100) / 100;
+        }
+
+        this.updateTimestamp(this.liveState.timestamp);
+    }
+
     // Cleanup method
     destroy() {
         this.stopAutoRefresh();
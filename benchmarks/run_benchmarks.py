@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Task Monitor - Reproducible benchmark suite
+
+Measures:
+  - collector: cycle time and allocations of monitor_top_processes against a
+    synthetic process table (benchmarks/fake_psutil.py)
+  - parallel: speedup of sharded collection (GetProcesses workers) over the serial scan
+  - writer: append throughput of CSVConverter.append_to_csv_file
+  - api: latency of each Flask endpoint against generated monitoring CSVs
+
+Results are written as JSON. With --compare, results are checked against a
+stored baseline and regressions beyond --threshold make the run exit non-zero.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / 'app'))
+
+from benchmarks.fake_psutil import FakePsutil
+import app.src.gettasks as gettasks
+
+
+def result(value, unit, better='lower'):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def time_calls(func, repeat):
+    """Median and minimum wall time of `repeat` calls, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+def bench_collector(process_counts, cycles, limit=20):
+    """Cycle time and allocations of monitor_top_processes on a fake process table"""
+    results = {}
+    real_psutil = gettasks.psutil
+    try:
+        for count in process_counts:
+            gettasks.psutil = FakePsutil(count)
+            get_processes = gettasks.GetProcesses()
+            get_processes.monitor_top_processes(limit)  # Warm up
+
+            median, best = time_calls(lambda: get_processes.monitor_top_processes(limit), cycles)
+            results[f'collector.cycle_ms.{count}'] = result(round(median, 3), 'ms')
+            results[f'collector.cycle_min_ms.{count}'] = result(round(best, 3), 'ms')
+
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            get_processes.monitor_top_processes(limit)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            allocations = sum(stat.count for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+            results[f'collector.peak_kib.{count}'] = result(round(peak / 1024, 1), 'KiB')
+            results[f'collector.live_blocks.{count}'] = result(allocations, 'blocks')
+            print(f"  collector {count:>6} processes: {median:8.2f} ms/cycle, peak {peak / 1024:8.1f} KiB")
+    finally:
+        gettasks.psutil = real_psutil
+    return results
+
+
+def bench_collector_parallel(process_counts, worker_counts, cycles, limit=20):
+    """Speedup of sharded collection over the serial scan on the same process table
+
+    Workers are forked so they inherit the synthetic table. Churn is off so
+    both paths see the same processes and their top-k can be compared.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        multiprocessing.set_start_method('fork', force=True)
+
+    results = {}
+    real_psutil = gettasks.psutil
+    try:
+        for count in process_counts:
+            gettasks.psutil = FakePsutil(count, churn=0)
+            serial = gettasks.GetProcesses()
+            expected = [proc['pid'] for proc in serial.monitor_top_processes(limit)]
+            serial_ms, _ = time_calls(lambda: serial.monitor_top_processes(limit), cycles)
+
+            for workers in worker_counts:
+                parallel = gettasks.GetProcesses(workers=workers)
+                try:
+                    actual = [proc['pid'] for proc in parallel.monitor_top_processes(limit)]  # Warm up the pool
+                    median, _ = time_calls(lambda: parallel.monitor_top_processes(limit), cycles)
+                finally:
+                    parallel.close()
+                if actual != expected:
+                    print(f"  WARNING: {workers} workers returned a different top {limit} than the serial scan")
+
+                speedup = serial_ms / median
+                results[f'collector.parallel_cycle_ms.{count}.{workers}w'] = result(round(median, 3), 'ms')
+                results[f'collector.parallel_speedup.{count}.{workers}w'] = result(round(speedup, 2), 'x', better='higher')
+                print(f"  collector {count:>6} processes, {workers:>2} workers: {median:8.2f} ms/cycle "
+                      f"({speedup:.2f}x vs {serial_ms:.2f} ms serial)")
+    finally:
+        gettasks.psutil = real_psutil
+    return results
+
+
+def bench_writer(workdir, cycles, limit=20):
+    """Rows per second appended by CSVConverter.append_to_csv_file"""
+    from app.src.csvconverter import CSVConverter
+
+    real_psutil = gettasks.psutil
+    gettasks.psutil = FakePsutil(100)
+    try:
+        converter = CSVConverter()
+    finally:
+        gettasks.psutil = real_psutil
+    converter.output_file = str(Path(workdir) / 'append-benchmark.csv')
+    processes = [
+        {'pid': pid, 'name': f'proc-{pid}', 'memory_mb': pid * 1.5, 'cpu_percent': pid % 7 * 0.5}
+        for pid in range(1, limit + 1)
+    ]
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    started = time.perf_counter()
+    for _ in range(cycles):
+        converter.append_to_csv_file(timestamp, processes)
+    elapsed = time.perf_counter() - started
+
+    rows_per_second = cycles * limit / elapsed
+    print(f"  writer: {rows_per_second:,.0f} rows/s ({elapsed / cycles * 1000:.3f} ms/cycle)")
+    return {
+        'writer.rows_per_second': result(round(rows_per_second), 'rows/s', better='higher'),
+        'writer.cycle_ms': result(round(elapsed / cycles * 1000, 4), 'ms'),
+    }
+
+
+def generate_monitoring_csv(path, size_mb, processes_per_cycle=20, names=60):
+    """Write a monitoring CSV of roughly size_mb megabytes with 2 second cycles"""
+    target = size_mb * 1024 * 1024
+    started = datetime(2026, 1, 1)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('Timestamp,PID,Name,Memory (MB),CPU (%)\n')
+        cycle = 0
+        while file.tell() < target:
+            timestamp = (started + timedelta(seconds=2 * cycle)).strftime('%Y-%m-%d %H:%M:%S')
+            rows = []
+            for i in range(processes_per_cycle):
+                pid = 1000 + (cycle // 500 + i) % (names * 2)
+                rows.append(f"{timestamp},{pid},proc-{pid % names},{(pid * 7 + cycle % 97) / 3:.2f},{(cycle * i) % 400 / 10:.2f}\n")
+            file.write(''.join(rows))
+            cycle += 1
+
+
+def bench_api(workdir, sizes_mb, repeat):
+    """Cold and warm latency of each API endpoint against generated CSVs"""
+    import backend_server
+
+    endpoints = [
+        '/api/memory-monitoring',
+        '/api/memory-snapshot',
+        '/api/cpu-usage',
+        '/api/process-summary',
+        '/api/history?name=proc-1&points=500',
+    ]
+    results = {}
+    client = backend_server.app.test_client()
+    original_processor = backend_server.data_processor
+
+    try:
+        for size in sizes_mb:
+            databag = Path(workdir) / f'databag-{size}mb'
+            databag.mkdir(exist_ok=True)
+            generate_monitoring_csv(databag / 'performance-monitoring.csv', size)
+            shutil.copy(databag / 'performance-monitoring.csv', databag / 'performance-snapshot.csv')
+
+            for endpoint in endpoints:
+                # A fresh processor per endpoint so 'cold' includes building its state
+                backend_server.data_processor = backend_server.DataProcessor(store='csv', databag_path=str(databag))
+                started = time.perf_counter()
+                response = client.get(endpoint)
+                cold = (time.perf_counter() - started) * 1000
+                if response.status_code != 200:
+                    raise RuntimeError(f"{endpoint} returned {response.status_code}")
+                warm, _ = time_calls(lambda: client.get(endpoint), repeat)
+
+                key = endpoint.split('?')[0].rsplit('/', 1)[-1]
+                results[f'api.{key}.cold_ms.{size}mb'] = result(round(cold, 2), 'ms')
+                results[f'api.{key}.warm_ms.{size}mb'] = result(round(warm, 2), 'ms')
+                print(f"  api {key:<18} {size:>5} MB: cold {cold:9.1f} ms, warm {warm:8.2f} ms")
+            shutil.rmtree(databag)
+    finally:
+        backend_server.data_processor = original_processor
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline, current, change) for every metric that regressed"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous['value']:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        if current['better'] == 'higher':
+            change = -change
+        if change > threshold:
+            regressions.append((name, previous['value'], current['value'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task Monitor - Benchmark Suite")
+    parser.add_argument('--suite', choices=['all', 'collector', 'parallel', 'writer', 'api'], default='all',
+                        help='Which benchmarks to run (default: all)')
+    parser.add_argument('--processes', default='1000,10000,50000',
+                        help='Comma-separated synthetic process table sizes (default: 1000,10000,50000)')
+    parser.add_argument('--cycles', type=int, default=10, help='Collector cycles per size (default: 10)')
+    parser.add_argument('--workers',
+                        help='Comma-separated worker counts for the parallel suite (default: 2, 4, ... up to the core count)')
+    parser.add_argument('--append-cycles', type=int, default=2000, help='Writer cycles (default: 2000)')
+    parser.add_argument('--csv-sizes', default='10,100',
+                        help='Comma-separated generated CSV sizes in MB; add 1024 for the 1 GB case (default: 10,100)')
+    parser.add_argument('--repeat', type=int, default=5, help='Warm API calls per endpoint (default: 5)')
+    parser.add_argument('--output', default='benchmarks/results.json', help='Where to write results JSON')
+    parser.add_argument('--compare', metavar='BASELINE', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown flagged as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    # Keep log I/O out of the measurements
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='task-monitor-bench-')
+    try:
+        if args.suite in ('all', 'collector'):
+            print("Collector benchmarks")
+            process_counts = [int(count) for count in args.processes.split(',')]
+            results.update(bench_collector(process_counts, args.cycles))
+        if args.suite in ('all', 'parallel'):
+            print("Parallel collector benchmarks")
+            process_counts = [int(count) for count in args.processes.split(',')]
+            if args.workers:
+                worker_counts = [int(workers) for workers in args.workers.split(',')]
+            else:
+                cores = os.cpu_count() or 1
+                worker_counts = [2 ** power for power in range(1, cores.bit_length()) if 2 ** power < cores] + [max(cores, 2)]
+            results.update(bench_collector_parallel(process_counts, worker_counts, args.cycles))
+        if args.suite in ('all', 'writer'):
+            print("Writer benchmarks")
+            results.update(bench_writer(workdir, args.append_cycles))
+        if args.suite in ('all', 'api'):
+            print("API benchmarks")
+            sizes = [int(size) for size in args.csv_sizes.split(',')]
+            results.update(bench_api(workdir, sizes, args.repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, previous, current, change in regressions:
+            print(f"REGRESSION {name}: {previous} -> {current} ({change:+.1%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,7 @@ sys.path.insert(0, str(project_root))
 
 # Import required modules
 from app.src.csvconverter import CSVConverter
-from app.src.utils.logger_utils import get_logger
+from app.src.utils.logger_utils import TaskMonitorLogger, get_logger
 
 # Setup logger
 logger = get_logger('main')
@@ -25,15 +25,116 @@ def main():
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('--snapshot', action='store_true', help='Take a single performance snapshot')
     group.add_argument('--monitor', action='store_true', help='Start continuous monitoring mode')
+    group.add_argument('--archive', action='store_true',
+                       help='Convert closed days of the monitoring CSV to Parquet under databag/archive and exit')
+    group.add_argument('--replay', metavar='FILE',
+                       help='Feed a --record recording through the monitoring write path and report throughput')
+    group.add_argument('--analyze-leaks', action='store_true',
+                       help='Rank processes by steady RSS growth over the monitoring store (--store) and exit')
     
     # Optional arguments
     parser.add_argument('--limit', type=int, default=20, help='Number of top processes to monitor (default: 20)')
     parser.add_argument('--interval', type=int, default=2, help='Monitoring refresh interval in seconds (default: 2)')
+    parser.add_argument('--snapshot-interval', type=int, default=300,
+                        help='Seconds between snapshot refreshes while monitoring, 0 to disable (default: 300)')
+    parser.add_argument('--no-rollup', action='store_true',
+                        help='Do not maintain the 1-minute and 1-hour rollup tiers while monitoring')
+    parser.add_argument('--raw-retention', type=float, default=168,
+                        help='Hours of raw monitoring samples to keep in the CSV store (default: 168)')
+    parser.add_argument('--minute-retention', type=float, default=30,
+                        help='Days of 1-minute rollups to keep (default: 30)')
+    parser.add_argument('--hour-retention', type=float, default=365,
+                        help='Days of 1-hour rollups to keep (default: 365)')
+    parser.add_argument('--auto-archive', action='store_true',
+                        help='While monitoring, archive closed days of the CSV store to Parquet before '
+                             'retention drops them, and archive the previous run before it is cleared')
+    parser.add_argument('--process-tree', action='store_true',
+                        help='Track the parent of every process and publish subtree memory/CPU totals to '
+                             'databag/process-tree.json for /api/process-tree')
+    parser.add_argument('--tree-interval', type=int, default=10,
+                        help='Seconds between databag/process-tree.json refreshes (default: 10)')
+    parser.add_argument('--alerts', action='store_true',
+                        help='Evaluate alert rules every cycle; alerts go to the log, databag/alerts.jsonl '
+                             'and /api/alerts')
+    parser.add_argument('--alert-rules', help='JSON file of alert rules (default: built-in rules)')
+    parser.add_argument('--alert-webhook', help='URL that alert events are POSTed to as JSON')
+    parser.add_argument('--extended-metrics', action='store_true',
+                        help='Also record threads, context switches, disk I/O, open FDs and USS/PSS of the top '
+                             'processes while monitoring')
+    parser.add_argument('--expensive-every', type=int, default=10,
+                        help='Cycles between FD and USS/PSS reads of one process; the last values are carried '
+                             'forward in between (default: 10)')
+    parser.add_argument('--extended-budget', type=float, default=50,
+                        help='Milliseconds per cycle that extended metrics may take; processes over budget keep '
+                             'their previous values (default: 50)')
+    parser.add_argument('--system-interval', type=float, default=1,
+                        help='Seconds between host-wide CPU, memory, swap, load and disk/network samples in '
+                             'databag/system.ring while monitoring, 0 to disable (default: 1)')
+    parser.add_argument('--system-capacity', type=int, default=86400,
+                        help='Number of system samples kept before the oldest are overwritten (default: 86400)')
+    parser.add_argument('--record', metavar='FILE',
+                        help='While monitoring, also record every cycle to a compact binary file for --replay')
+    parser.add_argument('--speed', default='1x',
+                        help="Replay speed as a multiple of real time, e.g. 50x, or 'max' for as fast as "
+                             "possible (default: 1x)")
+    parser.add_argument('--probe', metavar='URL',
+                        help='While replaying, poll the dashboard API at URL (e.g. http://localhost:5000) '
+                             'and report its latency')
+    parser.add_argument('--min-slope', type=float, default=1.0,
+                        help='Growth in MB/hour below which --analyze-leaks ignores a process (default: 1.0)')
+    parser.add_argument('--min-r2', type=float, default=0.8,
+                        help='Goodness of fit (R²) a growth trend needs for --analyze-leaks (default: 0.8)')
+    parser.add_argument('--collector', choices=['psutil', 'procfs', 'cgroup'], default='psutil',
+                        help='Process collector: portable psutil, Linux /proc fast path, or cgroup to record one '
+                             'memory/CPU total per cgroup (container) instead of processes (default: psutil)')
+    parser.add_argument('--cgroup-depth', type=int,
+                        help='With --collector cgroup, aggregate at this many levels below /sys/fs/cgroup '
+                             '(default: leaf cgroups)')
+    parser.add_argument('--include', metavar='REGEX',
+                        help='Only collect processes whose name matches REGEX (the cgroup path with '
+                             '--collector cgroup)')
+    parser.add_argument('--exclude', metavar='REGEX',
+                        help='Skip processes whose name matches REGEX (the cgroup path with --collector cgroup)')
+    parser.add_argument('--user', action='append', dest='users', metavar='NAME',
+                        help='Only collect processes owned by NAME; repeat for several users')
+    parser.add_argument('--cgroup', metavar='REGEX',
+                        help='Only collect processes whose cgroup path matches REGEX, e.g. docker/<id>')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Shard the process scan across N workers for very large process tables, '
+                             '0 to scan serially (default: 0, psutil collector only)')
+    parser.add_argument('--worker-type', choices=['process', 'thread'], default='process',
+                        help='Worker pool used by --workers (default: process)')
+    parser.add_argument('--store', choices=['csv', 'ring'], default='csv',
+                        help='Monitoring storage backend: CSV file or memory-mapped ring buffer (default: csv)')
+    parser.add_argument('--capacity', type=int, default=1_000_000,
+                        help='Number of samples kept by the ring store before overwriting (default: 1000000)')
+    
+    parser.add_argument('--detail-log-every', type=int, default=1,
+                        help='Log per-process detail every N monitoring cycles, 0 to disable (default: 1)')
+    parser.add_argument('--detail-log-rate', type=float, default=0,
+                        help='Maximum per-process detail log records per second, 0 for no limit (default: 0)')
+    parser.add_argument('--metrics-interval', type=int, default=60,
+                        help='Seconds between metrics summaries in the log and databag/collector-metrics.prom '
+                             'refreshes, 0 to disable (default: 60)')
     
     args = parser.parse_args()
     
+    TaskMonitorLogger.set_detail_rate_limit(args.detail_log_rate)
+    
     # Create CSV converter
-    csv_converter = CSVConverter()
+    csv_converter = CSVConverter(collector=args.collector, detail_every=args.detail_log_every,
+                                 workers=args.workers, worker_type=args.worker_type,
+                                 process_tree=args.process_tree, extended_metrics=args.extended_metrics,
+                                 expensive_every=args.expensive_every,
+                                 extended_budget=args.extended_budget / 1000,
+                                 include=args.include, exclude=args.exclude, users=args.users,
+                                 cgroup=args.cgroup, cgroup_depth=args.cgroup_depth)
+    
+    retention = {
+        'raw_retention': args.raw_retention * 3600,
+        'minute_retention': args.minute_retention * 86400,
+        'hour_retention': args.hour_retention * 86400
+    }
     
     if args.snapshot:
         # Run single snapshot
@@ -48,14 +149,51 @@ def main():
         # Run monitoring mode
         logger.info(f"🔄 Starting continuous monitoring mode...")
         logger.info(f"📊 Monitoring top {args.limit} processes every {args.interval} seconds")
-        success = csv_converter.start_monitoring(limit=args.limit, refresh_interval=args.interval)
+        success = csv_converter.start_monitoring(limit=args.limit, refresh_interval=args.interval,
+                                                 store=args.store, capacity=args.capacity,
+                                                 snapshot_interval=args.snapshot_interval,
+                                                 rollup=not args.no_rollup,
+                                                 metrics_interval=args.metrics_interval,
+                                                 archive=args.auto_archive,
+                                                 tree_interval=args.tree_interval,
+                                                 alerts=args.alerts or bool(args.alert_rules or args.alert_webhook),
+                                                 alert_rules=args.alert_rules,
+                                                 alert_webhook=args.alert_webhook,
+                                                 record=args.record,
+                                                 system_interval=args.system_interval,
+                                                 system_capacity=args.system_capacity,
+                                                 retention=retention)
         if success:
             logger.info("✅ Monitoring completed")
         else:
             logger.error("❌ Monitoring failed")
             return 1
+    elif args.archive:
+        logger.info("🗄️ Archiving monitoring data...")
+        if not csv_converter.archive_monitoring_data():
+            logger.error("❌ Archiving failed")
+            return 1
+    elif args.replay:
+        from app.src.replay import parse_speed
+        
+        logger.info(f"⏩ Replaying {args.replay}...")
+        success = csv_converter.replay(args.replay, speed=parse_speed(args.speed), store=args.store,
+                                       capacity=args.capacity, snapshot_interval=args.snapshot_interval,
+                                       rollup=not args.no_rollup, retention=retention,
+                                       alerts=args.alerts or bool(args.alert_rules or args.alert_webhook),
+                                       alert_rules=args.alert_rules, alert_webhook=args.alert_webhook,
+                                       probe=args.probe)
+        if not success:
+            logger.error("❌ Replay failed")
+            return 1
+    elif args.analyze_leaks:
+        logger.info("🔍 Analyzing monitoring history for memory leaks...")
+        if not csv_converter.analyze_leaks(limit=args.limit, store=args.store, min_slope=args.min_slope,
+                                           min_r_squared=args.min_r2):
+            logger.error("❌ Leak analysis failed")
+            return 1
     else:
-        logger.error("No valid mode selected. Use --snapshot or --monitor.")
+        logger.error("No valid mode selected. Use --snapshot, --monitor, --archive, --replay or --analyze-leaks.")
         return 1
     
     return 0
@@ -0,0 +1,38 @@
+import csv
+from datetime import datetime, timedelta
+from app.backend_server import DataProcessor
+from app.src.rollup import TIMESTAMP_FORMAT, RollupWriter
+
+
+def write_monitoring_run(databag, cycles, interval=5):
+    """Raw CSV plus rollup tiers of a short run that ended just now"""
+    writer = RollupWriter(databag)
+    now = datetime.now().replace(microsecond=0)
+    with open(databag / 'performance-monitoring.csv', 'w', newline='', encoding='utf-8') as file:
+        rows = csv.writer(file)
+        rows.writerow(['Timestamp', 'PID', 'Name', 'Memory (MB)', 'CPU (%)'])
+        for i in range(cycles):
+            timestamp = (now - timedelta(seconds=interval * (cycles - i))).strftime(TIMESTAMP_FORMAT)
+            process = {'pid': 42, 'name': 'python3', 'memory_mb': 100.0 + i, 'cpu_percent': 1.0}
+            rows.writerow([timestamp, 42, 'python3', process['memory_mb'], process['cpu_percent']])
+            writer.add_cycle(timestamp, [process])
+    writer.flush()
+
+
+def test_short_open_ended_range_uses_raw_samples(tmp_path):
+    write_monitoring_run(tmp_path, cycles=5)
+    processor = DataProcessor(store='csv', databag_path=str(tmp_path))
+
+    points, source = processor.get_history(name='python3')
+
+    assert source == 'raw'
+    assert [point['value'] for point in points] == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+
+def test_range_before_any_data_uses_the_finest_tier(tmp_path):
+    write_monitoring_run(tmp_path, cycles=5)
+    processor = DataProcessor(store='csv', databag_path=str(tmp_path))
+
+    _, source = processor.get_history(name='python3', start=datetime.now() - timedelta(days=1))
+
+    assert source == 'raw'